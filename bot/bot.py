@@ -11,7 +11,7 @@ from rich.prompt import Prompt
 try:
     import dexbot_core
 except ImportError:
-    print("WARNING: Rust core module not found.")
+    sys.stderr.write("WARNING: Rust core module not found.\n")
     dexbot_core = None
 
 from bot.services.market_data_service import MarketDataService
@@ -110,7 +110,8 @@ async def run_bot_instance(network_name: str, available_networks: list) -> Optio
     
     notification_queue = asyncio.Queue()
     
-    config_db = await cache.db.get_config()
+    # Конфиг уже загружен в кэш при initialize() - повторный запрос к БД не нужен
+    config_db = cache.get_config()
     default_quote = config_db.get('default_quote_currency', 'WBNB')
     quote_address = app_config.QUOTE_TOKENS.get(default_quote, "")
     
@@ -126,7 +127,7 @@ async def run_bot_instance(network_name: str, available_networks: list) -> Optio
     )
     
     TUI_APP_INSTANCE._current_quote_symbol = default_quote
-    TUI_APP_INSTANCE._current_quote_address = quote_address
+    TUI_APP_INSTANCE._current_quote_address = quote_address.lower()
 
     bridge = BridgeManager(event_handler_callback=TUI_APP_INSTANCE.handle_rust_event)
     bridge.start() 
@@ -212,6 +213,7 @@ async def run_bot_instance(network_name: str, available_networks: list) -> Optio
 
     await market_data_service.stop()
     bridge.stop()
+    await cache.drain_pending_writes()
     await db_manager.close()
     
     TUI_APP_INSTANCE = None
@@ -1,13 +1,30 @@
 import asyncio
 import time
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, List, Optional, Set, Tuple
 from bot.core.db_manager import DatabaseManager
 from utils.aiologger import log
 
+# Масштаб wei <-> единицы по decimals (uint8 в ERC20): индекс в таблице вместо 10**N на каждом пересчёте
+POW10_FLOAT: List[float] = [float(10**i) for i in range(256)]
+
 class GlobalCache:
+    __slots__ = (
+        '_wallets', 'config', '_config_rev', 'db', '_lock',
+        '_market_gas_price_wei', '_token_decimals', '_balances', '_exact_balances_wei',
+        '_positions', '_active_trade_token', '_expected_amounts_out', '_active_trade_amount_for_quote',
+        '_best_pools', '_snap_all', '_snap_enabled', '_snap_dirty', '_wallet_lock_shards',
+        '_quote_prices_usd', '_token_metadata_cache', '_pending_db_dump',
+        '_pending_meta', '_meta_flush_task', '_pending_balances', '_balance_flush_task', '_bg_tasks',
+    )
+
+    # Число шардов блокировок кошельков (степень двойки, коллизии при обычном числе кошельков редки)
+    WALLET_LOCK_SHARDS = 256
+
     def __init__(self, db_manager: DatabaseManager):
         self._wallets: Dict[str, Dict[str, Any]] = {}
         self.config: Dict[str, Any] = {}
+        # Версия конфига: растёт при каждом изменении, потребители пересчитывают производные значения только по ней
+        self._config_rev: int = 0
         self.db = db_manager
         self._lock = asyncio.Lock()
         
@@ -18,19 +35,26 @@ class GlobalCache:
         # ОСНОВНОЙ КЭШ БАЛАНСОВ В WEI - работает мгновенно из памяти
         self._exact_balances_wei: Dict[str, Dict[str, int]] = {}
         
-        # Key: "wallet_addr:token_addr" -> {'cost': int, 'amount': int}
-        self._positions: Dict[str, Dict[str, int]] = {}
+        # Key: (wallet_addr, token_addr) -> {'cost': int, 'amount': int}
+        self._positions: Dict[Tuple[str, str], Dict[str, int]] = {}
         
         self._active_trade_token: Optional[str] = None
         
-        self._expected_amounts_out: Dict[str, Dict[str, Any]] = {} 
+        self._expected_amounts_out: Dict[Tuple[str, str, float], Dict[str, Any]] = {} 
         self._active_trade_amount_for_quote: Optional[float] = None
         
         # --- КЭШ ДЛЯ ПУЛОВ ---
-        self._best_pools: Dict[str, Dict[str, Any]] = {} 
+        # Key: (token_addr, quote_addr)
+        self._best_pools: Dict[Tuple[str, str], Dict[str, Any]] = {} 
+
+        # Снимки списка кошельков без private_key; пересобираются только после add/update/delete
+        self._snap_all: List[Dict[str, Any]] = []
+        self._snap_enabled: List[Dict[str, Any]] = []
+        self._snap_dirty: bool = True
 
         # Локи для каждого кошелька
-        self._wallet_locks: Dict[str, asyncio.Lock] = {}
+        # Фиксированный набор блокировок: кошелёк выбирает свою по адресу, словарь никогда не меняется
+        self._wallet_lock_shards: List[asyncio.Lock] = [asyncio.Lock() for _ in range(self.WALLET_LOCK_SHARDS)]
 
         self._quote_prices_usd: Dict[str, float] = {"USDT": 1.0, "USDC": 1.0, "USD1": 1.0}
 
@@ -40,16 +64,26 @@ class GlobalCache:
         # Флаг для отложенного дампа в БД
         self._pending_db_dump: bool = False
 
+        # Буфер записей recent_tokens: пишется в БД пачками
+        self._pending_meta: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        self._meta_flush_task: Optional[asyncio.Task] = None
+
+        # Буфер записей cached_balances: (кошелёк, токен) -> (wei, decimals) или None на удаление.
+        # Повторные изменения одного баланса схлопываются, всплеск уходит одной транзакцией
+        self._pending_balances: Dict[Tuple[str, str], Optional[Tuple[int, int]]] = {}
+        self._balance_flush_task: Optional[asyncio.Task] = None
+
+        # Фоновые записи в БД: держим сильные ссылки, чтобы задачи не собрал GC и их можно было дождаться при выходе
+        self._bg_tasks: Set[asyncio.Task] = set()
+
     async def initialize(self):
         async with self._lock:
             self.config = await self.db.get_config()
-            wallets_from_db = await self.db.get_all_wallets()
-            for wallet_info in wallets_from_db:
-                address = wallet_info['address']
-                full_wallet_data = await self.db.get_wallet_with_pk(address)
-                if full_wallet_data:
-                    self._wallets[address] = full_wallet_data
-                    self._wallet_locks[address.lower()] = asyncio.Lock()
+            self._config_rev += 1
+            # Один SELECT вместо get_wallet_with_pk на каждый кошелёк
+            for full_wallet_data in await self.db.get_all_wallets_with_pk():
+                address = full_wallet_data['address']
+                self._wallets[address] = full_wallet_data
             
             # --- ВОССТАНОВЛЕНИЕ БАЛАНСОВ ИЗ БД ---
             cached_bals = await self.db.get_all_cached_balances()
@@ -73,7 +107,7 @@ class GlobalCache:
                         
                         if w_addr not in self._balances:
                             self._balances[w_addr] = {}
-                        self._balances[w_addr][t_addr] = wei / (10 ** decimals)
+                        self._balances[w_addr][t_addr] = wei / POW10_FLOAT[decimals]
                         restored_count += 1
                 except ValueError:
                     continue
@@ -85,7 +119,7 @@ class GlobalCache:
             for row in all_positions:
                 w = row.get('wallet_address', '').lower()
                 t = row.get('token_address', '').lower()
-                key = f"{w}:{t}"
+                key = (w, t)
                 
                 c_wei = row.get('total_cost_wei') or '0'
                 a_wei = row.get('total_amount_wei') or '0'
@@ -139,12 +173,12 @@ class GlobalCache:
         
         if wallet_addr_lower not in self._balances:
             self._balances[wallet_addr_lower] = {}
-        self._balances[wallet_addr_lower][token_addr_lower] = new_balance / (10 ** decimals)
+        self._balances[wallet_addr_lower][token_addr_lower] = new_balance / POW10_FLOAT[decimals]
         
         self._token_decimals[token_addr_lower] = decimals
         
         if save_to_db and new_balance > 0:
-            asyncio.create_task(self._save_balance_to_db(wallet_addr_lower, token_addr_lower, new_balance, decimals))
+            self._queue_balance_write(wallet_addr_lower, token_addr_lower, (new_balance, decimals))
         
         return new_balance
 
@@ -162,23 +196,31 @@ class GlobalCache:
         
         if wallet_addr_lower not in self._balances:
             self._balances[wallet_addr_lower] = {}
-        self._balances[wallet_addr_lower][token_addr_lower] = new_balance / (10 ** decimals)
+        self._balances[wallet_addr_lower][token_addr_lower] = new_balance / POW10_FLOAT[decimals]
         
         if save_to_db:
             if new_balance > 0:
-                asyncio.create_task(self._save_balance_to_db(wallet_addr_lower, token_addr_lower, new_balance, decimals))
+                self._queue_balance_write(wallet_addr_lower, token_addr_lower, (new_balance, decimals))
             else:
-                asyncio.create_task(self._delete_balance_from_db(wallet_addr_lower, token_addr_lower))
+                self._queue_balance_write(wallet_addr_lower, token_addr_lower, None)
         
         return new_balance
 
-    async def _save_balance_to_db(self, wallet: str, token: str, balance_wei: int, decimals: int):
-        try: await self.db.save_cached_balance(wallet, token, balance_wei, decimals)
-        except Exception: pass
-
-    async def _delete_balance_from_db(self, wallet: str, token: str):
-        try: await self.db.delete_cached_balance(wallet, token)
-        except Exception: pass
+    def _spawn_db_write(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._bg_tasks.add(task)
+        task.add_done_callback(self._bg_tasks.discard)
+        return task
+
+    async def drain_pending_writes(self):
+        """Дождаться фоновых записей и сбросить буфер recent_tokens - вызывать до закрытия БД"""
+        for task in (self._meta_flush_task, self._balance_flush_task):
+            if task and not task.done():
+                task.cancel()
+        if self._bg_tasks:
+            await asyncio.gather(*list(self._bg_tasks), return_exceptions=True)
+        await self.flush_recent_tokens()
+        await self.flush_balance_writes()
 
     def get_or_load_balance_wei(self, wallet_address: str, token_address: str) -> int:
         wallet_addr_lower = wallet_address.lower()
@@ -201,9 +243,7 @@ class GlobalCache:
 
     def update_position_memory(self, wallet: str, token: str, added_cost: int, added_amount: int):
         """Обновляет позицию в памяти и БД"""
-        w = wallet.lower()
-        t = token.lower()
-        key = f"{w}:{t}"
+        key = (wallet.lower(), token.lower())
         
         # Инициализируем если нет
         if key not in self._positions:
@@ -216,15 +256,15 @@ class GlobalCache:
         new_cost = self._positions[key]['cost']
         new_amount = self._positions[key]['amount']
         
-        #asyncio.create_task(log.debug(f"[POSITION] {w[:8]}... | cost={new_cost} | amount={new_amount}"))
+        #asyncio.create_task(log.debug(f"[POSITION] {wallet[:8]}... | cost={new_cost} | amount={new_amount}"))
         
         # Отправляем ПОЛНЫЕ значения в БД (не дельту!)
-        asyncio.create_task(self.db.set_position(wallet, token, new_cost, new_amount))
+        self._spawn_db_write(self.db.set_position(wallet, token, new_cost, new_amount))
 
 
     def close_position_memory(self, wallet: str, token: str):
         """Полностью закрывает позицию"""
-        key = f"{wallet.lower()}:{token.lower()}"
+        key = (wallet.lower(), token.lower())
         
         if key in self._positions:
             #old_pos = self._positions[key]
@@ -235,23 +275,30 @@ class GlobalCache:
         #else:
         #    asyncio.create_task(log.debug(f"[POSITION CLOSE] {wallet[:8]}... | KEY NOT FOUND in memory!"))
         
-        asyncio.create_task(self.db.close_position(wallet, token))
+        self._spawn_db_write(self.db.close_position(wallet, token))
 
 
     def get_position_memory(self, wallet: str, token: str) -> Dict[str, int]:
         """Мгновенное получение позиции из памяти"""
-        key = f"{wallet.lower()}:{token.lower()}"
+        key = (wallet.lower(), token.lower())
         return self._positions.get(key, {'cost': 0, 'amount': 0})
 
+    def get_position_totals(self, wallets: List[str], token: str) -> Tuple[int, int]:
+        """Суммарные (cost_wei, balance_wei) по списку кошельков для одного токена - один проход без повторных lower()"""
+        t = token.lower()
+        total_cost = 0
+        total_amount = 0
+        for wallet in wallets:
+            w = wallet.lower()
+            pos = self._positions.get((w, t))
+            if pos:
+                total_cost += pos['cost']
+            total_amount += self._exact_balances_wei.get(w, {}).get(t) or 0
+        return total_cost, total_amount
+
     def get_open_positions_tokens(self) -> List[Tuple[str, str]]:
         """Возвращает список (wallet, token) для открытых позиций с amount > 0"""
-        result = []
-        for key, pos in self._positions.items():
-            if pos.get('amount', 0) > 0:
-                parts = key.split(':')
-                if len(parts) == 2:
-                    result.append((parts[0], parts[1]))
-        return result
+        return [key for key, pos in self._positions.items() if pos.get('amount', 0) > 0]
 
     # --- Получение списка всех токенов, которые есть на балансе ---
     def get_all_tracked_token_addresses(self) -> List[str]:
@@ -264,26 +311,28 @@ class GlobalCache:
 
     # --- МЕТОДЫ ДЛЯ РАБОТЫ С ПУЛАМИ ---
     def set_best_pool(self, token_address: str, quote_address: str, pool_info: Dict[str, Any]):
-        key = f"{token_address.lower()}_{quote_address.lower()}"
+        key = (token_address.lower(), quote_address.lower())
         self._best_pools[key] = pool_info
-        asyncio.create_task(self.db.save_cached_pool(token_address, quote_address, pool_info))
+        self._spawn_db_write(self.db.save_cached_pool(token_address, quote_address, pool_info))
 
     def get_best_pool(self, token_address: str, quote_address: str) -> Optional[Dict[str, Any]]:
-        key = f"{token_address.lower()}_{quote_address.lower()}"
+        key = (token_address.lower(), quote_address.lower())
         return self._best_pools.get(key)
     
     async def clear_pool_cache(self, token_address: str, quote_address: str):
-        key = f"{token_address.lower()}_{quote_address.lower()}"
+        key = (token_address.lower(), quote_address.lower())
         if key in self._best_pools:
             del self._best_pools[key]
         await self.db.delete_cached_pool(token_address, quote_address)
     # ---------------------------------------------
 
     def get_wallet_lock(self, wallet_address: str) -> asyncio.Lock:
-        wallet_addr_lower = wallet_address.lower()
-        if wallet_addr_lower not in self._wallet_locks:
-            self._wallet_locks[wallet_addr_lower] = asyncio.Lock()
-        return self._wallet_locks[wallet_addr_lower]
+        """Блокировка кошелька из фиксированного набора: шард по первым байтам адреса (регистр не важен)"""
+        try:
+            shard = int(wallet_address[2:10], 16)
+        except ValueError:
+            shard = hash(wallet_address.lower())
+        return self._wallet_lock_shards[shard % self.WALLET_LOCK_SHARDS]
 
     def set_active_trade_token(self, token_address: Optional[str]):
         self._active_trade_token = token_address.lower() if token_address else None
@@ -315,6 +364,9 @@ class GlobalCache:
     def set_quote_price(self, symbol: str, price: float):
         self._quote_prices_usd[symbol] = price
 
+    def set_quote_prices(self, prices: Dict[str, float]):
+        self._quote_prices_usd.update(prices)
+
     def get_quote_price(self, symbol: str) -> float:
         key = symbol[1:] if symbol.startswith('W') else symbol
         return self._quote_prices_usd.get(key, 0.0)
@@ -329,27 +381,31 @@ class GlobalCache:
         async with self._lock:
             await self.db.add_wallet(address, private_key, name, enabled)
             self._wallets[address] = {"address": address, "private_key": private_key, "name": name, "enabled": enabled}
-            self._wallet_locks[address.lower()] = asyncio.Lock()
+            self._snap_dirty = True
         return self._wallets[address]
 
     def get_wallet_by_address(self, address: str) -> Optional[Dict[str, Any]]:
         return self._wallets.get(address)
     
     def get_all_wallets(self, enabled_only: bool = False) -> List[Dict[str, Any]]:
-        wallets_list = []
-        for addr, data in self._wallets.items():
-            if enabled_only and not data.get('enabled', False):
-                continue
-            safe_data = data.copy()
-            safe_data.pop('private_key', None)
-            wallets_list.append(safe_data)
-        return wallets_list
+        """Снимок кошельков без private_key. Возвращается общий список — не изменять."""
+        if self._snap_dirty:
+            # Один проход без копии целиком: приватный ключ просто не попадает в результат.
+            # address_lower считается здесь один раз на пересборку, а не на каждую сделку/перерисовку
+            self._snap_all = [
+                {**{k: v for k, v in data.items() if k != 'private_key'}, 'address_lower': data['address'].lower()}
+                for data in self._wallets.values()
+            ]
+            self._snap_enabled = [w for w in self._snap_all if w.get('enabled', False)]
+            self._snap_dirty = False
+        return self._snap_enabled if enabled_only else self._snap_all
 
     async def update_wallet(self, address: str, update_data: Dict[str, Any]):
         async with self._lock:
             await self.db.update_wallet(address, update_data)
             if address in self._wallets:
                 self._wallets[address].update(update_data)
+                self._snap_dirty = True
         return self._wallets.get(address)
 
     async def delete_wallet(self, address: str):
@@ -357,8 +413,7 @@ class GlobalCache:
             await self.db.delete_wallet(address)
             if address in self._wallets:
                 del self._wallets[address]
-                if address.lower() in self._wallet_locks: 
-                    del self._wallet_locks[address.lower()]
+                self._snap_dirty = True
         return {"status": "deleted"}
 
     def get_token_metadata_cached(self, token_address: str) -> Optional[Dict[str, Any]]:
@@ -377,21 +432,76 @@ class GlobalCache:
         if decimals is not None:
             self._token_metadata_cache[addr]['decimals'] = decimals
 
+    META_FLUSH_INTERVAL = 0.2
+    META_FLUSH_MAX_ROWS = 100
+
+    def queue_recent_token(self, token_address: str, name: Optional[str] = None, symbol: Optional[str] = None):
+        """Поставить токен в очередь на запись в recent_tokens (без ожидания БД)"""
+        addr = token_address.lower()
+        prev_name, prev_symbol = self._pending_meta.get(addr, (None, None))
+        self._pending_meta[addr] = (name or prev_name, symbol or prev_symbol)
+        
+        if len(self._pending_meta) >= self.META_FLUSH_MAX_ROWS:
+            self._spawn_db_write(self.flush_recent_tokens())
+        elif self._meta_flush_task is None or self._meta_flush_task.done():
+            self._meta_flush_task = self._spawn_db_write(self._delayed_meta_flush())
+
+    async def _delayed_meta_flush(self):
+        await asyncio.sleep(self.META_FLUSH_INTERVAL)
+        await self.flush_recent_tokens()
+
+    async def flush_recent_tokens(self):
+        if not self._pending_meta:
+            return
+        pending, self._pending_meta = self._pending_meta, {}
+        rows = [(addr, name, symbol) for addr, (name, symbol) in pending.items()]
+        try: await self.db.bulk_upsert_recent_tokens(rows)
+        except Exception as e: await log.error(f"Ошибка записи recent_tokens: {e}")
+
+    BALANCE_FLUSH_INTERVAL = 0.05
+    BALANCE_FLUSH_MAX_ROWS = 200
+
+    def _queue_balance_write(self, wallet: str, token: str, value: Optional[Tuple[int, int]]):
+        """Поставить запись баланса (None - удаление) в очередь на запись в cached_balances"""
+        self._pending_balances[(wallet, token)] = value
+        
+        if len(self._pending_balances) >= self.BALANCE_FLUSH_MAX_ROWS:
+            self._spawn_db_write(self.flush_balance_writes())
+        elif self._balance_flush_task is None or self._balance_flush_task.done():
+            self._balance_flush_task = self._spawn_db_write(self._delayed_balance_flush())
+
+    async def _delayed_balance_flush(self):
+        await asyncio.sleep(self.BALANCE_FLUSH_INTERVAL)
+        await self.flush_balance_writes()
+
+    async def flush_balance_writes(self):
+        if not self._pending_balances:
+            return
+        pending, self._pending_balances = self._pending_balances, {}
+        upserts = [(w, t, v[0], v[1]) for (w, t), v in pending.items() if v is not None]
+        deletes = [(w, t) for (w, t), v in pending.items() if v is None]
+        try: await self.db.bulk_write_cached_balances(upserts, deletes)
+        except Exception as e: await log.error(f"Ошибка записи cached_balances: {e}")
+
     def get_config(self) -> Dict[str, Any]:
         return self.config
 
+    def get_config_rev(self) -> int:
+        return self._config_rev
+
     async def update_config(self, config_updates: Dict[str, Any]):
         async with self._lock:
             await self.db.update_config(config_updates)
             self.config.update(config_updates)
+            self._config_rev += 1
         return self.config
 
     def set_expected_amount_out(self, token_in: str, token_out: str, amount_in: float, expected_amount_out_wei: int):
-        key = f"{token_in.lower()}_{token_out.lower()}_{amount_in}"
+        key = (token_in.lower(), token_out.lower(), amount_in)
         self._expected_amounts_out[key] = {"amount_out_wei": expected_amount_out_wei, "timestamp": time.time()}
 
     def get_expected_amount_out(self, token_in: str, token_out: str, amount_in: float, max_age_seconds: int = 5) -> Optional[int]:
-        key = f"{token_in.lower()}_{token_out.lower()}_{amount_in}"
+        key = (token_in.lower(), token_out.lower(), amount_in)
         data = self._expected_amounts_out.get(key)
         if data and (time.time() - data["timestamp"] < max_age_seconds):
             return data["amount_out_wei"]
@@ -399,6 +509,7 @@ class GlobalCache:
 
     async def dump_state_to_db(self):
         """Сохраняет текущие известные балансы в базу данных перед выходом."""
+        await self.flush_recent_tokens()
         async with self._lock:
             count = 0
             for w_addr, tokens_map in self._exact_balances_wei.items():
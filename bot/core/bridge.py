@@ -14,7 +14,7 @@ except ImportError:
 
 # ===================== AUTO-FUEL SETTINGS =====================
 
-@dataclass
+@dataclass(slots=True)
 class AutoFuelSettings:
     """Настройки авто-закупки газа"""
     auto_fuel_enabled: bool = False
@@ -31,6 +31,22 @@ class AutoFuelSettings:
         }
 
 
+# ===================== TRADE COMMAND =====================
+
+@dataclass(slots=True)
+class TradeCommandData:
+    """Данные ExecuteTrade. orjson сериализует slotted dataclass напрямую, без промежуточного dict"""
+    action: str
+    token: str
+    quote_token: str
+    amount: float
+    wallets: List[str]
+    gas_gwei: float
+    slippage: float
+    v3_fee: int
+    amounts_wei: Dict[str, str]
+
+
 # ===================== ENGINE COMMANDS =====================
 
 class EngineCommand:
@@ -132,17 +148,10 @@ class EngineCommand:
     ) -> dict:
         return {
             "type": "ExecuteTrade",
-            "data": {
-                "action": action,
-                "token": token,
-                "quote_token": quote_token,
-                "amount": amount,
-                "wallets": wallets,
-                "gas_gwei": gas_gwei,
-                "slippage": slippage,
-                "v3_fee": v3_fee,
-                "amounts_wei": amounts_wei if amounts_wei else {}
-            }
+            "data": TradeCommandData(
+                action, token, quote_token, amount, wallets,
+                gas_gwei, slippage, v3_fee, amounts_wei if amounts_wei else {}
+            )
         }
     
     @staticmethod
@@ -178,6 +187,14 @@ class EngineCommand:
             }
         }
     
+    @staticmethod
+    def update_prices(prices: Dict[str, float]) -> dict:
+        """Все цены тика одной командой"""
+        return {
+            "type": "UpdatePrices",
+            "data": {"prices": prices}
+        }
+    
     @staticmethod
     def update_token_decimals(address: str, decimals: int) -> dict:
         return {
@@ -202,6 +219,14 @@ class EngineCommand:
             "data": {"wallet": wallet, "token": token}
         }
     
+    @staticmethod
+    def batch(commands: List[dict]) -> dict:
+        """Несколько команд за один вызов push_to_engine"""
+        return {
+            "type": "Batch",
+            "data": {"commands": commands}
+        }
+    
     @staticmethod
     def refresh_all_balances() -> dict:
         """Unit variant - БЕЗ data!"""
@@ -221,6 +246,11 @@ class BridgeManager:
     Использует socket pair для мгновенных сигналов.
     """
     
+    # Лимит очереди исходящих команд; при переполнении очередь сбрасывается синхронно
+    SEND_QUEUE_MAXSIZE = 1024
+    # Лимит очереди входящих событий; при переполнении вытесняются самые старые
+    EVENT_QUEUE_MAXSIZE = 4096
+    
     def __init__(self, event_handler_callback: Callable[[dict], None]):
         self.event_handler = event_handler_callback
         self._rsock: Optional[socket.socket] = None
@@ -229,7 +259,10 @@ class BridgeManager:
         self._balance_cache: Dict[str, Dict[str, float]] = {}
         self._gas_price: float = 1.0
         self._connected: bool = False
-        self._event_queue: asyncio.Queue = asyncio.Queue()
+        self._event_queue: asyncio.Queue = asyncio.Queue(maxsize=self.EVENT_QUEUE_MAXSIZE)
+        self._send_queue: asyncio.Queue = asyncio.Queue(maxsize=self.SEND_QUEUE_MAXSIZE)
+        self._send_task: Optional[asyncio.Task] = None
+        self._dropped_events: int = 0
         
     @property
     def gas_price(self) -> float:
@@ -260,6 +293,7 @@ class BridgeManager:
         loop.add_reader(self._rsock.fileno(), self._on_rust_signal)
         
         dexbot_core.init_bridge_signal(self._wsock.fileno())
+        self._send_task = asyncio.create_task(self._send_pump())
         asyncio.create_task(self._log("BridgeManager: Транспорт инициализирован"))
     
     def stop(self):
@@ -269,6 +303,14 @@ class BridgeManager:
             
         self._is_running = False
         
+        # Досылаем то, что осталось в очереди, и гасим отправителя
+        if self._send_task:
+            self._send_task.cancel()
+            self._send_task = None
+        pending = self._drain_send_queue()
+        if pending:
+            self._push_commands(pending)
+        
         try:
             loop = asyncio.get_running_loop()
             loop.remove_reader(self._rsock.fileno())
@@ -294,16 +336,23 @@ class BridgeManager:
         try:
             self._rsock.recv(4096)
             
+            # События забираются пачками: один вызов ядра и один orjson.loads на пачку
             while True:
-                raw_json = dexbot_core.pop_from_bridge()
-                if not raw_json:
+                raw_batch = dexbot_core.pop_all_from_bridge()
+                if not raw_batch:
                     break
                 
                 try:
-                    event = orjson.loads(raw_json)
-                    self._process_event(event)
+                    events = orjson.loads(raw_batch)
                 except Exception as e:
                     print(f"[Bridge] JSON parse error: {e}")
+                    continue
+                
+                for event in events:
+                    try:
+                        self._process_event(event)
+                    except Exception as e:
+                        print(f"[Bridge] Event processing error ({event.get('type') if isinstance(event, dict) else '?'}): {e}")
                     
         except BlockingIOError:
             pass
@@ -322,8 +371,9 @@ class BridgeManager:
             self._gas_price = data.get("gas_price_gwei", 1.0)
             
         elif etype == "BalanceUpdate":
-            wallet = data.get("wallet", "").lower()
-            token = data.get("token", "").lower()
+            # Нормализуем адреса один раз здесь - обработчики UI берут их из события как есть
+            wallet = data["wallet"] = data.get("wallet", "").lower()
+            token = data["token"] = data.get("token", "").lower()
             balance = data.get("float_val", 0.0)
             
             if wallet not in self._balance_cache:
@@ -332,16 +382,29 @@ class BridgeManager:
         
         try:
             self._event_queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # UI не успевает - теряем самое старое событие, кэш моста уже обновлён выше
+            try:
+                self._event_queue.get_nowait()
+                self._event_queue.put_nowait(event)
+            except Exception:
+                pass
+            self._dropped_events += 1
+            if self._dropped_events % 1000 == 1:
+                print(f"[Bridge] Event queue full, dropped {self._dropped_events} events")
         except Exception as e:
             print(f"[Bridge] Queue put error: {e}")
     
     def send(self, command):
-        """Отправка команды в Rust ядро"""
+        """Отправка команды в Rust ядро (не блокирует: команда встаёт в очередь отправителя)"""
         if not RUST_AVAILABLE:
             return
             
         try:
-            if hasattr(command, 'model_dump'):
+            # Построители EngineCommand возвращают dict - проверки остальных форматов не нужны
+            if type(command) is dict:
+                cmd_dict = command
+            elif hasattr(command, 'model_dump'):
                 cmd_dict = command.model_dump()
             elif hasattr(command, 'dict'):
                 cmd_dict = command.dict()
@@ -352,11 +415,49 @@ class BridgeManager:
                 cmd_dict = asdict(command)
             else:
                 cmd_dict = command
-            
-            cmd_json = orjson.dumps(cmd_dict).decode('utf-8')
-            dexbot_core.push_to_engine(cmd_json)
         except Exception as e:
             print(f"[Bridge] Send error: {e}")
+            return
+        
+        # Мост не запущен (или уже остановлен) - отправляем напрямую
+        if self._send_task is None or self._send_task.done():
+            self._push_commands([cmd_dict])
+            return
+        
+        try:
+            self._send_queue.put_nowait(cmd_dict)
+        except asyncio.QueueFull:
+            # Backpressure: сбрасываем очередь синхронно, сохраняя порядок команд
+            print("[Bridge] Send queue full, flushing synchronously")
+            self._push_commands(self._drain_send_queue() + [cmd_dict])
+    
+    async def _send_pump(self):
+        """Единственный потребитель очереди: всё накопленное за тик уходит одним вызовом"""
+        while True:
+            first = await self._send_queue.get()
+            self._push_commands([first] + self._drain_send_queue())
+    
+    def _drain_send_queue(self) -> List[dict]:
+        commands = []
+        while True:
+            try:
+                commands.append(self._send_queue.get_nowait())
+            except asyncio.QueueEmpty:
+                return commands
+    
+    def _push_commands(self, commands: List[dict]):
+        if len(commands) > 1:
+            try:
+                dexbot_core.push_to_engine(orjson.dumps(EngineCommand.batch(commands)))
+                return
+            except Exception as e:
+                # Одна битая команда не должна ронять всю пачку - досылаем по одной
+                print(f"[Bridge] Batch send error: {e}")
+        for cmd_dict in commands:
+            try:
+                dexbot_core.push_to_engine(orjson.dumps(cmd_dict))
+            except Exception as e:
+                print(f"[Bridge] Send error: {e}")
     
     async def _log(self, message: str):
         from utils.aiologger import log
@@ -27,6 +27,7 @@ class Config:
         
         self.NATIVE_CURRENCY_SYMBOL = network_settings['native_currency_symbol']
         self.NATIVE_CURRENCY_ADDRESS = network_settings['native_currency_address']
+        self.NATIVE_CURRENCY_ADDRESS_LOWER = self.NATIVE_CURRENCY_ADDRESS.lower()
         self.EXPLORER_URL = network_settings['explorer_url']
         self.DEX_ROUTER_ADDRESS = network_settings['dex_router_address']
 
@@ -39,6 +40,8 @@ class Config:
         self.FEE_RECEIVER = network_settings.get('fee_receiver', '').lower()
         
         self.QUOTE_TOKENS = network_settings['quote_tokens']
+        # Те же адреса в нижнем регистре - для сравнения с событиями и ключами кэша
+        self.QUOTE_TOKENS_LOWER: Dict[str, str] = {sym: addr.lower() for sym, addr in self.QUOTE_TOKENS.items()}
         self.DEFAULT_QUOTE_CURRENCY = network_settings['default_quote_currency']
         self.ERC20_QUOTES_TICKERS: List[str] = self._generate_tickers()
 
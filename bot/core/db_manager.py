@@ -1,9 +1,10 @@
 import aiosqlite
 import asyncio
+import orjson
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from utils.security import SecurityManager
-from utils.aiologger import log
+from utils.aiologger import log, LogLevel
 
 SENSITIVE_KEYS = {'rpc_url'}
 # Четко определяем ключи, которые ВСЕГДА идут в глобальную БД
@@ -27,11 +28,13 @@ class DatabaseManager:
             self.conn = await aiosqlite.connect(self.db_path)
             self.conn.row_factory = aiosqlite.Row
             await self.conn.execute("PRAGMA journal_mode=WAL;")
+            await self.conn.execute("PRAGMA synchronous=NORMAL;")
 
         if not self.global_conn or not self.global_conn.is_alive():
             self.global_conn = await aiosqlite.connect(self.global_db_path)
             self.global_conn.row_factory = aiosqlite.Row
             await self.global_conn.execute("PRAGMA journal_mode=WAL;")
+            await self.global_conn.execute("PRAGMA synchronous=NORMAL;")
         
         await self._create_tables()
 
@@ -162,6 +165,19 @@ class DatabaseManager:
             return data
         return None
 
+    async def get_all_wallets_with_pk(self) -> List[Dict[str, Any]]:
+        """Все кошельки с расшифрованными ключами одним запросом"""
+        async with self.conn.cursor() as cursor: # type: ignore
+            await cursor.execute("SELECT * FROM wallets")
+            rows = await cursor.fetchall()
+        result = []
+        for row in rows:
+            data = dict(row)
+            try: data['private_key'] = self.security.decrypt(data['private_key'])
+            except: pass
+            result.append(data)
+        return result
+
     async def get_all_wallets_raw(self) -> List[Dict[str, Any]]:
         async with self.conn.cursor() as cursor: # type: ignore
             await cursor.execute("SELECT * FROM wallets")
@@ -264,6 +280,30 @@ class DatabaseManager:
             """, (max_tokens,))
         await self.conn.commit() # type: ignore
     
+    async def bulk_upsert_recent_tokens(self, rows: List[tuple], max_tokens: int = 50):
+        """Пакетная запись (token_address, name, symbol) одной транзакцией. None не затирает известные значения."""
+        if not rows:
+            return
+        async with self.conn.cursor() as cursor: # type: ignore
+            await cursor.executemany("""
+                INSERT INTO recent_tokens (token_address, name, symbol, last_traded_at)
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+                ON CONFLICT(token_address) DO UPDATE SET
+                    name = COALESCE(excluded.name, recent_tokens.name),
+                    symbol = COALESCE(excluded.symbol, recent_tokens.symbol),
+                    last_traded_at = CURRENT_TIMESTAMP
+            """, [(addr.lower(), name, symbol) for addr, name, symbol in rows])
+            
+            await cursor.execute("""
+                DELETE FROM recent_tokens 
+                WHERE token_address NOT IN (
+                    SELECT token_address FROM recent_tokens 
+                    ORDER BY last_traded_at DESC 
+                    LIMIT ?
+                )
+            """, (max_tokens,))
+        await self.conn.commit() # type: ignore
+
     async def get_recent_tokens(self, limit: int = 20) -> List[Dict[str, Any]]:
         async with self.conn.cursor() as cursor: # type: ignore
             await cursor.execute("SELECT token_address, name, symbol, last_traded_at FROM recent_tokens ORDER BY last_traded_at DESC LIMIT ?", (limit,))
@@ -291,14 +331,31 @@ class DatabaseManager:
             rows = await cursor.fetchall()
         return [dict(row) for row in rows]
     
+    async def bulk_write_cached_balances(self, upserts: List[tuple], deletes: List[tuple]):
+        """Пакетная запись (wallet, token, balance_wei, decimals) и удаление (wallet, token) одной транзакцией"""
+        if not upserts and not deletes:
+            return
+        async with self.conn.cursor() as cursor:
+            if upserts:
+                await cursor.executemany("""
+                    INSERT OR REPLACE INTO cached_balances (wallet_address, token_address, balance_wei, decimals, updated_at)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                """, [(w.lower(), t.lower(), str(wei), dec) for w, t, wei, dec in upserts])
+            if deletes:
+                await cursor.executemany(
+                    "DELETE FROM cached_balances WHERE wallet_address = ? AND token_address = ?",
+                    [(w.lower(), t.lower()) for w, t in deletes]
+                )
+        await self.conn.commit()
+
     async def delete_cached_balance(self, wallet_address: str, token_address: str):
         async with self.conn.cursor() as cursor:
             await cursor.execute("DELETE FROM cached_balances WHERE wallet_address = ? AND token_address = ?", (wallet_address.lower(), token_address.lower()))
         await self.conn.commit()
 
     async def save_cached_pool(self, token_address: str, quote_address: str, pool_data: dict):
-        import json
-        pool_data_json = json.dumps(pool_data)
+        # orjson, как и мост к ядру; в колонку пишется текст
+        pool_data_json = orjson.dumps(pool_data).decode()
         async with self.conn.cursor() as cursor:
             await cursor.execute("""
                 INSERT OR REPLACE INTO cached_pools (token_address, quote_address, pool_data_json, updated_at)
@@ -307,13 +364,12 @@ class DatabaseManager:
         await self.conn.commit()
 
     async def get_all_cached_pools(self) -> List[Dict[str, Any]]:
-        import json
         results = []
         async with self.conn.cursor() as cursor:
             await cursor.execute("SELECT token_address, quote_address, pool_data_json FROM cached_pools")
             rows = await cursor.fetchall()
             for row in rows:
-                try: results.append({"token_address": row["token_address"], "quote_address": row["quote_address"], "pool_data": json.loads(row["pool_data_json"])})
+                try: results.append({"token_address": row["token_address"], "quote_address": row["quote_address"], "pool_data": orjson.loads(row["pool_data_json"])})
                 except: continue
         return results
 
@@ -327,7 +383,8 @@ class DatabaseManager:
         w = wallet.lower()
         t = token.lower()
         
-        await log.debug(f"[DB SET_POS] w={w[:10]}... | t={t[:10]}... | cost={total_cost_wei} | amount={total_amount_wei}")
+        if log.is_enabled_for(LogLevel.DEBUG):
+            await log.debug(f"[DB SET_POS] w={w[:10]}... | t={t[:10]}... | cost={total_cost_wei} | amount={total_amount_wei}")
         
         async with self.conn.cursor() as cursor:
             await cursor.execute("""
@@ -352,6 +409,8 @@ class DatabaseManager:
         results = [dict(row) for row in rows]
         
         # DEBUG: Что в БД
+        if not log.is_enabled_for(LogLevel.DEBUG):
+            return results
         for r in results:
             w = r.get('wallet_address', '')[:10]
             t = r.get('token_address', '')[:10]
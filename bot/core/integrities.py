@@ -25,11 +25,11 @@ def enumerate_adapters() -> list:
     Возвращает список доступных сетей из Rust-ядра.
     """
     if not dexbot_core:
-        print("WARNING: dexbot_core not loaded, no networks available.")
+        sys.stderr.write("WARNING: dexbot_core not loaded, no networks available.\n")
         return []
     
     try:
         return dexbot_core.get_available_networks() # type: ignore
     except Exception as e:
-        print(f"Error enumerating adapters from Core: {e}")
+        sys.stderr.write(f"Error enumerating adapters from Core: {e}\n")
         return []
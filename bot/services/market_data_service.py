@@ -1,12 +1,17 @@
 import asyncio
+import aiohttp
 import ccxt.pro as ccxtpro
 from bot.core.config import Config
 from bot.cache import GlobalCache
 from utils.aiologger import log
 from bot.core.bridge import BridgeManager, EngineCommand
-from typing import Optional
+from typing import Optional, Dict
 
 class MarketDataService:
+    # Пауза после ошибки watch_tickers: растёт вдвое до максимума, сбрасывается на первом успешном тике
+    RETRY_DELAY_MIN = 1.0
+    RETRY_DELAY_MAX = 30.0
+
     def __init__(self, cache: GlobalCache, config: Config):
         self.cache = cache
         self.config = config
@@ -14,6 +19,10 @@ class MarketDataService:
         self.worker_task: Optional[asyncio.Task] = None
         self._is_running = False
         self.exchange: Optional[ccxtpro.binance] = None
+        # Общая HTTP-сессия сервиса: keep-alive соединения переживают переподключения биржи
+        self.http_session: Optional[aiohttp.ClientSession] = None
+        # Тикеры известны заранее: "BNB/USDT" -> "BNB" считается один раз, а не на каждый тик
+        self._base_by_symbol: Dict[str, str] = {s: s.split("/", 1)[0] for s in (config.ERC20_QUOTES_TICKERS or [])}
 
     def start(self):
         """Запуск воркера цен Binance"""
@@ -33,44 +42,61 @@ class MarketDataService:
                 await self.exchange.close()
             except:
                 pass
+        if self.http_session:
+            try:
+                await self.http_session.close()
+            except:
+                pass
+            self.http_session = None
         asyncio.create_task(log.info("MarketDataService: Остановлен."))
 
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Ленивое создание общей HTTP-сессии (вызывать внутри работающего event loop)"""
+        if self.http_session is None or self.http_session.closed:
+            connector = aiohttp.TCPConnector(limit=32, keepalive_timeout=60)
+            self.http_session = aiohttp.ClientSession(connector=connector)
+        return self.http_session
+
     async def _quotes_price_worker(self):
         """
         Получает цены с Binance и транслирует их в Rust 
         для реактивного расчета PnL и TVL.
         """
-        self.exchange = ccxtpro.binance()
         symbols = self.config.ERC20_QUOTES_TICKERS
         
         if not symbols:
             return
 
-        first_run = True
+        # Сессию передаём бирже сами: ccxt не создаёт свою и не закрывает нашу.
+        # newUpdates: watch_tickers отдаёт только тикеры, изменившиеся в этом сообщении, а не весь набор
+        self.exchange = ccxtpro.binance({'session': self._get_http_session(), 'newUpdates': True})
+
+        # Без стартового REST fetch_tickers: первый снапшот приходит из watch_tickers сам.
+        # Биржа не пересоздаётся при ошибках - ccxt сам переподключает websocket подписки
+        retry_delay = self.RETRY_DELAY_MIN
         while self._is_running:
             try:
-                if first_run:
-                    tickers = await self.exchange.fetch_tickers(symbols)
-                    first_run = False
-                else:
-                    tickers = await self.exchange.watch_tickers(symbols)
+                tickers = await self.exchange.watch_tickers(symbols)
+                retry_delay = self.RETRY_DELAY_MIN
 
-                for sym, data in tickers.items():
-                    base_symbol = sym.split("/")[0]
-                    price = float(data['last'])
-                    
-                    # Обновляем локальный кэш
-                    self.cache.set_quote_price(base_symbol, price)
-                    
-                    # Отправляем цену в Rust Engine
-                    if self.bridge:
-                        self.bridge.send(EngineCommand.update_price(
-                            symbol=base_symbol, 
-                            price=price
-                        ))
+                base_by_symbol = self._base_by_symbol
+                prices = {
+                    base_by_symbol[sym]: float(data['last'])
+                    for sym, data in tickers.items() if sym in base_by_symbol
+                }
+                if not prices:
+                    continue
+                
+                # Обновляем локальный кэш
+                self.cache.set_quote_prices(prices)
+                
+                # Все цены тика - одной командой в Rust Engine
+                if self.bridge:
+                    self.bridge.send(EngineCommand.update_prices(prices))
 
             except asyncio.CancelledError:
                 break
             except Exception as e:
                 await log.error(f"MarketDataService (Binance): Ошибка получения цен: {e}")
-                await asyncio.sleep(5)
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, self.RETRY_DELAY_MAX)
@@ -4,8 +4,9 @@ pub mod transport;
 use std::sync::RwLock;
 use once_cell::sync::Lazy;
 use pyo3::prelude::*;
+use pyo3::types::PyBytes;
 pub use models::{EngineEvent, EngineCommand};
-use transport::{send_to_python, BRIDGE_QUEUE};
+use transport::{send_to_python, clear_signal_pending, BRIDGE_QUEUE};
 
 // ===================== КЭШ ДЕДУПЛИКАЦИИ =====================
 // Каждый тип события хранит только ОДИН предыдущий кадр
@@ -25,12 +26,33 @@ pub fn init_bridge_signal(_py: Python<'_>, socket_fd: u64) -> PyResult<()> {
 
 #[pyfunction]
 pub fn pop_from_bridge(_py: Python<'_>) -> PyResult<Option<String>> {
+    clear_signal_pending();
     match BRIDGE_QUEUE.1.try_recv() {
         Ok(json_str) => Ok(Some(json_str)),
         Err(_) => Ok(None),
     }
 }
 
+/// Сколько событий отдаётся за один вызов pop_all_from_bridge
+const BRIDGE_DRAIN_MAX: usize = 512;
+
+/// Все накопившиеся события одним вызовом: JSON-массив в bytes.
+/// Один переход через FFI и один orjson.loads на пачку вместо вызова на каждое событие.
+#[pyfunction]
+pub fn pop_all_from_bridge(py: Python<'_>) -> PyResult<Option<Py<PyBytes>>> {
+    clear_signal_pending();
+    let mut buf: Vec<u8> = Vec::new();
+    for json_str in BRIDGE_QUEUE.1.try_iter().take(BRIDGE_DRAIN_MAX) {
+        buf.push(if buf.is_empty() { b'[' } else { b',' });
+        buf.extend_from_slice(json_str.as_bytes());
+    }
+    if buf.is_empty() {
+        return Ok(None);
+    }
+    buf.push(b']');
+    Ok(Some(PyBytes::new(py, &buf).into()))
+}
+
 // ----- ПРОБРОС И ДЕДУПЛИКАЦИЯ ИВЕНТОВ В ПАЙТОН -----
 
 pub fn emit_event(event: EngineEvent) {
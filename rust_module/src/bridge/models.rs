@@ -88,6 +88,8 @@ pub enum EngineEvent {
 
     ConnectionStatus { connected: bool, message: String },
 
+    RPCStatus { healthy: bool, latency_ms: u64 },
+
     TxSent { 
         tx_hash: String, 
         wallet: String, 
@@ -174,6 +176,8 @@ pub enum EngineCommand {
     },
     
     UpdatePrice { symbol: String, price: f64 },
+    /// Все цены тика одной командой: одна запись в состояние и одно пробуждение PnL
+    UpdatePrices { prices: std::collections::HashMap<String, f64> },
     UpdateTokenDecimals { address: String, decimals: u8 },
     
     UpdateSettings {
@@ -199,5 +203,7 @@ pub enum EngineCommand {
     AddWallet { address: String, private_key: String },
     RefreshBalance { wallet: String, token: String },
     RefreshAllBalances,
+    /// Пачка команд одним вызовом push_to_engine (разворачивается до попадания в engine_loop)
+    Batch { commands: Vec<EngineCommand> },
     Shutdown
 }
\ No newline at end of file
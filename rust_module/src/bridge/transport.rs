@@ -1,17 +1,32 @@
 use std::io::Write;
 use std::net::TcpStream;
 use std::sync::Mutex;
+use std::sync::atomic::{AtomicBool, Ordering};
 use crossbeam_channel::{unbounded, Receiver, Sender};
 use once_cell::sync::Lazy;
 
 pub static BRIDGE_QUEUE: Lazy<(Sender<String>, Receiver<String>)> = Lazy::new(unbounded);
 pub static SIGNAL_TX: Lazy<Mutex<Option<TcpStream>>> = Lazy::new(|| Mutex::new(None));
+/// Сигнал уже отправлен и Python ещё не начал вычитывать очередь: следующие события
+/// только встают в очередь, без лишнего write и блокировки сокета на каждое событие
+static SIGNAL_PENDING: AtomicBool = AtomicBool::new(false);
+
+/// Вызывается перед вычиткой очереди: события, пришедшие после этого, снова разбудят Python
+pub fn clear_signal_pending() {
+    SIGNAL_PENDING.store(false, Ordering::SeqCst);
+}
 
 pub fn send_to_python(json: String) {
     let _ = BRIDGE_QUEUE.0.send(json);
+    if SIGNAL_PENDING.swap(true, Ordering::SeqCst) {
+        return;
+    }
     let mut guard = SIGNAL_TX.lock().unwrap();
     if let Some(ref mut stream) = *guard {
         let _ = stream.write(&[1]);
+    } else {
+        // Сокет ещё не подключён - будить некого, флаг не должен залипнуть
+        SIGNAL_PENDING.store(false, Ordering::SeqCst);
     }
 }
 
@@ -22,5 +37,6 @@ pub fn set_signal_socket(fd: u64) -> Result<(), String> {
     };
     stream.set_nonblocking(true).map_err(|e| e.to_string())?;
     *SIGNAL_TX.lock().unwrap() = Some(stream);
+    clear_signal_pending();
     Ok(())
 }
@@ -4,12 +4,15 @@ use once_cell::sync::Lazy;
 use ethers::prelude::*;
 use std::sync::atomic::Ordering;
 use std::str::FromStr;
+use std::collections::VecDeque;
+use futures::StreamExt;
 
 use crate::bridge::{EngineCommand, EngineEvent, emit_event, emit_log};
-use crate::state::{RUNTIME, SHUTDOWN_FLAG, CORE_STATE, RPC_POOL, RpcNode, TRACKED_WALLETS, MONITOR_HANDLE, INTERNAL_HANDLE, RPC_CHECKER_HANDLE, PNL_HANDLE};
+use crate::state::{RUNTIME, SHUTDOWN_FLAG, CORE_STATE, RPC_POOL, RpcNode, TRACKED_WALLETS, MONITOR_HANDLE, INTERNAL_HANDLE, RPC_CHECKER_HANDLE, PNL_HANDLE, PNL_WAKEUP};
 use crate::monitor;
 use crate::execution;
 use crate::pnl;
+use crate::rpc_batch;
 
 pub static COMMAND_TX: Lazy<mpsc::UnboundedSender<EngineCommand>> = Lazy::new(|| {
     let (tx, rx) = mpsc::unbounded_channel::<EngineCommand>();
@@ -17,15 +20,69 @@ pub static COMMAND_TX: Lazy<mpsc::UnboundedSender<EngineCommand>> = Lazy::new(||
     tx
 });
 
+/// Сколько кошельков опрашивается одновременно при обновлении балансов
+const BALANCE_FANOUT: usize = 8;
+
 fn bnb_to_wei(bnb: f64) -> U256 {
     if bnb <= 0.0 { return U256::zero(); }
     U256::from((bnb * 1e18) as u128)
 }
 
+/// Сколько уже поставленных в очередь команд просматривается при склейке сделок
+const TRADE_COALESCE_MAX: usize = 16;
+
+/// Склейка пачки сделок: идущие подряд ExecuteTrade с одинаковыми параметрами и разными кошельками
+/// объединяются в один run_batch_trade (один выбор пула и расчёт expected_out на всех).
+/// Порядок остальных команд сохраняется - склеиваются только соседние сделки.
+fn coalesce_trades(
+    cmd: EngineCommand,
+    rx: &mut mpsc::UnboundedReceiver<EngineCommand>,
+    backlog: &mut VecDeque<EngineCommand>,
+) -> EngineCommand {
+    let (action, token, quote_token, amount, mut wallets, gas_gwei, slippage, v3_fee, mut amounts_wei) = match cmd {
+        EngineCommand::ExecuteTrade { action, token, quote_token, amount, wallets, gas_gwei, slippage, v3_fee, amounts_wei } =>
+            (action, token, quote_token, amount, wallets, gas_gwei, slippage, v3_fee, amounts_wei),
+        other => return other,
+    };
+
+    while backlog.len() < TRADE_COALESCE_MAX {
+        match rx.try_recv() {
+            Ok(next) => backlog.push_back(next),
+            Err(_) => break,
+        }
+    }
+
+    while let Some(EngineCommand::ExecuteTrade { action: a, token: t, quote_token: q, amount: am, wallets: w, gas_gwei: g, slippage: sl, v3_fee: f, amounts_wei: aw }) = backlog.front() {
+        let same = *a == action && *t == token && *q == quote_token && *am == amount
+            && *g == gas_gwei && *sl == slippage && *f == v3_fee
+            && aw.is_some() == amounts_wei.is_some()
+            && !w.iter().any(|x| wallets.contains(x));
+        if !same { break; }
+
+        if let Some(EngineCommand::ExecuteTrade { wallets: w, amounts_wei: aw, .. }) = backlog.pop_front() {
+            wallets.extend(w);
+            if let (Some(dst), Some(src)) = (amounts_wei.as_mut(), aw) {
+                dst.extend(src);
+            }
+        }
+    }
+
+    EngineCommand::ExecuteTrade { action, token, quote_token, amount, wallets, gas_gwei, slippage, v3_fee, amounts_wei }
+}
+
 async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
     emit_log("SUCCESS", "Rust Engine Core: Active".into());
+    let mut backlog: VecDeque<EngineCommand> = VecDeque::new();
     
-    while let Some(cmd) = rx.recv().await {
+    loop {
+        let cmd = match backlog.pop_front() {
+            Some(c) => c,
+            None => match rx.recv().await {
+                Some(c) => c,
+                None => break,
+            },
+        };
+        let cmd = coalesce_trades(cmd, &mut rx, &mut backlog);
         match cmd {
             EngineCommand::Init { 
                 rpc_url, wss_url, chain_id, router, quoter, v2_factory, v3_factory, 
@@ -70,6 +127,7 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                     s.nonce_map.clear();
                     s.pending_txs.clear();
                     s.wallet_keys.clear();
+                    s.wallet_signers.clear();
 
                     s.chain_id = chain_id; 
                     s.router_address = router_addr; 
@@ -92,6 +150,9 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                     TRACKED_WALLETS.write().unwrap().clear();
                     for (a, k) in wallets { 
                         if let Ok(addr) = Address::from_str(&a) { 
+                            if let Ok(w) = k.parse::<LocalWallet>() {
+                                s.wallet_signers.insert(addr, w.with_chain_id(chain_id));
+                            }
                             s.wallet_keys.insert(addr, k); 
                             TRACKED_WALLETS.write().unwrap().push(addr); 
                         } 
@@ -113,6 +174,10 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                 
                 *RPC_CHECKER_HANDLE.lock().unwrap() = Some(RUNTIME.spawn(monitor::rpc_health_checker(all_urls)).abort_handle());
                 
+                // Decimals quote токенов нужны на каждом BUY/CalcImpact - читаем их заранее одним запросом
+                let quote_addrs: Vec<Address> = { CORE_STATE.read().unwrap().quote_tokens.values().copied().collect() };
+                RUNTIME.spawn(monitor::prefetch_decimals(quote_addrs));
+                
                 let wss_bg = wss_url.clone();
                 *INTERNAL_HANDLE.lock().unwrap() = Some(RUNTIME.spawn(monitor::start_background_worker(wss_bg)).abort_handle());
                 
@@ -187,8 +252,11 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                         (s.selected_pool_type.clone().unwrap_or_default(), s.selected_pool_fee, s.quoter_address) 
                     };
                     
-                    let dec_in = monitor::get_decimals_cached(t_in).await;
-                    let dec_out = monitor::get_decimals_cached(t_out).await;
+                    // Decimals обоих токенов параллельно: при промахе кэша - один RTT вместо двух
+                    let (dec_in, dec_out) = tokio::join!(
+                        monitor::get_decimals_cached(t_in),
+                        monitor::get_decimals_cached(t_out)
+                    );
                     
                     let amt_wei: U256 = match ethers::utils::parse_units(amount_in, dec_in as u32) { 
                         Ok(v) => v.into(), 
@@ -224,7 +292,7 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                             emit_log("DEBUG", "CalcImpact: V3 pool not selected, skipping quoter".to_string());
                             U256::zero()
                         } else {
-                            execution::calculate_expected_out_v3_quoted(t_in, t_out, amt_wei, p_fee, quoter).await 
+                            execution::calculate_expected_out_v3_quoted(t_in, t_out, amt_wei, p_fee, quoter, true).await 
                         }
                     } else { 
                         // Проверяем что V2 пул реально существует
@@ -257,21 +325,27 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
             EngineCommand::ExecuteTrade { action, token, quote_token, amount, wallets, gas_gwei, slippage, v3_fee, amounts_wei } => {
                 let t_addr = Address::from_str(&token).unwrap();
                 let q_addr = Address::from_str(&quote_token).unwrap();
-                let (r, k, g, c) = {
+                let (r, signers, g) = {
                     let s = CORE_STATE.read().unwrap();
-                    let keys = wallets.iter()
-                        .filter_map(|w| Address::from_str(w).ok().and_then(|a| s.wallet_keys.get(&a).cloned()))
+                    let signers = wallets.iter()
+                        .filter_map(|w| Address::from_str(w).ok().and_then(|a| s.wallet_signers.get(&a).cloned()))
                         .collect();
-                    (s.router_address, keys, if gas_gwei > 0.0 { gas_gwei } else { s.manual_gas_price_gwei }, s.chain_id)
+                    (s.router_address, signers, if gas_gwei > 0.0 { gas_gwei } else { s.manual_gas_price_gwei })
                 };
                 RUNTIME.spawn(async move {
-                    let evs = execution::run_batch_trade(k, r, action, t_addr, q_addr, amount, g, slippage, v3_fee, c, amounts_wei).await;
+                    let evs = execution::run_batch_trade(signers, r, action, t_addr, q_addr, amount, g, slippage, v3_fee, amounts_wei).await;
                     for e in evs { emit_event(e); }
                 });
             }
 
             EngineCommand::UpdatePrice { symbol, price } => { 
                 CORE_STATE.write().unwrap().usd_prices.insert(symbol, price); 
+                PNL_WAKEUP.notify_one();
+            }
+            
+            EngineCommand::UpdatePrices { prices } => {
+                CORE_STATE.write().unwrap().usd_prices.extend(prices);
+                PNL_WAKEUP.notify_one();
             }
             
             EngineCommand::UpdateTokenDecimals { address, decimals } => {
@@ -321,26 +395,26 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                 
                 if let (Some(w), Some(t)) = (wallet_addr, token_addr) {
                     RUNTIME.spawn(async move {
-                        if t == Address::zero() || t == Address::from_str("0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee").unwrap() {
-                            let url_opt = { let p = RPC_POOL.read().unwrap(); p.get_fastest_node() };
+                        if t == Address::zero() || t == Address::repeat_byte(0xee) {
+                            let url_opt = { let p = RPC_POOL.read().unwrap(); p.next_read_node() };
                             if let Some(url_str) = url_opt {
-                                if let Ok(url) = url::Url::parse(&url_str) {
-                                    let provider = Provider::new(Http::new_with_client(url, crate::state::GLOBAL_HTTP_CLIENT.clone()));
-                                    if let Ok(balance) = provider.get_balance(w, None).await {
-                                        let float_val = balance.as_u128() as f64 / 1e18;
-                                        emit_event(EngineEvent::BalanceUpdate {
-                                            wallet: format!("{:?}", w),
-                                            token: "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee".into(),
-                                            wei: balance.to_string(),
-                                            float_val,
-                                            symbol: "NATIVE".into()
-                                        });
-                                    }
+                                if let Some(balance) = rpc_batch::get_balance(&url_str, w).await {
+                                    let float_val = balance.as_u128() as f64 / 1e18;
+                                    emit_event(EngineEvent::BalanceUpdate {
+                                        wallet: format!("{:?}", w),
+                                        token: "0xeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeeee".into(),
+                                        wei: balance.to_string(),
+                                        float_val,
+                                        symbol: "NATIVE".into()
+                                    });
                                 }
                             }
                         } else {
-                            let balance = execution::get_token_balance(t, w).await;
-                            let decimals = monitor::get_decimals_cached(t).await;
+                            // balanceOf и decimals параллельно: промах кэша decimals не задерживает баланс
+                            let (balance, decimals) = tokio::join!(
+                                execution::get_token_balance(t, w),
+                                monitor::get_decimals_cached(t)
+                            );
                             let float_val = execution::u256_to_f64_safe(balance, decimals as u32);
                             emit_event(EngineEvent::BalanceUpdate {
                                 wallet: format!("{:?}", w),
@@ -356,7 +430,12 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
 
             EngineCommand::AddWallet { address, private_key } => {
                 if let Ok(addr) = Address::from_str(&address) {
-                    CORE_STATE.write().unwrap().wallet_keys.insert(addr, private_key);
+                    let mut s = CORE_STATE.write().unwrap();
+                    match private_key.parse::<LocalWallet>() {
+                        Ok(w) => { let cid = s.chain_id; s.wallet_signers.insert(addr, w.with_chain_id(cid)); }
+                        Err(_) => { s.wallet_signers.remove(&addr); }
+                    }
+                    s.wallet_keys.insert(addr, private_key);
                     emit_log("INFO", format!("🔑 Кошелек добавлен: {:?}", addr));
                 }
             }
@@ -366,13 +445,17 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                 let quote_token = { CORE_STATE.read().unwrap().fuel_quote_address };
                 
                 RUNTIME.spawn(async move {
-                    let url_opt = { let p = RPC_POOL.read().unwrap(); p.get_fastest_node() };
+                    let url_opt = { let p = RPC_POOL.read().unwrap(); p.next_read_node() };
                     if let Some(url_str) = url_opt {
-                        if let Ok(url) = url::Url::parse(&url_str) {
-                            let provider = Provider::new(Http::new_with_client(url, crate::state::GLOBAL_HTTP_CLIENT.clone()));
-                            
-                            for wallet in &wallets {
-                                if let Ok(balance) = provider.get_balance(*wallet, None).await {
+                        let url_str = url_str.as_str();
+                        
+                        // Кошельки опрашиваются параллельно, не более BALANCE_FANOUT запросов одновременно;
+                        // eth_getBalance склеиваются rpc_batch в один HTTP запрос
+                        futures::stream::iter(wallets.iter().copied())
+                            .map(|wallet| async move { (wallet, rpc_batch::get_balance(url_str, wallet).await) })
+                            .buffer_unordered(BALANCE_FANOUT)
+                            .for_each(|(wallet, res)| async move {
+                                if let Some(balance) = res {
                                     let float_val = balance.as_u128() as f64 / 1e18;
                                     emit_event(EngineEvent::BalanceUpdate {
                                         wallet: format!("{:?}", wallet),
@@ -382,12 +465,15 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                                         symbol: "NATIVE".into()
                                     });
                                 }
-                            }
-                            
-                            if quote_token != Address::zero() {
-                                let decimals = monitor::get_decimals_cached(quote_token).await;
-                                for wallet in &wallets {
-                                    let balance = execution::get_token_balance(quote_token, *wallet).await;
+                            })
+                            .await;
+                        
+                        if quote_token != Address::zero() {
+                            let decimals = monitor::get_decimals_cached(quote_token).await;
+                            futures::stream::iter(wallets.iter().copied())
+                                .map(|wallet| async move { (wallet, execution::get_token_balance(quote_token, wallet).await) })
+                                .buffer_unordered(BALANCE_FANOUT)
+                                .for_each(|(wallet, balance)| async move {
                                     let float_val = execution::u256_to_f64_safe(balance, decimals as u32);
                                     emit_event(EngineEvent::BalanceUpdate {
                                         wallet: format!("{:?}", wallet),
@@ -396,15 +482,25 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
                                         float_val,
                                         symbol: "QUOTE".into()
                                     });
-                                }
-                            }
+                                })
+                                .await;
                         }
                     }
                 });
             }
             
+            EngineCommand::Batch { commands } => {
+                // push_to_engine уже разворачивает пачки; сюда попадают только вложенные
+                for c in commands { let _ = COMMAND_TX.send(c); }
+            }
+            
             EngineCommand::Shutdown => { 
                 SHUTDOWN_FLAG.store(true, Ordering::Relaxed); 
+                {
+                    let mut s = CORE_STATE.write().unwrap();
+                    s.wallet_signers.clear();
+                    s.wallet_keys.clear();
+                }
                 if let Some(h) = MONITOR_HANDLE.lock().unwrap().take() { h.abort(); }
                 if let Some(h) = INTERNAL_HANDLE.lock().unwrap().take() { h.abort(); }
                 if let Some(h) = PNL_HANDLE.lock().unwrap().take() { h.abort(); }
@@ -415,12 +511,30 @@ async fn engine_loop(mut rx: mpsc::UnboundedReceiver<EngineCommand>) {
     }
 }
 
+// Меньшие команды разбираются под GIL: парсинг занимает микросекунды, а отпустить и снова
+// захватить GIL при другом активном потоке может стоить до switch interval (5ms) на вызов
+const ALLOW_THREADS_MIN_BYTES: usize = 16 * 1024;
+
+fn dispatch_command(command_json: &[u8]) -> Result<(), String> {
+    let cmd: EngineCommand = serde_json::from_slice(command_json).map_err(|e| e.to_string())?;
+    match cmd {
+        EngineCommand::Batch { commands } => {
+            for c in commands { let _ = COMMAND_TX.send(c); }
+        }
+        cmd => { let _ = COMMAND_TX.send(cmd); }
+    }
+    Ok(())
+}
+
 #[pyfunction]
-pub fn push_to_engine(_py: Python<'_>, command_json: String) -> PyResult<()> {
-    let cmd: EngineCommand = match serde_json::from_str(&command_json) { 
-        Ok(c) => c, 
-        Err(e) => return Err(pyo3::exceptions::PyValueError::new_err(e.to_string())) 
+pub fn push_to_engine(py: Python<'_>, command_json: &[u8]) -> PyResult<()> {
+    // Команда приходит байтами orjson без копии в String.
+    // Разбор JSON и отправка в канал не трогают Python-объекты - для больших команд (Init с кошельками,
+    // крупные пачки) GIL отпускаем, чтобы event loop не ждал парсинга
+    let result = if command_json.len() >= ALLOW_THREADS_MIN_BYTES {
+        py.allow_threads(move || dispatch_command(command_json))
+    } else {
+        dispatch_command(command_json)
     };
-    let _ = COMMAND_TX.send(cmd);
-    Ok(())
+    result.map_err(|e| pyo3::exceptions::PyValueError::new_err(e))
 }
\ No newline at end of file
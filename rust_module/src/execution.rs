@@ -2,11 +2,15 @@ use ethers::prelude::*;
 use ethers::abi::AbiEncode;
 use ethers::types::transaction::eip2718::TypedTransaction;
 use ethers::utils::{parse_units, format_units};
-use crate::state::{RPC_POOL, GLOBAL_HTTP_CLIENT, CORE_STATE};
+use crate::state::{RUNTIME, RPC_POOL, CORE_STATE, NEW_HEAD, http_provider};
 use crate::bridge::{EngineEvent, emit_event, emit_log};
+use crate::rpc_batch;
 use futures::future::join_all;
-use url::Url;
-use std::sync::Arc;
+use futures::StreamExt;
+use once_cell::sync::Lazy;
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex};
+use std::time::{Duration, Instant};
 
 abigen!(
     ITaxRouter, 
@@ -35,16 +39,41 @@ abigen!(
     ]"#
 );
 
+// Кэш экземпляров контрактов: IERC20::new / IQuoter::new каждый раз клонируют ABI и строят таблицу методов.
+// Ключ - указатель на провайдер (провайдеры кэшируются по URL и живут всю сессию) и адрес контракта.
+static ERC20_CONTRACTS: Lazy<Mutex<HashMap<(usize, Address), Arc<IERC20<Provider<Http>>>>>> = Lazy::new(|| Mutex::new(HashMap::new()));
+static QUOTER_CONTRACTS: Lazy<Mutex<HashMap<(usize, Address), Arc<IQuoter<Provider<Http>>>>>> = Lazy::new(|| Mutex::new(HashMap::new()));
+
+fn erc20_contract(p: &Arc<Provider<Http>>, token: Address) -> Arc<IERC20<Provider<Http>>> {
+    ERC20_CONTRACTS.lock().unwrap()
+        .entry((Arc::as_ptr(p) as usize, token))
+        .or_insert_with(|| Arc::new(IERC20::new(token, p.clone())))
+        .clone()
+}
+
+fn quoter_contract(p: &Arc<Provider<Http>>, quoter: Address) -> Arc<IQuoter<Provider<Http>>> {
+    QUOTER_CONTRACTS.lock().unwrap()
+        .entry((Arc::as_ptr(p) as usize, quoter))
+        .or_insert_with(|| Arc::new(IQuoter::new(quoter, p.clone())))
+        .clone()
+}
+
 pub fn u256_to_f64_safe(val: U256, decimals: u32) -> f64 {
     if val.is_zero() { return 0.0; }
     let s = format_units(val, decimals).unwrap_or_else(|_| "0.0".to_string());
     s.parse::<f64>().unwrap_or(0.0)
 }
 
+const GWEI: u64 = 1_000_000_000;
+
 fn gas_gwei_to_wei(gas_gwei: f64) -> u64 {
-    if gas_gwei <= 0.0 { return 1_000_000_000; }
-    let wei = (gas_gwei * 1e9) as u64;
-    wei
+    if gas_gwei <= 0.0 { return GWEI; }
+    // Целые gwei - чисто целочисленно. Дробные округляем до wei, а не отбрасываем:
+    // 2.3 * 1e9 в f64 даёт 2299999999.9999995, и `as u64` терял бы 1 wei
+    if gas_gwei.fract() == 0.0 {
+        return (gas_gwei as u64).saturating_mul(GWEI);
+    }
+    (gas_gwei * GWEI as f64).round() as u64
 }
 
 /// Текущее время в миллисекундах (Unix timestamp)
@@ -55,87 +84,298 @@ fn current_timestamp_ms() -> u64 {
         .as_millis() as u64
 }
 
-/// Получить баланс ERC20 токена для адреса
+/// Получить баланс ERC20 токена для адреса.
+/// Запросы, пришедшие в пределах BALANCE_BATCH_WINDOW_MS, уходят одним Multicall3 вызовом.
 pub async fn get_token_balance(token: Address, wallet: Address) -> U256 {
-    let url_opt = { RPC_POOL.read().unwrap().get_fastest_node() };
-    if let Some(url) = url_opt {
-        if let Ok(u) = Url::parse(&url) {
-            let p = Arc::new(Provider::new(Http::new_with_client(u, GLOBAL_HTTP_CLIENT.clone())));
-            let erc20 = IERC20::new(token, p);
-            if let Ok(balance) = erc20.balance_of(wallet).call().await {
-                return balance;
+    get_token_balance_opt(token, wallet).await.unwrap_or_default()
+}
+
+/// То же, что get_token_balance, но None при ошибке RPC (чтобы не затирать баланс нулём)
+pub async fn get_token_balance_opt(token: Address, wallet: Address) -> Option<U256> {
+    let (tx, rx) = tokio::sync::oneshot::channel();
+    BALANCE_BATCH_TX.send((token, wallet, tx)).ok()?;
+    rx.await.ok().flatten()
+}
+
+// Батчер balanceOf: окно ожидания и максимальный размер пачки
+const BALANCE_BATCH_WINDOW_MS: u64 = 20;
+const BALANCE_BATCH_MAX: usize = 25;
+
+type BalanceRequest = (Address, Address, tokio::sync::oneshot::Sender<Option<U256>>);
+
+static BALANCE_BATCH_TX: Lazy<tokio::sync::mpsc::UnboundedSender<BalanceRequest>> = Lazy::new(|| {
+    let (tx, rx) = tokio::sync::mpsc::unbounded_channel();
+    RUNTIME.spawn(balance_batch_worker(rx));
+    tx
+});
+
+async fn balance_batch_worker(mut rx: tokio::sync::mpsc::UnboundedReceiver<BalanceRequest>) {
+    while let Some(first) = rx.recv().await {
+        let mut pending = vec![first];
+        let deadline = tokio::time::Instant::now() + Duration::from_millis(BALANCE_BATCH_WINDOW_MS);
+        while pending.len() < BALANCE_BATCH_MAX {
+            match tokio::time::timeout_at(deadline, rx.recv()).await {
+                Ok(Some(req)) => pending.push(req),
+                _ => break,
             }
         }
+        tokio::spawn(dispatch_balance_batch(pending));
     }
-    U256::zero()
+}
+
+async fn dispatch_balance_batch(pending: Vec<BalanceRequest>) {
+    let url_opt = { RPC_POOL.read().unwrap().next_read_node() };
+    let p = match url_opt.as_deref().and_then(http_provider) {
+        Some(p) => p,
+        None => {
+            for (_, _, reply) in pending { let _ = reply.send(None); }
+            return;
+        }
+    };
+
+    let calls: Vec<(Address, Bytes)> = pending.iter()
+        .map(|(token, wallet, _)| (*token, encode_address_call(SEL_BALANCE_OF, &[*wallet])))
+        .collect();
+
+    if pending.len() > 1 {
+        if let Some(results) = multicall3(&p, calls.clone()).await {
+            for ((_, _, reply), res) in pending.into_iter().zip(results) {
+                let balance = res.filter(|b| b.len() >= 32).map(|b| U256::from_big_endian(&b[..32]));
+                let _ = reply.send(balance);
+            }
+            return;
+        }
+    }
+
+    // Одиночный запрос или Multicall3 недоступен - те же balanceOf параллельными eth_call
+    let futs = calls.into_iter().map(|(token, data)| eth_call_u256(&p, token, data));
+    let results = join_all(futs).await;
+    for ((_, _, reply), balance) in pending.into_iter().zip(results) {
+        let _ = reply.send(balance);
+    }
+}
+
+/// Multicall3 (один и тот же адрес во всех EVM-сетях)
+pub const MULTICALL3_ADDRESS: Address = H160([
+    0xca, 0x11, 0xbd, 0xe0, 0x59, 0x77, 0xb3, 0x63, 0x11, 0x67,
+    0x02, 0x88, 0x62, 0xbe, 0x2a, 0x17, 0x39, 0x76, 0xca, 0x11,
+]);
+
+/// Селектор aggregate3((address,bool,bytes)[])
+const AGGREGATE3_SELECTOR: [u8; 4] = [0x82, 0xad, 0x56, 0xcb];
+
+// Предвычисленные селекторы (keccak256 сигнатуры не считается на каждый вызов)
+const SEL_NAME: [u8; 4] = [0x06, 0xfd, 0xde, 0x03];                 // name()
+const SEL_SYMBOL: [u8; 4] = [0x95, 0xd8, 0x9b, 0x41];               // symbol()
+const SEL_BALANCE_OF: [u8; 4] = [0x70, 0xa0, 0x82, 0x31];           // balanceOf(address)
+const SEL_ALLOWANCE: [u8; 4] = [0xdd, 0x62, 0xed, 0x3e];            // allowance(address,address)
+const SEL_WITHDRAW: [u8; 4] = [0x2e, 0x1a, 0x7d, 0x4d];             // withdraw(uint256)
+const SEL_SWAP_EXACT_TOKENS_FOR_ETH: [u8; 4] = [0x18, 0xcb, 0xaf, 0xe5]; // swapExactTokensForETH(uint256,uint256,address[],address,uint256)
+
+/// Calldata view-вызова с аргументами-адресами: селектор + адреса, выровненные до 32 байт.
+/// Для balanceOf/allowance/getPair не нужен экземпляр контракта и обход ABI
+pub fn encode_address_call(selector: [u8; 4], args: &[Address]) -> Bytes {
+    let mut data = Vec::with_capacity(4 + 32 * args.len());
+    data.extend_from_slice(&selector);
+    for arg in args {
+        data.extend_from_slice(H256::from(*arg).as_bytes());
+    }
+    Bytes::from(data)
+}
+
+/// eth_call с готовыми calldata; первое 32-байтное слово ответа как uint256
+pub async fn eth_call_u256(p: &Provider<Http>, to: Address, data: Bytes) -> Option<U256> {
+    let tx: TypedTransaction = TransactionRequest::new().to(to).data(data).into();
+    let ret = p.call(&tx, None).await.ok()?;
+    if ret.len() < 32 { return None; }
+    Some(U256::from_big_endian(&ret[..32]))
+}
+
+/// Несколько eth_call одним запросом через Multicall3.aggregate3.
+/// Упавшие подвызовы возвращаются как None, None целиком - если сам multicall недоступен.
+pub async fn multicall3(p: &Provider<Http>, calls: Vec<(Address, Bytes)>) -> Option<Vec<Option<Bytes>>> {
+    use ethers::abi::{encode, decode, Token, ParamType};
+
+    let call_tokens: Vec<Token> = calls.into_iter()
+        .map(|(target, data)| Token::Tuple(vec![
+            Token::Address(target),
+            Token::Bool(true),
+            Token::Bytes(data.to_vec()),
+        ]))
+        .collect();
+
+    let mut calldata = AGGREGATE3_SELECTOR.to_vec();
+    calldata.extend_from_slice(&encode(&[Token::Array(call_tokens)]));
+
+    let tx: TypedTransaction = TransactionRequest::new()
+        .to(MULTICALL3_ADDRESS)
+        .data(calldata)
+        .into();
+    let raw = p.call(&tx, None).await.ok()?;
+
+    let result_type = ParamType::Array(Box::new(ParamType::Tuple(vec![ParamType::Bool, ParamType::Bytes])));
+    let decoded = decode(&[result_type], &raw).ok()?;
+    let results = decoded.into_iter().next()?.into_array()?;
+
+    Some(results.into_iter().map(|item| {
+        let mut fields = item.into_tuple()?.into_iter();
+        let success = fields.next()?.into_bool()?;
+        let data = fields.next()?.into_bytes()?;
+        if success { Some(Bytes::from(data)) } else { None }
+    }).collect())
+}
+
+/// allowance(owner, spender) для списка пар (token, owner). Вызовы идут через rpc_batch:
+/// склейка в batch-запросы, лимит одновременных запросов и фолбэк на одиночные - там.
+/// None - ошибка отдельного вызова.
+pub async fn batch_get_allowances(url: &str, pairs: &[(Address, Address)], spender: Address) -> Vec<Option<U256>> {
+    let futs = pairs.iter().map(|(token, owner)| {
+        rpc_batch::eth_call(url, *token, encode_address_call(SEL_ALLOWANCE, &[*owner, spender]))
+    });
+    join_all(futs).await.into_iter()
+        .map(|res| res.filter(|b| b.len() >= 32).map(|b| U256::from_big_endian(&b[..32])))
+        .collect()
+}
+
+/// Декодирование string-ответа (name/symbol). Старые токены отдают bytes32.
+fn decode_abi_string(data: &[u8]) -> Option<String> {
+    use ethers::abi::{decode, ParamType};
+    if let Ok(tokens) = decode(&[ParamType::String], data) {
+        return tokens.into_iter().next()?.into_string();
+    }
+    if data.len() == 32 {
+        let end = data.iter().position(|b| *b == 0).unwrap_or(32);
+        return String::from_utf8(data[..end].to_vec()).ok();
+    }
+    None
 }
 
 /// Получить symbol и name токена
 pub async fn get_token_info(token: Address) -> (String, String) {
-    let url_opt = { RPC_POOL.read().unwrap().get_fastest_node() };
-    if let Some(url) = url_opt {
-        if let Ok(u) = Url::parse(&url) {
-            let p = Arc::new(Provider::new(Http::new_with_client(u, GLOBAL_HTTP_CLIENT.clone())));
-            let erc20 = IERC20::new(token, p);
-            
-            let symbol = erc20.symbol().call().await.unwrap_or_default();
-            let name = erc20.name().call().await.unwrap_or_default();
-            
-            return (symbol, name);
+    let url_opt = { RPC_POOL.read().unwrap().next_read_node() };
+    if let Some(p) = url_opt.as_deref().and_then(http_provider) {
+        // symbol + name одним eth_call через Multicall3
+        let calls = vec![
+            (token, Bytes::from(SEL_SYMBOL.to_vec())),
+            (token, Bytes::from(SEL_NAME.to_vec())),
+        ];
+        if let Some(results) = multicall3(&p, calls).await {
+            let field = |i: usize| results.get(i)
+                .and_then(|r| r.as_ref())
+                .and_then(|b| decode_abi_string(b))
+                .unwrap_or_default();
+            return (field(0), field(1));
         }
+
+        // Фолбэк: Multicall3 не задеплоен или RPC отклонил вызов - те же два eth_call через rpc_batch
+        // (уходят одним batch-запросом вместе с соседними чтениями)
+        if let Some(url) = url_opt.as_deref() {
+            let (symbol, name) = tokio::join!(
+                rpc_batch::eth_call(url, token, Bytes::from(SEL_SYMBOL.to_vec())),
+                rpc_batch::eth_call(url, token, Bytes::from(SEL_NAME.to_vec()))
+            );
+            if symbol.is_some() || name.is_some() {
+                let field = |r: Option<Bytes>| r.and_then(|b| decode_abi_string(&b)).unwrap_or_default();
+                return (field(symbol), field(name));
+            }
+        }
+
+        let erc20 = erc20_contract(&p, token);
+        let (symbol, name) = tokio::join!(erc20.symbol().call(), erc20.name().call());
+        return (symbol.unwrap_or_default(), name.unwrap_or_default());
     }
     (String::new(), String::new())
 }
 
+// Не больше APPROVE_FANOUT кошельков отправляют апрувы одновременно - иначе при десятках
+// кошельков провайдер начинает троттлить и хвостовые задержки растут
+const APPROVE_FANOUT: usize = 8;
+
 pub async fn check_and_auto_approve_background(token: Address, quote: Address) {
-    let (router, chain_id, wallets_keys) = {
+    // Нативный/нулевой адрес пропускаем; если апрувить нечего - выходим до чтения состояния и RPC
+    let native_sentinel = Address::repeat_byte(0xee);
+    let tokens_to_check: Vec<Address> = [token, quote].into_iter()
+        .filter(|t| *t != native_sentinel && !t.is_zero())
+        .collect();
+    if tokens_to_check.is_empty() {
+        return;
+    }
+
+    // Ключи не копируем: на этом этапе нужны только адреса кошельков
+    let (router, wallet_addrs) = {
         let s = CORE_STATE.read().unwrap();
-        (s.router_address, s.chain_id, s.wallet_keys.clone())
+        (s.router_address, s.wallet_signers.keys().copied().collect::<Vec<Address>>())
     };
+    if wallet_addrs.is_empty() {
+        return;
+    }
     
     let url_opt = { RPC_POOL.read().unwrap().get_fastest_node() };
-    if let Some(url) = url_opt {
-        if let Ok(u) = Url::parse(&url) {
-            let p = Arc::new(Provider::new(Http::new_with_client(u, GLOBAL_HTTP_CLIENT.clone())));
-            let tokens_to_check = vec![token, quote];
-
-            for (w_addr, pk) in wallets_keys {
-                for t_addr in &tokens_to_check {
-                    if *t_addr == Address::from_low_u64_be(0xeeeeeeeeeeeeeeee) || *t_addr == Address::zero() { continue; }
+    if let Some(p) = url_opt.as_deref().and_then(http_provider) {
+        // Все allowance (кошельки x токены) читаются через rpc_batch (склеиваются в batch-запросы), апрувы - только для тех, кому нужно
+        let url = url_opt.as_deref().unwrap_or_default();
+        let pairs: Vec<(Address, Address)> = wallet_addrs.iter()
+            .flat_map(|w_addr| tokens_to_check.iter().map(move |t_addr| (*t_addr, *w_addr)))
+            .collect();
+        let allowances = batch_get_allowances(url, &pairs, router).await;
+
+        // Токены, которым нужен апрув, группируются по кошельку: у одного кошелька апрувы идут
+        // последовательно (общий nonce), разные кошельки отправляют параллельно
+        let mut needs_approve: HashMap<Address, Vec<Address>> = HashMap::new();
+        for ((t_addr, w_addr), allowance) in pairs.iter().zip(allowances) {
+            if matches!(allowance, Some(a) if a < (U256::max_value() / 2)) {
+                needs_approve.entry(*w_addr).or_default().push(*t_addr);
+            }
+        }
+        if needs_approve.is_empty() {
+            return;
+        }
+
+        // Берем текущий газ сети (один раз на все апрувы)
+        let gas_price = match p.get_gas_price().await {
+            Ok(g) => g,
+            Err(_) => return,
+        };
+        let approve_data: Bytes = ApproveCall { spender: router, amount: U256::max_value() }.encode().into();
+        // Подписанты - только тех кошельков, которым действительно нужен апрув
+        let signers: HashMap<Address, LocalWallet> = {
+            let s = CORE_STATE.read().unwrap();
+            needs_approve.keys()
+                .filter_map(|w| s.wallet_signers.get(w).map(|signer| (*w, signer.clone())))
+                .collect()
+        };
+
+        let per_wallet = needs_approve.into_iter().filter_map(|(w_addr, tokens)| {
+            // Восстановленная логика фонового апрува
+            let wallet = signers.get(&w_addr)?.clone();
+            let p = p.clone();
+            let approve_data = approve_data.clone();
+            Some(async move {
+                emit_log("INFO", format!("🛡️ Фоновый Check: Апрув для {:?}...", w_addr));
+                let mut nonce = p.get_transaction_count(w_addr, None).await.unwrap_or(U256::zero());
+                for t_addr in tokens {
+                    let tx = TransactionRequest::new()
+                        .to(t_addr)
+                        .value(0)
+                        .nonce(nonce)
+                        .data(approve_data.clone())
+                        .gas(60000)
+                        .gas_price(gas_price);
                     
-                    let erc20 = IERC20::new(*t_addr, p.clone());
-                    if let Ok(allowance) = erc20.allowance(w_addr, router).call().await {
-                        if allowance < (U256::max_value() / 2) {
-                            emit_log("INFO", format!("🛡️ Фоновый Check: Апрув для {:?}...", w_addr));
-                            
-                            // Восстановленная логика фонового апрува
-                            if let Ok(wallet) = pk.parse::<LocalWallet>() {
-                                let wallet = wallet.with_chain_id(chain_id);
-                                let data = erc20.approve(router, U256::max_value()).tx.data().cloned().unwrap();
-                                
-                                // Берем текущий газ сети
-                                if let Ok(gas_price) = p.get_gas_price().await {
-                                     let nonce = p.get_transaction_count(w_addr, None).await.unwrap_or(U256::zero());
-                                     let tx = TransactionRequest::new()
-                                        .to(*t_addr)
-                                        .value(0)
-                                        .nonce(nonce)
-                                        .data(data)
-                                        .gas(60000)
-                                        .gas_price(gas_price);
-                                     
-                                     let typed_tx: TypedTransaction = tx.into();
-                                     if let Ok(sig) = wallet.sign_transaction_sync(&typed_tx) {
-                                         // Отправляем "fire and forget"
-                                         let _ = p.send_raw_transaction(typed_tx.rlp_signed(&sig)).await;
-                                     }
-                                }
-                            }
+                    let typed_tx: TypedTransaction = tx.into();
+                    if let Ok(sig) = wallet.sign_transaction_sync(&typed_tx) {
+                        // Отправляем "fire and forget"
+                        if p.send_raw_transaction(typed_tx.rlp_signed(&sig)).await.is_ok() {
+                            nonce += U256::one();
                         }
                     }
                 }
-            }
-        }
+            })
+        });
+        futures::stream::iter(per_wallet)
+            .buffer_unordered(APPROVE_FANOUT)
+            .collect::<Vec<()>>()
+            .await;
     }
 }
 
@@ -195,38 +435,68 @@ pub fn calculate_expected_out_v2_pure(token_in: Address, token_out: Address, amo
     U256::zero()
 }
 
-/// V3: вызывает quoter для получения ожидаемого выхода
+/// Время жизни закэшированной котировки V3 квотера (только для CalcImpact)
+const V3_QUOTE_TTL: Duration = Duration::from_secs(3);
+
+/// (пул, token_in, token_out, amount_in, fee) -> (amount_out, состояние пула на момент котировки, время)
+static V3_QUOTE_CACHE: Lazy<Mutex<HashMap<(Address, Address, Address, U256, u32), (U256, (U256, U256, i32), Instant)>>> = Lazy::new(|| Mutex::new(HashMap::new()));
+
+/// Выбранный V3 пул с данным fee и его состояние (sqrtPriceX96, liquidity, tick) - "версия" для инвалидации котировок.
+/// None - пул не выбран, не V3 или fee не совпадает: такую котировку не кэшируем
+fn selected_v3_pool_state(fee: u32) -> Option<(Address, (U256, U256, i32))> {
+    let s = CORE_STATE.read().unwrap();
+    let addr = s.selected_pool_address?;
+    let pool = s.v3_states.get(&addr).filter(|p| p.pool_fee == fee)?;
+    Some((addr, (pool.sqrt_price_x96, pool.liquidity, pool.tick)))
+}
+
+/// V3: вызывает quoter для получения ожидаемого выхода.
+/// use_cache - только для оценки impact в UI: торговый путь (min_out реального свапа) всегда спрашивает квотер
 pub async fn calculate_expected_out_v3_quoted(
     token_in: Address, 
     token_out: Address, 
     amount_in: U256, 
     fee: u32, 
-    quoter: Address
+    quoter: Address,
+    use_cache: bool
 ) -> U256 {
     if amount_in.is_zero() { return U256::zero(); }
+
+    // Повторный пересчёт impact с тем же объёмом не ходит в квотер, пока состояние этого пула не изменилось
+    let cache_slot = if use_cache { selected_v3_pool_state(fee) } else { None };
+    if let Some((pool, state_now)) = cache_slot {
+        let key = (pool, token_in, token_out, amount_in, fee);
+        if let Some((out, state_at, at)) = V3_QUOTE_CACHE.lock().unwrap().get(&key).copied() {
+            if state_at == state_now && at.elapsed() < V3_QUOTE_TTL {
+                return out;
+            }
+        }
+    }
     
     let url_opt = { RPC_POOL.read().unwrap().get_fastest_node() };
-    if let Some(url_str) = url_opt {
-        if let Ok(url) = Url::parse(&url_str) {
-            let provider = Arc::new(Provider::new(Http::new_with_client(url, GLOBAL_HTTP_CLIENT.clone())));
-            let quoter_contract = IQuoter::new(quoter, provider);
-            
-            let params = QuoteExactInputSingleParams {
-                token_in,
-                token_out,
-                amount_in,
-                fee,
-                sqrt_price_limit_x96: U256::zero(),
-            };
-            
-            match quoter_contract.quote_exact_input_single(params).call().await {
-                Ok((amount_out, _, _, _)) => {
-                    emit_log("DEBUG", format!("V3 quoter result: {}", amount_out));
-                    return amount_out;
-                }
-                Err(e) => {
-                    emit_log("WARNING", format!("V3 quoter error: {:?}", e));
+    if let Some(provider) = url_opt.as_deref().and_then(http_provider) {
+        let quoter_contract = quoter_contract(&provider, quoter);
+        
+        let params = QuoteExactInputSingleParams {
+            token_in,
+            token_out,
+            amount_in,
+            fee,
+            sqrt_price_limit_x96: U256::zero(),
+        };
+        
+        match quoter_contract.quote_exact_input_single(params).call().await {
+            Ok((amount_out, _, _, _)) => {
+                emit_log("DEBUG", format!("V3 quoter result: {}", amount_out));
+                if let Some((pool, state_now)) = cache_slot {
+                    let mut cache = V3_QUOTE_CACHE.lock().unwrap();
+                    cache.retain(|_, (_, _, at)| at.elapsed() < V3_QUOTE_TTL);
+                    cache.insert((pool, token_in, token_out, amount_in, fee), (amount_out, state_now, Instant::now()));
                 }
+                return amount_out;
+            }
+            Err(e) => {
+                emit_log("WARNING", format!("V3 quoter error: {:?}", e));
             }
         }
     }
@@ -263,9 +533,90 @@ pub fn calculate_ideal_out(_token_in: Address, _token_out: Address, amount_in: U
     }
 }
 
+/// Заранее закодированный calldata свапа для пачки: селектор, токены/путь, fee и deadline
+/// кодируются один раз, на каждый кошелёк патчатся только статические слова amountIn / amountOutMin / recipient
+struct SwapCalldataTemplate {
+    data: Vec<u8>,
+    amount_in_word: usize,
+    min_out_word: usize,
+    recipient_word: usize,
+}
+
+impl SwapCalldataTemplate {
+    fn new(p_type: &str, t_in: Address, t_out: Address, fee: u32, deadline: U256) -> Self {
+        if p_type == "V3" {
+            // swapV3Single(tokenIn, tokenOut, fee, amountIn, amountOutMinimum, recipient, deadline)
+            let data = SwapV3SingleCall {
+                token_in: t_in,
+                token_out: t_out,
+                pool_fee: fee,
+                amount_in: U256::zero(),
+                amount_out_minimum: U256::zero(),
+                recipient: Address::zero(),
+                deadline
+            }.encode();
+            Self { data, amount_in_word: 3, min_out_word: 4, recipient_word: 5 }
+        } else {
+            // swapExactTokensForTokens(amountIn, amountOutMin, path (offset), to, deadline)
+            let data = SwapExactTokensForTokensCall {
+                amount_in: U256::zero(),
+                amount_out_min: U256::zero(),
+                path: vec![t_in, t_out],
+                to: Address::zero(),
+                deadline
+            }.encode();
+            Self { data, amount_in_word: 0, min_out_word: 1, recipient_word: 3 }
+        }
+    }
+
+    /// Смещение 32-байтного слова аргумента (после 4 байт селектора)
+    fn word(&mut self, index: usize) -> &mut [u8] {
+        let start = 4 + index * 32;
+        &mut self.data[start..start + 32]
+    }
+
+    fn fill(&mut self, amount_in: U256, min_out: U256, recipient: Address) -> Bytes {
+        amount_in.to_big_endian(self.word(self.amount_in_word));
+        min_out.to_big_endian(self.word(self.min_out_word));
+        self.word(self.recipient_word)[12..].copy_from_slice(recipient.as_bytes());
+        Bytes::from(self.data.clone())
+    }
+}
+
+/// Событие об ошибке сделки — общий конструктор для всех веток отказа
+fn trade_error(wallet: String, action: String, message: String, token_address: String, amount: f64, token_decimals: u8) -> EngineEvent {
+    EngineEvent::TradeStatus {
+        wallet,
+        action,
+        status: "Error".into(),
+        message,
+        tx_hash: None,
+        token_address,
+        amount,
+        tokens_received: None,
+        tokens_sold: None,
+        token_decimals
+    }
+}
+
+/// Сборка, подпись и рассылка транзакции - общая для апрува и свапа в run_batch_trade.
+/// None - подписать не удалось; иначе результат parallel_broadcast (хеш или текст ошибки)
+async fn sign_and_broadcast(wallet: &LocalWallet, to: Address, nonce: u64, data: Bytes, gas_limit: u64, gas_price_wei: u64) -> Option<String> {
+    let tx = TransactionRequest::new()
+        .to(to)
+        .value(0)
+        .nonce(nonce)
+        .data(data)
+        .gas(gas_limit)
+        .gas_price(gas_price_wei);
+    let typed_tx: TypedTransaction = tx.into();
+    let sig = wallet.sign_transaction_sync(&typed_tx).ok()?;
+    Some(parallel_broadcast(typed_tx.rlp_signed(&sig)).await)
+}
+
 /// Выполняет batch trade для списка кошельков
 pub async fn run_batch_trade(
-    keys: Vec<String>, 
+    signers: Vec<LocalWallet>, 
     router: Address, 
     action: String, 
     token: Address, 
@@ -274,7 +625,6 @@ pub async fn run_batch_trade(
     gas: f64, 
     slippage: f64, 
     _v3_f: u32, 
-    chain_id: u64,
     amounts_wei: Option<std::collections::HashMap<String, String>>
 ) -> Vec<EngineEvent> {
     let start_time = std::time::Instant::now();
@@ -285,43 +635,47 @@ pub async fn run_batch_trade(
         (s.selected_pool_type.clone().unwrap_or_default(), s.selected_pool_fee) 
     };
     
+    let token_str = format!("{:?}", token);
+    
     if p_type.is_empty() { 
-        return vec![EngineEvent::TradeStatus { 
-            wallet: "SYSTEM".into(), 
-            action, 
-            status: "Error".into(), 
-            message: "No pool selected!".into(), 
-            tx_hash: None,
-            token_address: format!("{:?}", token),
-            amount,
-            tokens_received: None,
-            tokens_sold: None,
-            token_decimals: 18
-        }]; 
+        return vec![trade_error("SYSTEM".into(), action, "No pool selected!".into(), token_str, amount, 18)]; 
     }
     
     let url_opt = { RPC_POOL.read().unwrap().get_fastest_node() };
+    let (t_in, t_out) = if action == "buy" { (quote, token) } else { (token, quote) };
+    let deadline = U256::from(
+        std::time::SystemTime::now()
+            .duration_since(std::time::UNIX_EPOCH)
+            .unwrap()
+            .as_secs() + 300
+    );
+    let mut swap_template = SwapCalldataTemplate::new(&p_type, t_in, t_out, p_fee, deadline);
+    // Провайдер для проверки allowance берём один раз на пачку, а не на каждый кошелёк
+    let sell_provider = if action == "sell" {
+        url_opt.as_deref().and_then(http_provider)
+    } else {
+        None
+    };
     
-    for pk in keys {
-        let wallet: LocalWallet = match pk.parse::<LocalWallet>() { 
-            Ok(w) => w.with_chain_id(chain_id), 
-            Err(_) => continue 
-        };
-        
+    // Decimals входного токена и сумма BUY одинаковы для всех кошельков пачки - считаем один раз
+    let dec = { *CORE_STATE.read().unwrap().decimals_cache.get(&t_in).unwrap_or(&18) };
+    let batch_amount_wei: U256 = match parse_units(amount, dec as u32) {
+        Ok(v) => v.into(),
+        Err(_) => U256::zero()
+    };
+    let gas_price_wei = gas_gwei_to_wei(gas);
+    
+    for wallet in signers {
         let wallet_addr = wallet.address();
-        let (t_in, t_out) = if action == "buy" { (quote, token) } else { (token, quote) };
-        let dec = { *CORE_STATE.read().unwrap().decimals_cache.get(&t_in).unwrap_or(&18) };
+        // Debug-формат H160 уже в нижнем регистре
+        let wallet_str = format!("{:?}", wallet_addr);
         
         // Безопасный парсинг суммы с учетом точной продажи 100%
-        let mut amount_wei: U256 = match parse_units(amount, dec as u32) {
-            Ok(v) => v.into(),
-            Err(_) => U256::zero()
-        };
+        let mut amount_wei = batch_amount_wei;
         
         if action == "sell" {
             let mut exact_wei_from_python = None;
             if let Some(ref amounts) = amounts_wei {
-                let wallet_str = format!("{:?}", wallet_addr).to_lowercase();
                 if let Some(wei_str) = amounts.get(&wallet_str) {
                     if let Ok(w) = U256::from_dec_str(wei_str) {
                         exact_wei_from_python = Some(w);
@@ -337,79 +691,45 @@ pub async fn run_batch_trade(
         }
         
         if amount_wei.is_zero() {
-            events.push(EngineEvent::TradeStatus {
-                wallet: format!("{:?}", wallet_addr),
-                action: action.clone(),
-                status: "Error".into(),
-                message: if action == "sell" { "Zero balance to sell".into() } else { "Invalid amount".into() },
-                tx_hash: None,
-                token_address: format!("{:?}", token),
-                amount,
-                tokens_received: None,
-                tokens_sold: None,
-                token_decimals: dec
-            });
+            let message = if action == "sell" { "Zero balance to sell" } else { "Invalid amount" };
+            events.push(trade_error(wallet_str, action.clone(), message.into(), token_str.clone(), amount, dec));
             continue;
         }
         
         let t_nonce = std::time::Instant::now();
         let nonce = { *CORE_STATE.read().unwrap().nonce_map.get(&wallet_addr).unwrap_or(&0) };
         emit_log("DEBUG", format!("[TRADE] NONCE | {}ms | nonce={}", t_nonce.elapsed().as_millis(), nonce));
-        let deadline = U256::from(
-            std::time::SystemTime::now()
-                .duration_since(std::time::UNIX_EPOCH)
-                .unwrap()
-                .as_secs() + 300
-        );
         
         // ================= АВТОМАТИЧЕСКАЯ ПРОВЕРКА ALLOWANCE ПРИ ПРОДАЖЕ =================
         if action == "sell" {
             let t_allow = std::time::Instant::now();
             let mut allowance = U256::zero();
-            // Получаем провайдера для проверки allowance
-            if let Some(url) = &url_opt {
-                if let Ok(u) = Url::parse(url) {
-                    let p = Arc::new(Provider::new(Http::new_with_client(u, GLOBAL_HTTP_CLIENT.clone())));
-                    let erc20 = IERC20::new(t_in, p); // t_in is Token address on Sell
-                    if let Ok(a) = erc20.allowance(wallet_addr, router).call().await {
-                        allowance = a;
-                    }
-                emit_log("DEBUG", format!("[TRADE] ALLOWANCE CHECK | {}ms | allowance={}", t_allow.elapsed().as_millis(), allowance));
+            if let Some(p) = &sell_provider {
+                if let Some(a) = eth_call_u256(p, t_in, encode_address_call(SEL_ALLOWANCE, &[wallet_addr, router])).await {
+                    allowance = a;
                 }
+                emit_log("DEBUG", format!("[TRADE] ALLOWANCE CHECK | {}ms | allowance={}", t_allow.elapsed().as_millis(), allowance));
             }
             
             if allowance < amount_wei {
                 emit_log("WARNING", format!("🛡️ Auto-Approve required for {:?} (allowance: {})", wallet_addr, allowance));
                 
                 // Construct Approve Transaction INSTEAD of Swap
-                let erc20_dummy = IERC20::new(t_in, Arc::new(Provider::new(Http::new(Url::parse("http://localhost").unwrap()))));
-                let data = erc20_dummy.approve(router, U256::max_value()).tx.data().cloned().unwrap();
+                // Calldata кодируем напрямую — без отдельного Http-провайдера (Http::new поднимал свой reqwest Client)
+                let data: Bytes = ApproveCall { spender: router, amount: U256::max_value() }.encode().into();
                 
-                let tx = TransactionRequest::new()
-                    .to(t_in)
-                    .value(0)
-                    .nonce(nonce)
-                    .data(data)
-                    .gas(100000)
-                    .gas_price(gas_gwei_to_wei(gas));
-                    
-                let typed_tx: TypedTransaction = tx.into();
-                
-                if let Ok(sig) = wallet.sign_transaction_sync(&typed_tx) {
-                    let raw_tx = typed_tx.rlp_signed(&sig);
-                    let hash = parallel_broadcast(raw_tx.clone()).await;
-                    
+                if let Some(hash) = sign_and_broadcast(&wallet, t_in, nonce, data, 100000, gas_price_wei).await {
                     emit_event(EngineEvent::TxSent {
                         tx_hash: hash.clone(),
-                        wallet: format!("{:?}", wallet_addr),
+                        wallet: wallet_str.clone(),
                         action: "approve".into(),
                         amount: 0.0,
-                        token: format!("{:?}", token),
+                        token: token_str.clone(),
                         timestamp_ms: current_timestamp_ms()
                     });
                     
                     events.push(EngineEvent::TradeStatus {
-                        wallet: format!("{:?}", wallet_addr),
+                        wallet: wallet_str,
                         action: "approve".into(),
                         status: "Sent".into(),
                         message: "Auto-Approve sent. Please retry SELL after confirmation.".into(),
@@ -430,7 +750,7 @@ pub async fn run_batch_trade(
         let t_exp = std::time::Instant::now();
         let exp_out = if p_type == "V3" {
             let quoter = CORE_STATE.read().unwrap().quoter_address;
-            calculate_expected_out_v3_quoted(t_in, t_out, amount_wei, p_fee, quoter).await
+            calculate_expected_out_v3_quoted(t_in, t_out, amount_wei, p_fee, quoter, false).await
         } else {
             calculate_expected_out_v2_pure(t_in, t_out, amount_wei)
         };
@@ -440,40 +760,10 @@ pub async fn run_batch_trade(
         let slippage_factor = (10000.0 - slippage * 100.0).max(0.0).min(10000.0) as u64;
         let min_out = (exp_out * U256::from(slippage_factor)) / U256::from(10000);
 
-        let calldata = if p_type == "V3" {
-            SwapV3SingleCall { 
-                token_in: t_in, 
-                token_out: t_out, 
-                pool_fee: p_fee, 
-                amount_in: amount_wei, 
-                amount_out_minimum: min_out, 
-                recipient: wallet_addr, 
-                deadline 
-            }.encode()
-        } else {
-            SwapExactTokensForTokensCall { 
-                amount_in: amount_wei, 
-                amount_out_min: min_out, 
-                path: vec![t_in, t_out], 
-                to: wallet_addr, 
-                deadline 
-            }.encode()
-        };
+        let calldata = swap_template.fill(amount_wei, min_out, wallet_addr);
 
-        let tx = TransactionRequest::new()
-            .to(router)
-            .value(0)
-            .nonce(nonce)
-            .data(calldata)
-            .gas(500000)
-            .gas_price(gas_gwei_to_wei(gas));
-            
-        let typed_tx: TypedTransaction = tx.into();
-        
-        if let Ok(sig) = wallet.sign_transaction_sync(&typed_tx) {
-            let raw_tx = typed_tx.rlp_signed(&sig);
-            let t_broadcast = std::time::Instant::now();
-            let hash = parallel_broadcast(raw_tx.clone()).await;
+        let t_broadcast = std::time::Instant::now();
+        if let Some(hash) = sign_and_broadcast(&wallet, router, nonce, calldata, 500000, gas_price_wei).await {
             emit_log("DEBUG", format!("[TRADE] BROADCAST | {}ms | hash={}", t_broadcast.elapsed().as_millis(), &hash[..16]));
             
             let is_success = hash.starts_with("0x");
@@ -484,10 +774,10 @@ pub async fn run_batch_trade(
                 
                 emit_event(EngineEvent::TxSent {
                     tx_hash: hash.clone(),
-                    wallet: format!("{:?}", wallet_addr),
+                    wallet: wallet_str.clone(),
                     action: action.clone(),
                     amount,
-                    token: format!("{:?}", token),
+                    token: token_str.clone(),
                     timestamp_ms: current_timestamp_ms()
                 });
             }
@@ -499,12 +789,12 @@ pub async fn run_batch_trade(
             };
 
             events.push(EngineEvent::TradeStatus { 
-                wallet: format!("{:?}", wallet_addr), 
+                wallet: wallet_str, 
                 action: action.clone(), 
                 status: if is_success { "Sent".into() } else { "Error".into() }, 
                 message: hash.clone(), 
                 tx_hash: if is_success { Some(hash.clone()) } else { None },
-                token_address: format!("{:?}", token),
+                token_address: token_str.clone(),
                 amount,
                 tokens_received: tok_received,
                 tokens_sold: tok_sold,
@@ -516,6 +806,26 @@ pub async fn run_batch_trade(
     events
 }
 
+/// Ожидание receipt: опрос сразу по приходу нового блока (NEW_HEAD из WS-подписки),
+/// а без подписки - по таймеру с экспоненциальным backoff (250ms → 2s, jitter), общий таймаут 30s.
+/// Возвращает None если receipt так и не появился.
+/// Опросы идут через rpc_batch и склеиваются с остальными receipt-запросами к тому же узлу.
+async fn wait_for_receipt(url: &str, tx_hash: H256) -> Option<TransactionReceipt> {
+    let started = std::time::Instant::now();
+    let mut interval_ms: u64 = 250;
+    let mut heads = NEW_HEAD.subscribe();
+
+    while started.elapsed() < std::time::Duration::from_secs(30) {
+        let backoff = tokio::time::Duration::from_millis(interval_ms + rand::random::<u64>() % 50);
+        let _ = tokio::time::timeout(backoff, heads.changed()).await;
+        if let Some(receipt) = rpc_batch::get_transaction_receipt(url, tx_hash).await {
+            return Some(receipt);
+        }
+        interval_ms = (interval_ms * 2).min(2000);
+    }
+    None
+}
+
 /// Параллельная отправка транзакции на несколько RPC
 async fn parallel_broadcast(data: Bytes) -> String {
     let t_start = std::time::Instant::now();
@@ -527,10 +837,7 @@ async fn parallel_broadcast(data: Bytes) -> String {
     for url in urls {
         let d = data.clone();
         tasks.push(tokio::spawn(async move {
-            let p = Provider::new(Http::new_with_client(
-                Url::parse(&url).unwrap(), 
-                GLOBAL_HTTP_CLIENT.clone()
-            ));
+            let p = http_provider(&url).ok_or_else(|| format!("bad rpc url: {}", url))?;
             p.send_raw_transaction(d)
                 .await
                 .map(|r| format!("{:?}", r.tx_hash()))
@@ -550,18 +857,16 @@ async fn parallel_broadcast(data: Bytes) -> String {
 
 /// Auto-fuel: свапает токен на нативную валюту когда баланс ниже порога
 pub async fn run_auto_fuel(
-    pk: String, 
+    wallet_signer: LocalWallet, 
     wallet: Address, 
     router: Address, 
     quote: Address, 
-    amount: U256, 
-    chain_id: u64
+    amount: U256
 ) -> bool {
     use ethers::abi::{Token, encode};
     
     if amount.is_zero() { return false; }
     
-    let wallet_signer: LocalWallet = pk.parse::<LocalWallet>().unwrap().with_chain_id(chain_id);
     let (w_n, gas_p) = { 
         let s = CORE_STATE.read().unwrap(); 
         (s.wrapped_native_address, s.gas_price)
@@ -571,8 +876,7 @@ pub async fn run_auto_fuel(
     if quote == w_n {
         emit_log("INFO", format!("⛽ Auto-Fuel: withdraw {} WBNB → BNB", amount));
         
-        let withdraw_sig = ethers::utils::keccak256("withdraw(uint256)".as_bytes());
-        let mut calldata: Vec<u8> = withdraw_sig[..4].to_vec();
+        let mut calldata: Vec<u8> = SEL_WITHDRAW.to_vec();
         calldata.extend_from_slice(&encode(&[Token::Uint(amount)]));
         
         let nonce = { 
@@ -608,128 +912,140 @@ pub async fn run_auto_fuel(
     emit_log("INFO", format!("⛽ Auto-Fuel: swap {:?} → BNB via TaxRouter", quote));
     
     let url_opt = { RPC_POOL.read().unwrap().get_fastest_node() };
-    if let Some(url) = url_opt {
-        if let Ok(u) = Url::parse(&url) {
-            let p = Arc::new(Provider::new(Http::new_with_client(u, GLOBAL_HTTP_CLIENT.clone())));
-            let erc20 = IERC20::new(quote, p.clone());
-            
-            // Проверяем баланс токена
-            if let Ok(balance) = erc20.balance_of(wallet).call().await {
-                if balance < amount {
-                    let reason = format!("Недостаточно токена: есть {:.6}, нужно {:.6}", 
-                        u256_to_f64_safe(balance, 18), u256_to_f64_safe(amount, 18));
-                    emit_log("ERROR", format!("⛽ Auto-Fuel: {}", reason));
-                    emit_event(EngineEvent::AutoFuelError {
-                        wallet: format!("{:?}", wallet),
-                        reason,
-                    });
-                    return false;
-                }
+    if let Some(p) = url_opt.as_deref().and_then(http_provider) {
+        let erc20 = erc20_contract(&p, quote);
+        
+        // Проверяем баланс токена
+        if let Some(balance) = eth_call_u256(&p, quote, encode_address_call(SEL_BALANCE_OF, &[wallet])).await {
+            if balance < amount {
+                let reason = format!("Недостаточно токена: есть {:.6}, нужно {:.6}", 
+                    u256_to_f64_safe(balance, 18), u256_to_f64_safe(amount, 18));
+                emit_log("ERROR", format!("⛽ Auto-Fuel: {}", reason));
+                emit_event(EngineEvent::AutoFuelError {
+                    wallet: format!("{:?}", wallet),
+                    reason,
+                });
+                return false;
             }
-            
-            // Проверяем и делаем approve если нужно
-            if let Ok(allowance) = erc20.allowance(wallet, router).call().await {
-                if allowance < amount {
-                    emit_log("INFO", "⛽ Auto-Fuel: требуется approve...".to_string());
-                    
-                    let nonce = { 
-                        let s = CORE_STATE.read().unwrap(); 
-                        *s.nonce_map.get(&wallet).unwrap_or(&0) 
-                    };
-                    
-                    let approve_data = erc20.approve(router, U256::max_value()).tx.data().cloned().unwrap();
-                    
-                    let tx = TransactionRequest::new()
-                        .to(quote)
-                        .nonce(nonce)
-                        .data(approve_data)
-                        .gas(60000)
-                        .gas_price(gas_p);
-                    
-                    let typed_tx: TypedTransaction = tx.into();
+        }
+        
+        // Проверяем и делаем approve если нужно
+        if let Some(allowance) = eth_call_u256(&p, quote, encode_address_call(SEL_ALLOWANCE, &[wallet, router])).await {
+            if allowance < amount {
+                emit_log("INFO", "⛽ Auto-Fuel: требуется approve...".to_string());
+                
+                let nonce = { 
+                    let s = CORE_STATE.read().unwrap(); 
+                    *s.nonce_map.get(&wallet).unwrap_or(&0) 
+                };
+                
+                let approve_data = erc20.approve(router, U256::max_value()).tx.data().cloned().unwrap();
+                
+                let tx = TransactionRequest::new()
+                    .to(quote)
+                    .nonce(nonce)
+                    .data(approve_data)
+                    .gas(60000)
+                    .gas_price(gas_p);
+                
+                let typed_tx: TypedTransaction = tx.into();
+                
+                if let Ok(sig) = wallet_signer.sign_transaction_sync(&typed_tx) {
+                    let raw_tx = typed_tx.rlp_signed(&sig);
+                    let hash = parallel_broadcast(raw_tx).await;
+                    emit_log("INFO", format!("⛽ Auto-Fuel approve tx: {}", hash));
                     
-                    if let Ok(sig) = wallet_signer.sign_transaction_sync(&typed_tx) {
-                        let raw_tx = typed_tx.rlp_signed(&sig);
-                        let hash = parallel_broadcast(raw_tx).await;
-                        emit_log("INFO", format!("⛽ Auto-Fuel approve tx: {}", hash));
-                        
-                        if hash.starts_with("0x") {
-                            CORE_STATE.write().unwrap().nonce_map.insert(wallet, nonce + 1);
-                            tokio::time::sleep(tokio::time::Duration::from_secs(3)).await;
-                        } else {
-                            let reason = "Approve failed: все RPC недоступны".to_string();
-                            emit_event(EngineEvent::AutoFuelError {
-                                wallet: format!("{:?}", wallet),
-                                reason: reason.clone(),
-                            });
-                            return false;
+                    if hash.starts_with("0x") {
+                        CORE_STATE.write().unwrap().nonce_map.insert(wallet, nonce + 1);
+                        let approve_hash: H256 = hash.parse().unwrap_or(H256::zero());
+                        let receipt = match url_opt.as_deref() {
+                            Some(url) => wait_for_receipt(url, approve_hash).await,
+                            None => None,
+                        };
+                        match receipt {
+                            Some(r) if r.status == Some(U64::from(0)) => {
+                                let reason = "Approve reverted".to_string();
+                                emit_event(EngineEvent::AutoFuelError {
+                                    wallet: format!("{:?}", wallet),
+                                    reason,
+                                });
+                                return false;
+                            }
+                            Some(_) => {}
+                            None => emit_log("WARNING", "⛽ Auto-Fuel: receipt approve не получен за 30s, пробуем swap".to_string()),
                         }
+                    } else {
+                        let reason = "Approve failed: все RPC недоступны".to_string();
+                        emit_event(EngineEvent::AutoFuelError {
+                            wallet: format!("{:?}", wallet),
+                            reason: reason.clone(),
+                        });
+                        return false;
                     }
                 }
             }
+        }
+        
+        // Делаем swap
+        let nonce = { 
+            let s = CORE_STATE.read().unwrap(); 
+            *s.nonce_map.get(&wallet).unwrap_or(&0) 
+        };
+        
+        let deadline = U256::from(
+            std::time::SystemTime::now()
+                .duration_since(std::time::UNIX_EPOCH)
+                .unwrap()
+                .as_secs() + 300
+        );
+        
+        let mut calldata: Vec<u8> = SEL_SWAP_EXACT_TOKENS_FOR_ETH.to_vec();
+        
+        let tokens = vec![
+            Token::Uint(amount),
+            Token::Uint(U256::zero()),
+            Token::Array(vec![Token::Address(quote), Token::Address(w_n)]),
+            Token::Address(wallet),
+            Token::Uint(deadline),
+        ];
+        calldata.extend_from_slice(&encode(&tokens));
+        
+        let tx = TransactionRequest::new()
+            .to(router)
+            .nonce(nonce)
+            .data(calldata)
+            .gas(300000)
+            .gas_price(gas_p);
             
-            // Делаем swap
-            let nonce = { 
-                let s = CORE_STATE.read().unwrap(); 
-                *s.nonce_map.get(&wallet).unwrap_or(&0) 
-            };
-            
-            let deadline = U256::from(
-                std::time::SystemTime::now()
-                    .duration_since(std::time::UNIX_EPOCH)
-                    .unwrap()
-                    .as_secs() + 300
-            );
-            
-            let func_sig = ethers::utils::keccak256("swapExactTokensForETH(uint256,uint256,address[],address,uint256)".as_bytes());
-            let mut calldata: Vec<u8> = func_sig[..4].to_vec();
-            
-            let tokens = vec![
-                Token::Uint(amount),
-                Token::Uint(U256::zero()),
-                Token::Array(vec![Token::Address(quote), Token::Address(w_n)]),
-                Token::Address(wallet),
-                Token::Uint(deadline),
-            ];
-            calldata.extend_from_slice(&encode(&tokens));
+        let typed_tx: TypedTransaction = tx.into();
+        
+        if let Ok(sig) = wallet_signer.sign_transaction_sync(&typed_tx) { 
+            let raw_tx = typed_tx.rlp_signed(&sig);
+            let hash = parallel_broadcast(raw_tx).await;
             
-            let tx = TransactionRequest::new()
-                .to(router)
-                .nonce(nonce)
-                .data(calldata)
-                .gas(300000)
-                .gas_price(gas_p);
+            if hash.starts_with("0x") {
+                emit_log("SUCCESS", format!("⛽ Auto-Fuel swap tx: {}", hash));
                 
-            let typed_tx: TypedTransaction = tx.into();
-            
-            if let Ok(sig) = wallet_signer.sign_transaction_sync(&typed_tx) { 
-                let raw_tx = typed_tx.rlp_signed(&sig);
-                let hash = parallel_broadcast(raw_tx).await;
+                let tx_hash: H256 = hash.parse().unwrap_or(H256::zero());
+                CORE_STATE.write().unwrap().pending_txs.insert(tx_hash);
+                CORE_STATE.write().unwrap().nonce_map.insert(wallet, nonce + 1);
                 
-                if hash.starts_with("0x") {
-                    emit_log("SUCCESS", format!("⛽ Auto-Fuel swap tx: {}", hash));
-                    
-                    let tx_hash: H256 = hash.parse().unwrap_or(H256::zero());
-                    CORE_STATE.write().unwrap().pending_txs.insert(tx_hash);
-                    CORE_STATE.write().unwrap().nonce_map.insert(wallet, nonce + 1);
-                    
-                    emit_event(EngineEvent::TxSent {
-                        tx_hash: hash,
-                        wallet: format!("{:?}", wallet),
-                        action: "auto_fuel".into(),
-                        amount: u256_to_f64_safe(amount, 18),
-                        token: format!("{:?}", quote),
-                        timestamp_ms: current_timestamp_ms()
-                    });
-                    
-                    return true;
-                } else {
-                    let reason = "Swap failed: все RPC недоступны".to_string();
-                    emit_event(EngineEvent::AutoFuelError {
-                        wallet: format!("{:?}", wallet),
-                        reason,
-                    });
-                }
+                emit_event(EngineEvent::TxSent {
+                    tx_hash: hash,
+                    wallet: format!("{:?}", wallet),
+                    action: "auto_fuel".into(),
+                    amount: u256_to_f64_safe(amount, 18),
+                    token: format!("{:?}", quote),
+                    timestamp_ms: current_timestamp_ms()
+                });
+                
+                return true;
+            } else {
+                let reason = "Swap failed: все RPC недоступны".to_string();
+                emit_event(EngineEvent::AutoFuelError {
+                    wallet: format!("{:?}", wallet),
+                    reason,
+                });
             }
         }
     }
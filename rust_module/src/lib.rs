@@ -5,6 +5,7 @@ mod bridge;
 mod engine;
 mod monitor;
 mod execution;
+mod rpc_batch;
 mod crypto;
 mod pnl;
 mod config;
@@ -13,6 +14,7 @@ mod config;
 fn dexbot_core(_py: Python, m: &PyModule) -> PyResult<()> {
     m.add_function(wrap_pyfunction!(bridge::init_bridge_signal, m)?)?;
     m.add_function(wrap_pyfunction!(bridge::pop_from_bridge, m)?)?;
+    m.add_function(wrap_pyfunction!(bridge::pop_all_from_bridge, m)?)?;
     m.add_function(wrap_pyfunction!(engine::push_to_engine, m)?)?;
     m.add_function(wrap_pyfunction!(crypto::init_or_load_keys, m)?)?;
     m.add_function(wrap_pyfunction!(crypto::get_public_key, m)?)?; 
@@ -2,14 +2,16 @@ use ethers::prelude::*;
 use ethers::utils::format_units;
 use std::time::{Instant, Duration};
 use tokio::time::{sleep, timeout, interval};
-use std::collections::HashMap;
+use std::collections::{HashMap, HashSet};
 
-use crate::state::{RPC_POOL, SHUTDOWN_FLAG, GLOBAL_HTTP_CLIENT, CORE_STATE, TRACKED_WALLETS, V3PoolState};
+use crate::state::{RPC_POOL, SHUTDOWN_FLAG, CORE_STATE, TRACKED_WALLETS, V3PoolState, PNL_WAKEUP, NEW_HEAD, http_provider};
 use crate::bridge::{emit_event, EngineEvent, emit_log};
 use crate::execution;
+use crate::rpc_batch;
 use futures::StreamExt;
-use std::sync::Arc;
-use url::Url;
+use futures::future::{BoxFuture, FutureExt, Shared};
+use once_cell::sync::Lazy;
+use std::sync::{Arc, Mutex};
 
 
 abigen!(
@@ -42,6 +44,24 @@ struct PoolCandidate {
     spot_price: f64,
 }
 
+/// keccak256("Transfer(address,address,uint256)")
+const TRANSFER_TOPIC: H256 = H256([
+    0xdd, 0xf2, 0x52, 0xad, 0x1b, 0xe2, 0xc8, 0x9b, 0x69, 0xc2, 0xb0, 0x68, 0xfc, 0x37, 0x8d, 0xaa,
+    0x95, 0x2b, 0xa7, 0xf1, 0x63, 0xc4, 0xa1, 0x16, 0x28, 0xf5, 0x5a, 0x4d, 0xf5, 0x23, 0xb3, 0xef,
+]);
+
+/// keccak256("Sync(uint112,uint112)")
+const SYNC_TOPIC: H256 = H256([
+    0x1c, 0x41, 0x1e, 0x9a, 0x96, 0xe0, 0x71, 0x24, 0x1c, 0x2f, 0x21, 0xf7, 0x72, 0x6b, 0x17, 0xae,
+    0x89, 0xe3, 0xca, 0xb4, 0xc7, 0x8b, 0xe5, 0x0e, 0x06, 0x2b, 0x03, 0xa9, 0xff, 0xfb, 0xba, 0xd1,
+]);
+
+/// keccak256("Swap(address,address,int256,int256,uint160,uint128,int24)") - V3 пул
+const SWAP_V3_TOPIC: H256 = H256([
+    0xc4, 0x20, 0x79, 0xf9, 0x4a, 0x63, 0x50, 0xd7, 0xe6, 0x23, 0x5f, 0x29, 0x17, 0x49, 0x24, 0xf9,
+    0x28, 0xcc, 0x2a, 0xc8, 0x18, 0xeb, 0x64, 0xfe, 0xd8, 0x00, 0x4e, 0x11, 0x5f, 0xbc, 0xca, 0x67,
+]);
+
 const DEFAULT_TRADE_USD: f64 = 1000.0;
 const WEIGHT_LIQUIDITY: f64 = 0.50;
 const WEIGHT_FEE: f64 = 0.20;
@@ -49,6 +69,14 @@ const WEIGHT_PRICE_IMPACT: f64 = 0.30;
 const RECONNECT_DELAY_SECS: u64 = 3;
 const PREFETCH_TIMEOUT_SECS: u64 = 5;
 const IDLE_TIMEOUT_SECS: u64 = 30;
+// Auto-fuel: не больше попыток подряд и пауза между ними
+const AUTO_FUEL_MAX_ATTEMPTS: u32 = 5;
+const AUTO_FUEL_RETRY_SECS: u64 = 60;
+const PENDING_TX_TIMEOUT_SECS: u64 = 300;
+const TRANSFER_REFRESH_CONCURRENCY: usize = 16;
+const RECEIPT_TICK_MS: u64 = 100;
+const RECEIPT_MIN_INTERVAL_MS: u64 = 300;
+const RECEIPT_MAX_INTERVAL_MS: u64 = 3000;
 
 fn current_timestamp_ms() -> u64 {
     std::time::SystemTime::now()
@@ -69,15 +97,61 @@ fn get_quote_price_usd(quote_symbol: &str, usd_prices: &HashMap<String, f64>) ->
     1.0
 }
 
+/// Запросы decimals, которые сейчас в полёте: параллельные промахи по одному токену ждут один RPC
+static DECIMALS_INFLIGHT: Lazy<Mutex<HashMap<Address, Shared<BoxFuture<'static, u8>>>>> = Lazy::new(|| Mutex::new(HashMap::new()));
+
 pub async fn get_decimals_cached(token: Address) -> u8 {
     if let Some(dec) = CORE_STATE.read().unwrap().decimals_cache.get(&token) { return *dec; }
+    let fut = {
+        let mut inflight = DECIMALS_INFLIGHT.lock().unwrap();
+        inflight.entry(token).or_insert_with(|| fetch_decimals(token).boxed().shared()).clone()
+    };
+    let dec = fut.await;
+    DECIMALS_INFLIGHT.lock().unwrap().remove(&token);
+    dec
+}
+
+// Предвычисленные селекторы view-вызовов мониторинга
+const SEL_DECIMALS: [u8; 4] = [0x31, 0x3c, 0xe5, 0x67];   // decimals()
+const SEL_GET_PAIR: [u8; 4] = [0xe6, 0xa4, 0x39, 0x05];   // getPair(address,address)
+const SEL_GET_POOL: [u8; 4] = [0x16, 0x98, 0xee, 0x82];   // getPool(address,address,uint24)
+
+/// Предзагрузка decimals набора токенов (quote токены сети) одним Multicall3 запросом:
+/// get_decimals_cached для них потом отвечает из кэша без RPC. Не полученные остаются на обычный путь
+pub async fn prefetch_decimals(tokens: Vec<Address>) {
+    let tokens: Vec<Address> = {
+        let s = CORE_STATE.read().unwrap();
+        tokens.into_iter().filter(|t| !t.is_zero() && !s.decimals_cache.contains_key(t)).collect()
+    };
+    if tokens.is_empty() { return; }
+    
+    let url_opt = { RPC_POOL.read().unwrap().get_fastest_node() };
+    let p = match url_opt.as_deref().and_then(http_provider) {
+        Some(p) => p,
+        None => return,
+    };
+    let calls: Vec<(Address, Bytes)> = tokens.iter().map(|t| (*t, execution::encode_address_call(SEL_DECIMALS, &[]))).collect();
+    if let Some(results) = execution::multicall3(&p, calls).await {
+        let mut s = CORE_STATE.write().unwrap();
+        for (token, ret) in tokens.into_iter().zip(results) {
+            if let Some(ret) = ret.filter(|r| r.len() >= 32) {
+                let dec = U256::from_big_endian(&ret[..32]);
+                if dec <= U256::from(77) {
+                    s.decimals_cache.insert(token, dec.as_u32() as u8);
+                }
+            }
+        }
+    }
+}
+
+async fn fetch_decimals(token: Address) -> u8 {
     let urls = { RPC_POOL.read().unwrap().get_fastest_pool(3) };
     for url_str in urls {
-        if let Ok(url) = Url::parse(&url_str) {
-            let provider = Arc::new(Provider::new(Http::new_with_client(url, GLOBAL_HTTP_CLIENT.clone())));
-            let contract = UniversalABI::new(token, provider);
-            if let Ok(dec) = contract.decimals().call().await {
-                if dec <= 77 {
+        if let Some(provider) = http_provider(&url_str) {
+            let data = execution::encode_address_call(SEL_DECIMALS, &[]);
+            if let Some(dec) = execution::eth_call_u256(&provider, token, data).await {
+                if dec <= U256::from(77) {
+                    let dec = dec.as_u32() as u8;
                     CORE_STATE.write().unwrap().decimals_cache.insert(token, dec);
                     return dec;
                 }
@@ -87,6 +161,43 @@ pub async fn get_decimals_cached(token: Address) -> u8 {
     18
 }
 
+/// Расписание опроса receipt одной tx: интервал растёт в 1.5 раза после каждого промаха
+struct ReceiptPoll {
+    first_seen: Instant,
+    next_check: Instant,
+    interval: Duration,
+}
+
+impl ReceiptPoll {
+    fn new(now: Instant) -> Self {
+        Self { first_seen: now, next_check: now, interval: Duration::from_millis(RECEIPT_MIN_INTERVAL_MS) }
+    }
+
+    fn backoff(&mut self, now: Instant) {
+        self.next_check = now + self.interval;
+        self.interval = self.interval.mul_f64(1.5).min(Duration::from_millis(RECEIPT_MAX_INTERVAL_MS));
+    }
+}
+
+fn handle_receipt(tx_hash: H256, receipt: &TransactionReceipt) {
+    let status = if receipt.status.unwrap_or(U64::zero()) == U64::from(1) { "success" } else { "failed" };
+    let gas_used = receipt.gas_used.unwrap_or(U256::zero()).as_u64();
+    let block_num = receipt.block_number.unwrap_or(U64::zero()).as_u64();
+
+    emit_log("INFO", format!("✅ TX подтверждена: {:?} (статус: {})", tx_hash, status));
+
+    emit_event(EngineEvent::TxConfirmed {
+        tx_hash: format!("{:?}", tx_hash),
+        wallet: format!("{:?}", receipt.from),
+        gas_used,
+        status: status.to_string(),
+        confirm_block: block_num,
+        timestamp_ms: current_timestamp_ms()
+    });
+
+    CORE_STATE.write().unwrap().pending_txs.remove(&tx_hash);
+}
+
 fn wei_to_float(wei_value: U256, decimals: u8) -> f64 {
     if wei_value.is_zero() { return 0.0; }
     let safe_decimals = decimals.min(77) as i32;
@@ -121,16 +232,18 @@ async fn prefetch_all_data(
         emit_log("DEBUG", format!("⚡ Prefetch: Gas price = {} Gwei", gas.as_u64() / 1_000_000_000));
     }
     
-    let mut native_balance_tasks = Vec::new();
-    for wallet in wallets.clone() {
-        let p = provider.clone();
-        native_balance_tasks.push(async move {
-            let balance = p.get_balance(wallet, None).await.ok()?;
-            Some((wallet, balance))
-        });
-    }
-    
-    let native_results = futures::future::join_all(native_balance_tasks).await;
+    // Нативные балансы - одним JSON-RPC batch (rpc_batch склеивает eth_getBalance к одному узлу)
+    let read_url = { RPC_POOL.read().unwrap().next_read_node() };
+    let native_results: Vec<Option<(Address, U256)>> = match read_url.as_deref() {
+        Some(url) => futures::future::join_all(wallets.iter().map(|w| async move {
+            Some((*w, rpc_batch::get_balance(url, *w).await?))
+        })).await,
+        None => futures::future::join_all(wallets.iter().map(|w| {
+            let p = provider.clone();
+            let w = *w;
+            async move { Some((w, p.get_balance(w, None).await.ok()?)) }
+        })).await,
+    };
     for result in native_results {
         if let Some((wallet, balance)) = result {
             let float_val = wei_to_float(balance, 18);
@@ -146,10 +259,16 @@ async fn prefetch_all_data(
     
     if let Some(quote_addr) = quote_token {
         if quote_addr != Address::zero() {
-            let quote_decimals = get_decimals_cached(quote_addr).await;
-            for wallet in wallets.clone() {
-                let contract = UniversalABI::new(quote_addr, provider.clone());
-                if let Ok(balance) = contract.balance_of(wallet).call().await {
+            // Все кошельки одной пачкой через батчер balanceOf (один Multicall3 вызов),
+            // decimals - параллельно с балансами, а не перед ними
+            let (quote_decimals, balances) = tokio::join!(
+                get_decimals_cached(quote_addr),
+                futures::future::join_all(
+                    wallets.iter().map(|w| execution::get_token_balance_opt(quote_addr, *w))
+                )
+            );
+            for (wallet, balance) in wallets.iter().copied().zip(balances) {
+                if let Some(balance) = balance {
                     let float_val = wei_to_float(balance, quote_decimals);
                     emit_event(EngineEvent::BalanceUpdate {
                         wallet: format!("{:?}", wallet),
@@ -168,8 +287,7 @@ async fn prefetch_all_data(
             let s = CORE_STATE.read().unwrap();
             get_quote_price_usd(&s.quote_symbol, &s.usd_prices)
         };
-        let t_dec = get_decimals_cached(token).await;
-        let q_dec = get_decimals_cached(quote).await;
+        let (t_dec, q_dec) = tokio::join!(get_decimals_cached(token), get_decimals_cached(quote));
         let (t0, _) = if token < quote { (token, quote) } else { (quote, token) };
         let t0_is_quote = t0 == quote;
         let mut candidates = Vec::new();
@@ -182,6 +300,7 @@ async fn prefetch_all_data(
                 let (d0, d1) = if t0_is_quote { (q_dec, t_dec) } else { (t_dec, q_dec) };
                 let (liq, prc) = calculate_v2_liquidity_usd_and_price(r0.into(), r1.into(), d0, d1, t0_is_quote, quote_price);
                 CORE_STATE.write().unwrap().v2_reserves.insert(addr, (r0.into(), r1.into()));
+                PNL_WAKEUP.notify_one();
                 candidates.push(PoolCandidate { 
                     address: addr, pool_type: "V2".into(), liquidity_usd: liq, fee_bps: 30, 
                     sqrt_price_x96: None, tick: None, reserves: Some((r0.into(), r1.into())), 
@@ -209,6 +328,7 @@ async fn prefetch_all_data(
                 CORE_STATE.write().unwrap().v3_states.insert(addr, V3PoolState { 
                     liquidity: liq_raw.into(), sqrt_price_x96: sqrt_p, tick, pool_fee: fee 
                 });
+                PNL_WAKEUP.notify_one();
                 candidates.push(PoolCandidate { 
                     address: addr, pool_type: "V3".into(), liquidity_usd: liq, fee_bps: fee, 
                     sqrt_price_x96: Some(sqrt_p), tick: Some(tick), reserves: None, 
@@ -372,8 +492,7 @@ impl WebSocketManager {
     async fn get_http_provider(&self) -> Option<Arc<Provider<Http>>> {
         let urls = { RPC_POOL.read().unwrap().get_fastest_pool(3) };
         for url_str in urls {
-            if let Ok(url) = Url::parse(&url_str) {
-                let provider = Arc::new(Provider::new(Http::new_with_client(url, GLOBAL_HTTP_CLIENT.clone())));
+            if let Some(provider) = http_provider(&url_str) {
                 if timeout(Duration::from_secs(2), provider.get_block_number()).await.is_ok() {
                     return Some(provider);
                 }
@@ -406,7 +525,12 @@ impl WebSocketManager {
                         }
                         
                         match tokio::time::timeout(idle_timeout, block_stream.next()).await {
-                            Ok(Some(_block)) => {
+                            Ok(Some(block)) => {
+                                // Новый блок будит ожидания receipt (pending_txs_task, wait_for_receipt)
+                                if let Some(number) = block.number {
+                                    NEW_HEAD.send_replace(number.as_u64());
+                                }
+                                
                                 if let Ok(gas) = ws_blocks.get_gas_price().await {
                                     CORE_STATE.write().unwrap().gas_price = gas;
                                     emit_event(EngineEvent::GasPriceUpdate {
@@ -414,20 +538,41 @@ impl WebSocketManager {
                                     });
                                 }
                                 
-                                for wallet in wallets_blocks.clone() {
-                                    if let Ok(balance) = ws_balances.get_balance(wallet, None).await {
+                                // Нативные балансы всех кошельков разом: eth_getBalance склеиваются rpc_batch
+                                // в один JSON-RPC batch по HTTP вместо N последовательных запросов по WS.
+                                // Без HTTP узла - те же запросы по WS, но параллельно
+                                let read_url = { RPC_POOL.read().unwrap().next_read_node() };
+                                let native_balances: Vec<Option<U256>> = match read_url.as_deref() {
+                                    Some(url) => futures::future::join_all(
+                                        wallets_blocks.iter().map(|w| rpc_batch::get_balance(url, *w))
+                                    ).await,
+                                    None => futures::future::join_all(
+                                        wallets_blocks.iter().map(|w| {
+                                            let ws = ws_balances.clone();
+                                            let w = *w;
+                                            async move { ws.get_balance(w, None).await.ok() }
+                                        })
+                                    ).await,
+                                };
+                                
+                                for (wallet, balance) in wallets_blocks.iter().copied().zip(native_balances) {
+                                    if let Some(balance) = balance {
                                         let float_val = wei_to_float(balance, 18);
                                         
                                         let fuel_job = {
                                             let s = CORE_STATE.read().unwrap();
                                             if s.fuel_enabled && balance < s.fuel_threshold && s.fuel_quote_address != Address::zero() {
-                                                // Проверяем лимит попыток (максимум 5, не чаще раза в 60 сек)
-                                                let now = current_timestamp_ms();
-                                                let (attempts, last_ts) = s.auto_fuel_attempts.get(&wallet).unwrap_or(&(0, 0));
+                                                // Проверяем лимит попыток (максимум 5, не чаще раза в 60 сек).
+                                                // Хранится момент следующей разрешённой попытки по монотонным часам - без вычитаний
+                                                // и без сюрпризов при переводе системного времени
+                                                let allowed = match s.auto_fuel_attempts.get(&wallet) {
+                                                    Some((attempts, retry_at)) => *attempts < AUTO_FUEL_MAX_ATTEMPTS && *retry_at <= Instant::now(),
+                                                    None => true,
+                                                };
                                                 
-                                                if *attempts < 5 && (now - last_ts) > 60000 {
-                                                    s.wallet_keys.get(&wallet).map(|pk| {
-                                                        (pk.clone(), wallet, s.router_address, s.fuel_quote_address, s.fuel_amount, s.chain_id)
+                                                if allowed {
+                                                    s.wallet_signers.get(&wallet).map(|signer| {
+                                                        (signer.clone(), wallet, s.router_address, s.fuel_quote_address, s.fuel_amount)
                                                     })
                                                 } else {
                                                     None
@@ -435,21 +580,21 @@ impl WebSocketManager {
                                             } else { None }
                                         };
                                         
-                                        if let Some((pk, w, r, q, a, cid)) = fuel_job { 
+                                        if let Some((signer, w, r, q, a)) = fuel_job { 
                                             // Увеличиваем счётчик попыток перед вызовом
-                                            let new_count = {
-                                                let s = CORE_STATE.read().unwrap();
-                                                let (count, _) = s.auto_fuel_attempts.get(&w).unwrap_or(&(0, 0));
-                                                count + 1
-                                            };
-                                            CORE_STATE.write().unwrap().auto_fuel_attempts.insert(w, (new_count, current_timestamp_ms()));
+                                            {
+                                                let retry_at = Instant::now() + Duration::from_secs(AUTO_FUEL_RETRY_SECS);
+                                                let mut s = CORE_STATE.write().unwrap();
+                                                let entry = s.auto_fuel_attempts.entry(w).or_insert((0, retry_at));
+                                                *entry = (entry.0 + 1, retry_at);
+                                            }
                                             
                                             // Вызываем auto_fuel
-                                            let success = execution::run_auto_fuel(pk, w, r, q, a, cid).await;
+                                            let success = execution::run_auto_fuel(signer, w, r, q, a).await;
                                             
                                             // При успехе сбрасываем счётчик
                                             if success {
-                                                CORE_STATE.write().unwrap().auto_fuel_attempts.insert(w, (0, 0));
+                                                CORE_STATE.write().unwrap().auto_fuel_attempts.remove(&w);
                                             }
                                         }
                                         
@@ -473,84 +618,94 @@ impl WebSocketManager {
         });
 
         let ws_transfers = ws.clone();
-        let wallets_transfers = wallets.clone();
+        // Множество для проверки принадлежности кошелька за O(1) на каждый лог
+        let wallets_transfers: HashSet<Address> = wallets.iter().copied().collect();
         let quote_transfers = quote_token;
         let target_token_addr_transfer = target_token;
         
         let transfers_task = tokio::spawn(async move {
+            let refresh_permits = Arc::new(tokio::sync::Semaphore::new(TRANSFER_REFRESH_CONCURRENCY));
             // Отслеживание target_token, чтобы видеть приход монет
             let mut all_addresses: Vec<Address> = vec![target_token_addr_transfer];
             if quote_transfers != Address::zero() {
                 all_addresses.push(quote_transfers);
             }
             
-            let filter = Filter::new()
-                .event("Transfer(address,address,uint256)")
-                .address(all_addresses);
-                
-            match ws_transfers.subscribe_logs(&filter).await {
-                Ok(mut transfer_stream) => {
-                    emit_log("INFO", "📡 Подписка на Transfer события активна".into());
-                    
-                    while let Some(log) = transfer_stream.next().await {
-                        if SHUTDOWN_FLAG.load(std::sync::atomic::Ordering::Relaxed) {
-                            return DisconnectReason::Shutdown;
-                        }
-                        
-                        let raw = log.clone().into();
-                        if let Ok(transfer) = <TransferFilter as EthEvent>::decode_log(&raw) {
-                            let is_incoming = wallets_transfers.contains(&transfer.to);
-                            let is_outgoing = wallets_transfers.contains(&transfer.from);
-                            
-                            if is_incoming || is_outgoing {
-                                let ws_clone = ws_transfers.clone();
-                                let addr = log.address;
-                                
-                                if is_incoming {
-                                    let to_addr = transfer.to;
-                                    let ws_inner = ws_clone.clone();
-                                    tokio::spawn(async move {
-                                        let decimals = get_decimals_cached(addr).await;
-                                        let contract = UniversalABI::new(addr, ws_inner);
-                                        if let Ok(new_balance) = contract.balance_of(to_addr).call().await {
-                                            let float_val = wei_to_float(new_balance, decimals);
-                                            emit_event(EngineEvent::BalanceUpdate {
-                                                wallet: format!("{:?}", to_addr),
-                                                token: format!("{:?}", addr),
-                                                wei: new_balance.to_string(),
-                                                float_val,
-                                                symbol: "TOKEN".into()
-                                            });
-                                        }
-                                    });
-                                }
-                                
-                                if is_outgoing {
-                                    let from_addr = transfer.from;
-                                    let ws_inner = ws_clone.clone();
-                                    tokio::spawn(async move {
-                                        let decimals = get_decimals_cached(addr).await;
-                                        let contract = UniversalABI::new(addr, ws_inner);
-                                        if let Ok(new_balance) = contract.balance_of(from_addr).call().await {
-                                            let new_float = wei_to_float(new_balance, decimals);
-                                            emit_event(EngineEvent::BalanceUpdate {
-                                                wallet: format!("{:?}", from_addr),
-                                                token: format!("{:?}", addr),
-                                                wei: new_balance.to_string(),
-                                                float_val: new_float,
-                                                symbol: "TOKEN".into()
-                                            });
-                                        }
-                                    });
-                                }
-                            }
-                        }
+            // Кошельки фильтруются на стороне узла по indexed-топикам: приходят только трансферы
+            // с участием наших кошельков, а не весь поток Transfer активного токена.
+            // OR между позициями топиков фильтр не умеет - входящие и исходящие идут двумя подписками
+            if wallets_transfers.is_empty() {
+                loop {
+                    if SHUTDOWN_FLAG.load(std::sync::atomic::Ordering::Relaxed) {
+                        return DisconnectReason::Shutdown;
                     }
-                    
-                    DisconnectReason::StreamEnded("transfers".into())
+                    sleep(Duration::from_secs(60)).await;
+                }
+            }
+            let wallet_topics: Topic = ValueOrArray::Array(
+                wallets_transfers.iter().map(|w| Some(H256::from(*w))).collect()
+            );
+            let base_filter = Filter::new()
+                .address(all_addresses)
+                .topic0(TRANSFER_TOPIC);
+            let incoming_filter = base_filter.clone().topic2(wallet_topics.clone());
+            let outgoing_filter = base_filter.topic1(wallet_topics);
+            
+            let incoming_stream = match ws_transfers.subscribe_logs(&incoming_filter).await {
+                Ok(stream) => stream,
+                Err(e) => return DisconnectReason::Error(format!("subscribe_logs(Transfer in): {:?}", e)),
+            };
+            let outgoing_stream = match ws_transfers.subscribe_logs(&outgoing_filter).await {
+                Ok(stream) => stream,
+                Err(e) => return DisconnectReason::Error(format!("subscribe_logs(Transfer out): {:?}", e)),
+            };
+            
+            emit_log("INFO", "📡 Подписка на Transfer события активна".into());
+            
+            // Перевод между двумя нашими кошельками придёт в обе подписки - каждая обновляет только свою сторону
+            let mut transfer_stream = futures::stream::select(
+                incoming_stream.map(|log| (true, log)),
+                outgoing_stream.map(|log| (false, log)),
+            );
+            
+            while let Some((is_incoming, log)) = transfer_stream.next().await {
+                if SHUTDOWN_FLAG.load(std::sync::atomic::Ordering::Relaxed) {
+                    return DisconnectReason::Shutdown;
+                }
+                
+                // Адрес кошелька берётся прямо из indexed-топика: без клона лога и ABI-декодирования
+                if log.topics.len() != 3 {
+                    continue;
+                }
+                let wallet = Address::from(log.topics[if is_incoming { 2 } else { 1 }]);
+                if !wallets_transfers.contains(&wallet) {
+                    continue;
                 }
-                Err(e) => DisconnectReason::Error(format!("subscribe_logs(Transfer): {:?}", e))
+                let addr = log.address;
+                
+                // balanceOf через батчер: трансферы одного блока уходят одним Multicall3.
+                // Число одновременных обновлений ограничено семафором - всплеск трансферов не плодит сотни задач
+                let permits = refresh_permits.clone();
+                tokio::spawn(async move {
+                    let _permit = permits.acquire_owned().await;
+                    let (decimals, balance) = tokio::join!(
+                        get_decimals_cached(addr),
+                        execution::get_token_balance_opt(addr, wallet)
+                    );
+                    if let Some(new_balance) = balance {
+                        let float_val = wei_to_float(new_balance, decimals);
+                        emit_event(EngineEvent::BalanceUpdate {
+                            wallet: format!("{:?}", wallet),
+                            token: format!("{:?}", addr),
+                            wei: new_balance.to_string(),
+                            float_val,
+                            symbol: "TOKEN".into()
+                        });
+                    }
+                });
             }
+            
+            DisconnectReason::StreamEnded("transfers".into())
         });
 
         let ws_pools = ws.clone();
@@ -567,11 +722,19 @@ impl WebSocketManager {
                 }
             }
             
-            let t_dec = get_decimals_cached(target_token_addr).await;
-            let q_dec = get_decimals_cached(quote_token).await;
+            let (t_dec, q_dec) = tokio::join!(
+                get_decimals_cached(target_token_addr),
+                get_decimals_cached(quote_token)
+            );
             let (t0, _) = if target_token_addr < quote_token { (target_token_addr, quote_token) } else { (quote_token, target_token_addr) };
             let t0_is_quote = t0 == quote_token;
             
+            // Строковые адреса для PoolUpdate форматируются один раз на подписку, а не на каждое событие.
+            // Пул события ищется по индексу в pools_list: сравнение 20-байтных адресов, пулов единицы
+            let token_str = format!("{:?}", target_token_addr);
+            let quote_str = format!("{:?}", quote_token);
+            let pool_strs: Vec<String> = pools_list.iter().map(|a| format!("{:?}", a)).collect();
+            
             let filter = Filter::new().address(pools_list.clone());
             match ws_pools.subscribe_logs(&filter).await {
                 Ok(mut pool_stream) => {
@@ -582,34 +745,50 @@ impl WebSocketManager {
                             return DisconnectReason::Shutdown;
                         }
                         
-                        let raw = log.clone().into();
+                        // Тип события определяется по topic0, лог декодируется один раз и без клона
+                        let topic0 = match log.topics.first() {
+                            Some(t) => *t,
+                            None => continue,
+                        };
+                        let is_sync = topic0 == SYNC_TOPIC;
+                        if !is_sync && topic0 != SWAP_V3_TOPIC {
+                            continue;
+                        }
+                        let pool_addr = log.address;
+                        let pool_idx = match pools_list.iter().position(|a| *a == pool_addr) {
+                            Some(i) => i,
+                            None => continue,
+                        };
+                        let raw: RawLog = log.into();
                         
                         let quote_price_usd = {
                             let s = CORE_STATE.read().unwrap();
                             get_quote_price_usd(&s.quote_symbol, &s.usd_prices)
                         };
 
-                        if let Ok(sync) = <SyncFilter as EthEvent>::decode_log(&raw) {
-                            CORE_STATE.write().unwrap().v2_reserves.insert(log.address, (sync.reserve_0.into(), sync.reserve_1.into()));
-                            
+                        let sync = if is_sync { <SyncFilter as EthEvent>::decode_log(&raw).ok() } else { None };
+                        if let Some(sync) = sync {
                             let (liq_usd, price) = calculate_v2_liquidity_usd_and_price(
                                 sync.reserve_0.into(), sync.reserve_1.into(), 
                                 t_dec, q_dec, t0_is_quote, quote_price_usd 
                             );
                             
+                            // Резервы и цена выбранного пула - под одной блокировкой записи
                             {
                                 let mut s = CORE_STATE.write().unwrap();
-                                if s.selected_pool_address == Some(log.address) {
+                                s.v2_reserves.insert(pool_addr, (sync.reserve_0.into(), sync.reserve_1.into()));
+                                if s.selected_pool_address == Some(pool_addr) {
                                     s.selected_pool_spot_price = price;
                                     s.selected_pool_liquidity_usd = liq_usd;
                                 }
                             }
+                            PNL_WAKEUP.notify_one();
 
                             emit_event(EngineEvent::PoolUpdate {
-                                pool_address: format!("{:?}", log.address),
+                                pool_address: pool_strs[pool_idx].clone(),
                                 pool_type: "V2".into(),
-                                token: format!("{:?}", target_token_addr),
-                                quote: format!("{:?}", quote_token),
+                                token: token_str.clone(),
+                                quote: quote_str.clone(),
                                 reserve0: Some(sync.reserve_0.to_string()),
                                 reserve1: Some(sync.reserve_1.to_string()),
                                 sqrt_price_x96: None,
@@ -620,12 +799,14 @@ impl WebSocketManager {
                             });
                         }
                         
-                        if let Ok(swap) = <SwapFilter as EthEvent>::decode_log(&raw) {
+                        let swap = if is_sync { None } else { <SwapFilter as EthEvent>::decode_log(&raw).ok() };
+                        if let Some(swap) = swap {
                             let mut s = CORE_STATE.write().unwrap();
-                            if let Some(pool) = s.v3_states.get_mut(&log.address) {
+                            if let Some(pool) = s.v3_states.get_mut(&pool_addr) {
                                 pool.sqrt_price_x96 = swap.sqrt_price_x96;
                                 pool.liquidity = swap.liquidity.into();
                                 pool.tick = swap.tick;
+                                PNL_WAKEUP.notify_one();
                             }
                             
                             let (liq_usd, price) = calculate_v3_liquidity_usd_and_price(
@@ -633,16 +814,16 @@ impl WebSocketManager {
                                 t_dec, q_dec, t0_is_quote, quote_price_usd
                             );
 
-                            if s.selected_pool_address == Some(log.address) {
+                            if s.selected_pool_address == Some(pool_addr) {
                                 s.selected_pool_spot_price = price;
                                 s.selected_pool_liquidity_usd = liq_usd;
                             }
 
                             emit_event(EngineEvent::PoolUpdate {
-                                pool_address: format!("{:?}", log.address),
+                                pool_address: pool_strs[pool_idx].clone(),
                                 pool_type: "V3".into(),
-                                token: format!("{:?}", target_token_addr),
-                                quote: format!("{:?}", quote_token),
+                                token: token_str.clone(),
+                                quote: quote_str.clone(),
                                 reserve0: None,
                                 reserve1: None,
                                 sqrt_price_x96: Some(swap.sqrt_price_x96.to_string()),
@@ -664,50 +845,101 @@ impl WebSocketManager {
         
         let pending_txs_task = tokio::spawn(async move {
             emit_log("INFO", "📡 Подписка на pending transactions активна".into());
-            let mut check_interval = interval(Duration::from_millis(500));
+            let mut check_interval = interval(Duration::from_millis(RECEIPT_TICK_MS));
+            let mut schedule: HashMap<H256, ReceiptPoll> = HashMap::new();
+            // Новый блок из подписки newHeads будит опрос receipt (receipt появляется только с блоком)
+            let mut heads = NEW_HEAD.subscribe();
             
             loop {
-                check_interval.tick().await;
+                let head_arrived = tokio::select! {
+                    _ = heads.changed() => true,
+                    _ = check_interval.tick() => false,
+                };
                 
                 if SHUTDOWN_FLAG.load(std::sync::atomic::Ordering::Relaxed) {
                     return DisconnectReason::Shutdown;
                 }
                 
-                let txs_to_check: Vec<H256> = {
+                let pending: Vec<H256> = {
                     CORE_STATE.read().unwrap().pending_txs.iter().cloned().collect()
                 };
                 
+                if pending.is_empty() {
+                    schedule.clear();
+                    continue;
+                }
+                
+                // Новые tx опрашиваются сразу и часто, долго висящие — всё реже (до RECEIPT_MAX_INTERVAL_MS)
+                let now = Instant::now();
+                schedule.retain(|h, _| pending.contains(h));
+                let mut expired = Vec::new();
+                let mut txs_to_check = Vec::new();
+                for h in &pending {
+                    let poll = schedule.entry(*h).or_insert_with(|| ReceiptPoll::new(now));
+                    // TX без receipt дольше PENDING_TX_TIMEOUT_SECS перестаём опрашивать
+                    if now.duration_since(poll.first_seen) > Duration::from_secs(PENDING_TX_TIMEOUT_SECS) {
+                        expired.push(*h);
+                    } else if head_arrived || poll.next_check <= now {
+                        txs_to_check.push(*h);
+                    }
+                }
+                if !expired.is_empty() {
+                    let mut state = CORE_STATE.write().unwrap();
+                    for h in &expired {
+                        state.pending_txs.remove(h);
+                        schedule.remove(h);
+                    }
+                    drop(state);
+                    for h in &expired {
+                        emit_log("WARNING", format!("⏱ Receipt для {:?} не получен за {}s, отслеживание прекращено", h, PENDING_TX_TIMEOUT_SECS));
+                        // Терминальный статус, чтобы UI снял TX из трекера
+                        emit_event(EngineEvent::TxConfirmed {
+                            tx_hash: format!("{:?}", h),
+                            wallet: String::new(),
+                            gas_used: 0,
+                            status: "timeout".to_string(),
+                            confirm_block: 0,
+                            timestamp_ms: current_timestamp_ms()
+                        });
+                    }
+                }
                 if txs_to_check.is_empty() {
                     continue;
                 }
                 
-                for tx_hash in txs_to_check {
-                    match ws_pending.get_transaction_receipt(tx_hash).await {
-                        Ok(Some(receipt)) => {
-                            let status = if receipt.status.unwrap_or(U64::zero()) == U64::from(1) { "success" } else { "failed" };
-                            let gas_used = receipt.gas_used.unwrap_or(U256::zero()).as_u64();
-                            let block_num = receipt.block_number.unwrap_or(U64::zero()).as_u64();
-                            let from_addr = receipt.from;
-                            
-                            emit_log("INFO", format!("✅ TX подтверждена: {:?} (статус: {})", tx_hash, status));
-                            
-                            emit_event(EngineEvent::TxConfirmed {
-                                tx_hash: format!("{:?}", tx_hash),
-                                wallet: format!("{:?}", from_addr),
-                                gas_used,
-                                status: status.to_string(),
-                                confirm_block: block_num,
-                                timestamp_ms: current_timestamp_ms()
-                            });
-                            
-                            CORE_STATE.write().unwrap().pending_txs.remove(&tx_hash);
+                // Receipt-запросы склеиваются rpc_batch в один HTTP batch к самому быстрому узлу
+                let url_opt = { let p = RPC_POOL.read().unwrap(); p.get_fastest_node() };
+                if let Some(url) = url_opt {
+                    let receipts = futures::future::join_all(
+                        txs_to_check.iter().map(|h| rpc_batch::get_transaction_receipt(&url, *h))
+                    ).await;
+                    for (tx_hash, receipt) in txs_to_check.iter().zip(receipts) {
+                        if let Some(receipt) = receipt {
+                            handle_receipt(*tx_hash, &receipt);
+                            schedule.remove(tx_hash);
                         }
-                        Ok(None) => {}
-                        Err(e) => {
-                            emit_log("WARNING", format!("Ошибка проверки receipt {:?}: {:?}", tx_hash, e));
+                    }
+                } else {
+                    for tx_hash in &txs_to_check {
+                        match ws_pending.get_transaction_receipt(*tx_hash).await {
+                            Ok(Some(receipt)) => {
+                                handle_receipt(*tx_hash, &receipt);
+                                schedule.remove(tx_hash);
+                            }
+                            Ok(None) => {}
+                            Err(e) => {
+                                emit_log("WARNING", format!("Ошибка проверки receipt {:?}: {:?}", tx_hash, e));
+                            }
                         }
                     }
                 }
+                
+                let now = Instant::now();
+                for h in &txs_to_check {
+                    if let Some(poll) = schedule.get_mut(h) {
+                        poll.backoff(now);
+                    }
+                }
             }
         });
 
@@ -819,6 +1051,9 @@ fn select_best_pool(mut candidates: Vec<PoolCandidate>, trade_amount_usd: f64) -
 
 // ===================== PUBLIC API =====================
 
+/// Fee tiers V3, по которым ищутся пулы
+const V3_FEE_TIERS: [u32; 4] = [100, 500, 2500, 10000];
+
 pub async fn discover_pools(token: Address, quote: Address) -> Vec<Address> {
     let mut targets = vec![token];
     let (v2_f, v3_f) = { let s = CORE_STATE.read().unwrap(); (s.v2_factory_address, s.v3_factory_address) };
@@ -830,65 +1065,90 @@ pub async fn discover_pools(token: Address, quote: Address) -> Vec<Address> {
         emit_log("DEBUG", format!("  RPC[{}]: {}...", i, &url[..50.min(url.len())]));
     }
     
-    let provider_http = {
-        let mut result = None;
-        for url in rpc_urls {
-            if let Ok(u) = Url::parse(&url) {
-                let p = Arc::new(Provider::new(Http::new_with_client(u, GLOBAL_HTTP_CLIENT.clone())));
-                match timeout(Duration::from_secs(3), p.get_block_number()).await {
-                    Ok(_) => {
-                        emit_log("DEBUG", format!("RPC OK: {}", &url[..50.min(url.len())]));
-                        result = Some(p);
-                        break;
-                    }
-                    Err(_) => {
-                        emit_log("WARNING", format!("RPC TIMEOUT: {}", &url[..50.min(url.len())]));
-                    }
-                }
-            }
-        }
-        result
-    }; 
-    
-    let p = if let Some(provider) = provider_http { 
-        emit_log("DEBUG", "Provider selected successfully".to_string());
-        provider 
-    } else { 
+    // Провайдеры - из общего кэша по URL (их keep-alive соединения держит rpc_health_checker).
+    // Отдельный get_block_number перед поиском не нужен: узел проверяется самим запросом пулов
+    let providers: Vec<(String, Arc<Provider<Http>>)> = rpc_urls.into_iter()
+        .filter_map(|url| http_provider(&url).map(|p| (url, p)))
+        .collect();
+    if providers.is_empty() {
         emit_log("ERROR", "NO PROVIDER - all RPCs failed!".to_string());
-        return targets; 
-    };
+        return targets;
+    }
     
-    // === V2 ===
+    // getPair (V2) и getPool по всем fee (V3) собираются в один список вызовов:
+    // None - V2 пара, Some(fee) - V3 пул
     emit_log("DEBUG", format!("V2 factory: {:?}", v2_f));
+    let mut calls: Vec<(Address, Bytes)> = Vec::with_capacity(1 + V3_FEE_TIERS.len());
+    let mut kinds: Vec<Option<u32>> = Vec::with_capacity(1 + V3_FEE_TIERS.len());
     if v2_f != Address::zero() {
-        let f = UniversalABI::new(v2_f, p.clone());
-        match f.get_pair(token, quote).call().await {
-            Ok(pair) => {
-                emit_log("DEBUG", format!("get_pair result: {:?}", pair));
-                if pair != Address::zero() { targets.push(pair); }
+        calls.push((v2_f, execution::encode_address_call(SEL_GET_PAIR, &[token, quote])));
+        kinds.push(None);
+    }
+    if v3_f != Address::zero() {
+        for fee in V3_FEE_TIERS {
+            let mut data = execution::encode_address_call(SEL_GET_POOL, &[token, quote]).to_vec();
+            data.extend_from_slice(H256::from_low_u64_be(fee as u64).as_bytes());
+            calls.push((v3_f, Bytes::from(data)));
+            kinds.push(Some(fee));
+        }
+    }
+    
+    // Один eth_call в Multicall3 вместо 5 последовательных; без Multicall3 - вызовы по одному, параллельно.
+    // Не ответивший за 3s узел пропускается, запрос уходит на следующий по скорости
+    let mut found_results = None;
+    for (url, p) in providers.iter() {
+        match timeout(Duration::from_secs(3), execution::multicall3(p, calls.clone())).await {
+            Ok(Some(r)) => {
+                found_results = Some(r);
+                break;
+            }
+            Ok(None) => {
+                emit_log("DEBUG", "discover_pools: Multicall3 недоступен, getPair/getPool по одному".to_string());
+                found_results = Some(futures::future::join_all(calls.iter().map(|(to, data)| {
+                    let tx: ethers::types::transaction::eip2718::TypedTransaction =
+                        TransactionRequest::new().to(*to).data(data.clone()).into();
+                    let p = p.clone();
+                    async move { p.call(&tx, None).await.ok() }
+                })).await);
+                break;
             }
-            Err(e) => {
-                emit_log("ERROR", format!("get_pair error: {:?}", e));
+            Err(_) => {
+                emit_log("WARNING", format!("RPC TIMEOUT: {}", &url[..50.min(url.len())]));
             }
         }
     }
+    let results = match found_results {
+        Some(r) => r,
+        None => {
+            emit_log("ERROR", "NO PROVIDER - all RPCs failed!".to_string());
+            return targets;
+        }
+    };
     
-    // === V3 ===
-    if v3_f != Address::zero() {
-        let f = UniversalABI::new(v3_f, p.clone());
-        for fee in [100, 500, 2500, 10000] {
-            match f.get_pool(token, quote, fee).call().await {
-                Ok(pool) => {
-                    if pool != Address::zero() { 
-                        emit_log("DEBUG", format!("V3 pool found: fee={}, addr={:?}", fee, pool));
-                        targets.push(pool); 
-                        CORE_STATE.write().unwrap().v3_states.insert(pool, V3PoolState { 
-                            pool_fee: fee, ..Default::default() 
-                        });
-                    }
+    for (kind, ret) in kinds.into_iter().zip(results) {
+        // Возвращаемый address - последние 20 байт первого 32-байтного слова
+        let addr = match ret {
+            Some(ret) if ret.len() >= 32 => Address::from_slice(&ret[12..32]),
+            _ => {
+                match kind {
+                    None => emit_log("ERROR", "get_pair error: вызов не выполнен".to_string()),
+                    Some(fee) => emit_log("DEBUG", format!("V3 fee {} error: вызов не выполнен", fee)),
                 }
-                Err(e) => {
-                    emit_log("DEBUG", format!("V3 fee {} error: {:?}", fee, e));
+                continue;
+            }
+        };
+        match kind {
+            None => {
+                emit_log("DEBUG", format!("get_pair result: {:?}", addr));
+                if addr != Address::zero() { targets.push(addr); }
+            }
+            Some(fee) => {
+                if addr != Address::zero() {
+                    emit_log("DEBUG", format!("V3 pool found: fee={}, addr={:?}", fee, addr));
+                    targets.push(addr);
+                    CORE_STATE.write().unwrap().v3_states.insert(addr, V3PoolState {
+                        pool_fee: fee, ..Default::default()
+                    });
                 }
             }
         }
@@ -921,14 +1181,15 @@ pub async fn start_unified_websocket_monitor(
     // Пулов нет для выбранного - ищем по другим quote
     emit_log("WARNING", "⚠️ Пулы не найдены для выбранного quote".to_string());
     
-    let mut found_quotes: Vec<(String, Address)> = vec![];
-    for (sym, q_addr) in all_quotes.iter() {
-        if *q_addr == quote { continue; }
-        let pools = discover_pools(token, *q_addr).await;
-        if pools.len() > 1 {
-            found_quotes.push((sym.clone(), *q_addr));
-        }
-    }
+    // Остальные quote проверяются параллельно: по одному multicall на quote
+    let other_quotes: Vec<&(String, Address)> = all_quotes.iter().filter(|(_, q)| *q != quote).collect();
+    let discovered = futures::future::join_all(
+        other_quotes.iter().map(|(_, q_addr)| discover_pools(token, *q_addr))
+    ).await;
+    let found_quotes: Vec<(String, Address)> = other_quotes.into_iter().zip(discovered)
+        .filter(|(_, pools)| pools.len() > 1)
+        .map(|((sym, q_addr), _)| (sym.clone(), *q_addr))
+        .collect();
     
     if found_quotes.is_empty() {
         emit_log("ERROR", "❌ Пулы не найдены ни для одного quote токена".to_string());
@@ -951,23 +1212,42 @@ pub async fn start_unified_websocket_monitor(
 }
 
 pub async fn rpc_health_checker(urls: Vec<String>) {
-    let mut check_interval = interval(Duration::from_secs(10));
+    let mut check_interval = interval(Duration::from_secs(5));
     
     loop {
         check_interval.tick().await;
         if SHUTDOWN_FLAG.load(std::sync::atomic::Ordering::Relaxed) { break; }
         
-        for url_str in &urls {
+        // Все узлы опрашиваем параллельно: раунд длится не дольше самого медленного таймаута
+        let probes = urls.iter().map(|url_str| async move {
             let start = Instant::now();
-            if let Ok(url) = Url::parse(url_str) {
-                let provider = Provider::new(Http::new_with_client(url, GLOBAL_HTTP_CLIENT.clone()));
-                if timeout(Duration::from_secs(2), provider.get_block_number()).await.is_ok() {
-                    RPC_POOL.write().unwrap().update_latency(url_str, start.elapsed().as_micros());
-                } else { 
-                    RPC_POOL.write().unwrap().mark_fail(url_str); 
+            let provider = http_provider(url_str)?;
+            match timeout(Duration::from_secs(2), provider.get_block_number()).await {
+                Ok(Ok(_)) => Some(start.elapsed().as_micros()),
+                _ => None,
+            }
+        });
+        let results = futures::future::join_all(probes).await;
+        
+        let mut best_latency: Option<u128> = None;
+        {
+            let mut pool = RPC_POOL.write().unwrap();
+            for (url_str, res) in urls.iter().zip(results) {
+                match res {
+                    Some(latency) => {
+                        pool.update_latency(url_str, latency);
+                        best_latency = Some(best_latency.map_or(latency, |b| b.min(latency)));
+                    }
+                    None => pool.mark_fail(url_str),
                 }
             }
         }
+        
+        // Пушим статус в Python — UI больше не опрашивает RPC сам
+        emit_event(EngineEvent::RPCStatus {
+            healthy: best_latency.is_some(),
+            latency_ms: best_latency.map(|l| (l / 1000) as u64).unwrap_or(0),
+        });
     }
 }
 
@@ -978,38 +1258,45 @@ pub async fn start_background_worker(_wss_url: String) {
         if SHUTDOWN_FLAG.load(std::sync::atomic::Ordering::Relaxed) { break; }
         
         let wallets: Vec<Address> = TRACKED_WALLETS.read().unwrap().clone();
-        let url_opt = { let p = RPC_POOL.read().unwrap(); p.get_fastest_node() };
+        let url_opt = { let p = RPC_POOL.read().unwrap(); p.next_read_node() };
         let quote_token = { CORE_STATE.read().unwrap().fuel_quote_address };
         
         if let Some(url_str) = url_opt {
-            if let Ok(url) = Url::parse(&url_str) {
-                let provider = Provider::new(Http::new_with_client(url, GLOBAL_HTTP_CLIENT.clone()));
-                
-                for wallet in &wallets {
-                    if let Ok(nonce) = provider.get_transaction_count(*wallet, None).await {
-                        CORE_STATE.write().unwrap().nonce_map.insert(*wallet, nonce.as_u64());
+            // Nonce всех кошельков одним batch-запросом вместо последовательных вызовов
+            let nonces = futures::future::join_all(
+                wallets.iter().map(|w| rpc_batch::get_transaction_count(&url_str, *w))
+            ).await;
+            {
+                let mut state = CORE_STATE.write().unwrap();
+                for (wallet, nonce) in wallets.iter().zip(nonces) {
+                    if let Some(nonce) = nonce {
+                        state.nonce_map.insert(*wallet, nonce.as_u64());
                     }
                 }
-                
-                if last_quote_balance_update.elapsed().as_secs() > 5 {
-                    if quote_token != Address::zero() {
-                        let decimals = get_decimals_cached(quote_token).await;
-                        for wallet in &wallets {
-                            let balance = execution::get_token_balance(quote_token, *wallet).await;
-                            if !balance.is_zero() {
-                                let float_val = wei_to_float(balance, decimals);
-                                emit_event(EngineEvent::BalanceUpdate {
-                                    wallet: format!("{:?}", wallet),
-                                    token: format!("{:?}", quote_token),
-                                    wei: balance.to_string(),
-                                    float_val,
-                                    symbol: "QUOTE".into()
-                                });
-                            }
+            }
+            
+            if last_quote_balance_update.elapsed().as_secs() > 5 {
+                if quote_token != Address::zero() {
+                    let (decimals, balances) = tokio::join!(
+                        get_decimals_cached(quote_token),
+                        futures::future::join_all(
+                            wallets.iter().map(|w| execution::get_token_balance(quote_token, *w))
+                        )
+                    );
+                    for (wallet, balance) in wallets.iter().zip(balances) {
+                        if !balance.is_zero() {
+                            let float_val = wei_to_float(balance, decimals);
+                            emit_event(EngineEvent::BalanceUpdate {
+                                wallet: format!("{:?}", wallet),
+                                token: format!("{:?}", quote_token),
+                                wei: balance.to_string(),
+                                float_val,
+                                symbol: "QUOTE".into()
+                            });
                         }
                     }
-                    last_quote_balance_update = Instant::now();
                 }
+                last_quote_balance_update = Instant::now();
             }
         }
         
@@ -1,9 +1,10 @@
-use crate::state::{CORE_STATE, SHUTDOWN_FLAG};
+use crate::state::{CORE_STATE, SHUTDOWN_FLAG, PNL_WAKEUP};
 use crate::bridge::{emit_event, EngineEvent};
-use tokio::time::{sleep, Duration};
+use tokio::time::{sleep, timeout, Duration};
 use std::sync::atomic::Ordering;
 use ethers::utils::format_units;
-use ethers::types::U256;
+use ethers::types::{Address, U256};
+use std::collections::HashMap;
 
 /// Безопасная конвертация U256 в f64 (работает даже если значение > u128::MAX)
 fn u256_to_f64_safe(val: U256) -> f64 {
@@ -20,7 +21,12 @@ fn u256_to_f64_safe(val: U256) -> f64 {
     val.as_u128() as f64
 }
 
+/// Минимальный интервал между пересчётами: всплеск Sync/Swap схлопывается в один проход
+const PNL_MIN_INTERVAL: Duration = Duration::from_millis(500);
+
 pub async fn start_pnl_worker() {
+    // Цена пула, отправленная в прошлом проходе: неизменившиеся пулы событие повторно не шлют
+    let mut last_prices: HashMap<Address, f64> = HashMap::new();
     loop {
         if SHUTDOWN_FLAG.load(Ordering::SeqCst) { break; }
         
@@ -31,6 +37,7 @@ pub async fn start_pnl_worker() {
 
         // Получаем цену quote токена из usd_prices по динамическому символу
         let quote_price = prices.get(&quote_symbol).cloned().unwrap_or(1.0);
+        let mut current_prices: HashMap<Address, f64> = HashMap::with_capacity(reserves.len() + states.len());
 
         for (pool_addr, (r_token, r_quote)) in reserves {
             if r_token.is_zero() || r_quote.is_zero() { 
@@ -52,6 +59,10 @@ pub async fn start_pnl_worker() {
             }
             
             let final_price = price_in_quote * quote_price;
+            current_prices.insert(pool_addr, final_price);
+            if last_prices.get(&pool_addr) == Some(&final_price) {
+                continue;
+            }
 
             emit_event(EngineEvent::PnLUpdate {
                 wallet: "V2".into(),
@@ -78,6 +89,10 @@ pub async fn start_pnl_worker() {
             }
             
             let final_price = price * quote_price;
+            current_prices.insert(pool_addr, final_price);
+            if last_prices.get(&pool_addr) == Some(&final_price) {
+                continue;
+            }
 
             emit_event(EngineEvent::PnLUpdate {
                 wallet: "V3".into(),
@@ -90,6 +105,15 @@ pub async fn start_pnl_worker() {
             });
         }
         
-        sleep(Duration::from_secs(2)).await;
+        // Пулы, пропавшие из состояния (смена токена), забываются вместе с их ценами
+        last_prices = current_prices;
+        
+        sleep(PNL_MIN_INTERVAL).await;
+
+        // Пересчёт только по сигналу об изменении резервов/цен.
+        // Таймаут нужен лишь для проверки SHUTDOWN_FLAG.
+        while timeout(Duration::from_secs(5), PNL_WAKEUP.notified()).await.is_err() {
+            if SHUTDOWN_FLAG.load(Ordering::SeqCst) { return; }
+        }
     }
 }
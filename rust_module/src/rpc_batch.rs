@@ -0,0 +1,154 @@
+use ethers::prelude::*;
+use once_cell::sync::Lazy;
+use serde::de::DeserializeOwned;
+use serde::{Deserialize, Serialize};
+use serde_json::{json, Value};
+use std::collections::HashMap;
+use std::sync::{Arc, Mutex};
+use std::time::Duration;
+use tokio::sync::{mpsc, oneshot, Semaphore};
+
+use crate::state::{RUNTIME, GLOBAL_HTTP_CLIENT};
+
+// Склейка JSON-RPC: запросы к одному URL, пришедшие в пределах BATCH_DELAY_MS,
+// уходят одним HTTP POST с массивом (не больше BATCH_SIZE), ответы раздаются по id
+const BATCH_DELAY_MS: u64 = 5;
+const BATCH_SIZE: usize = 20;
+// Не больше стольких batch-запросов одновременно в полёте на один URL: при всплеске (сотни кошельков)
+// новые запросы ждут в очереди и уходят более полными пачками, а не заваливают узел параллельными POST
+const MAX_INFLIGHT_BATCHES: usize = 32;
+
+struct PendingRequest {
+    method: &'static str,
+    params: Value,
+    reply: oneshot::Sender<Option<Value>>,
+}
+
+/// Конверт запроса сериализуется напрямую в байты, без промежуточного дерева serde_json::Value
+#[derive(Serialize)]
+struct RpcRequest<'a> {
+    jsonrpc: &'static str,
+    id: usize,
+    method: &'a str,
+    params: &'a Value,
+}
+
+/// Из ответа берутся только id и result, остальные поля конверта не разбираются
+#[derive(Deserialize)]
+struct RpcResponse {
+    id: Option<u64>,
+    #[serde(default)]
+    result: Value,
+}
+
+/// Очередь (и фоновый воркер) на каждый RPC URL
+static BATCH_QUEUES: Lazy<Mutex<HashMap<String, mpsc::UnboundedSender<PendingRequest>>>> = Lazy::new(|| {
+    Mutex::new(HashMap::new())
+});
+
+fn queue_for(url: &str) -> mpsc::UnboundedSender<PendingRequest> {
+    let mut queues = BATCH_QUEUES.lock().unwrap();
+    if let Some(tx) = queues.get(url) {
+        if !tx.is_closed() {
+            return tx.clone();
+        }
+    }
+    let (tx, rx) = mpsc::unbounded_channel();
+    RUNTIME.spawn(batch_worker(url.to_string(), rx));
+    queues.insert(url.to_string(), tx.clone());
+    tx
+}
+
+async fn batch_worker(url: String, mut rx: mpsc::UnboundedReceiver<PendingRequest>) {
+    let inflight = Arc::new(Semaphore::new(MAX_INFLIGHT_BATCHES));
+    while let Some(first) = rx.recv().await {
+        let mut pending = vec![first];
+        let deadline = tokio::time::Instant::now() + Duration::from_millis(BATCH_DELAY_MS);
+        while pending.len() < BATCH_SIZE {
+            match tokio::time::timeout_at(deadline, rx.recv()).await {
+                Ok(Some(req)) => pending.push(req),
+                _ => break,
+            }
+        }
+        let permit = match inflight.clone().acquire_owned().await {
+            Ok(p) => p,
+            Err(_) => break,
+        };
+        let url = url.clone();
+        tokio::spawn(async move {
+            send_batch(url, pending).await;
+            drop(permit);
+        });
+    }
+}
+
+async fn send_batch(url: String, pending: Vec<PendingRequest>) {
+    let body: Vec<RpcRequest> = pending.iter().enumerate()
+        .map(|(i, r)| RpcRequest { jsonrpc: "2.0", id: i, method: r.method, params: &r.params })
+        .collect();
+
+    let mut results: Vec<Option<Value>> = vec![None; pending.len()];
+    let batch_ok = match post_json::<Vec<RpcResponse>, _>(&url, &body).await {
+        Some(items) => {
+            for item in items {
+                let idx = match item.id {
+                    Some(i) if (i as usize) < results.len() => i as usize,
+                    _ => continue,
+                };
+                results[idx] = Some(item.result).filter(|v| !v.is_null());
+            }
+            true
+        }
+        None => false,
+    };
+
+    // Узел не принимает batch - отправляем те же запросы по одному, параллельно
+    if !batch_ok {
+        let singles = body.iter().map(|req| send_single(&url, req));
+        results = futures::future::join_all(singles).await;
+    }
+
+    for (req, result) in pending.into_iter().zip(results) {
+        let _ = req.reply.send(result);
+    }
+}
+
+async fn send_single(url: &str, req: &RpcRequest<'_>) -> Option<Value> {
+    let item: RpcResponse = post_json(url, req).await?;
+    Some(item.result).filter(|v| !v.is_null())
+}
+
+/// POST тела в JSON и разбор ответа из байтов: serde_json::to_vec / from_slice без промежуточных String
+async fn post_json<R: DeserializeOwned, B: Serialize + ?Sized>(url: &str, body: &B) -> Option<R> {
+    let payload = serde_json::to_vec(body).ok()?;
+    let resp = GLOBAL_HTTP_CLIENT.post(url)
+        .header(reqwest::header::CONTENT_TYPE, "application/json")
+        .body(payload)
+        .send().await.ok()?;
+    let bytes = resp.bytes().await.ok()?;
+    serde_json::from_slice(&bytes).ok()
+}
+
+/// JSON-RPC вызов через общую очередь склейки. None - ошибка сети/узла или пустой result.
+pub async fn request<R: DeserializeOwned>(url: &str, method: &'static str, params: Value) -> Option<R> {
+    let (tx, rx) = oneshot::channel();
+    queue_for(url).send(PendingRequest { method, params, reply: tx }).ok()?;
+    let value = rx.await.ok()??;
+    serde_json::from_value(value).ok()
+}
+
+pub async fn get_balance(url: &str, address: Address) -> Option<U256> {
+    request(url, "eth_getBalance", json!([address, "latest"])).await
+}
+
+pub async fn get_transaction_receipt(url: &str, tx_hash: H256) -> Option<TransactionReceipt> {
+    request(url, "eth_getTransactionReceipt", json!([tx_hash])).await
+}
+
+pub async fn get_transaction_count(url: &str, address: Address) -> Option<U256> {
+    request(url, "eth_getTransactionCount", json!([address, "latest"])).await
+}
+
+pub async fn eth_call(url: &str, to: Address, data: Bytes) -> Option<Bytes> {
+    request(url, "eth_call", json!([{ "to": to, "data": data }, "latest"])).await
+}
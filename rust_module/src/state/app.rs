@@ -1,7 +1,9 @@
 use std::collections::HashMap;
 use std::sync::{Arc, RwLock};
+use std::time::Instant;
 use once_cell::sync::Lazy;
 use ethers::types::{Address, U256, H256, H160};
+use ethers::signers::LocalWallet;
 
 #[derive(Clone, Default, Debug)]
 pub struct V3PoolState {
@@ -29,6 +31,9 @@ pub struct BotState {
     
     // Wallets
     pub wallet_keys: HashMap<Address, String>,
+    // Ключи, разобранные один раз при загрузке кошельков (с chain_id сети): вывод публичного ключа
+    // не повторяется на каждую сделку. Пересобирается вместе с wallet_keys, очищается при Shutdown
+    pub wallet_signers: HashMap<Address, LocalWallet>,
     pub nonce_map: HashMap<Address, u64>,
     
     // Prices & Decimals
@@ -46,7 +51,7 @@ pub struct BotState {
     pub fuel_threshold: U256,
     pub fuel_amount: U256,
     pub fuel_quote_address: Address,
-    pub auto_fuel_attempts: HashMap<Address, (u32, u64)>, // (count, last_timestamp_ms)
+    pub auto_fuel_attempts: HashMap<Address, (u32, Instant)>, // (count, не раньше какого момента следующая попытка)
     
     // Quote Symbol - для динамического получения USD цены
     pub quote_symbol: String,
@@ -81,6 +86,7 @@ pub static CORE_STATE: Lazy<Arc<RwLock<BotState>>> = Lazy::new(|| {
         native_address: Address::zero(),
         wrapped_native_address: Address::zero(),
         wallet_keys: HashMap::new(),
+        wallet_signers: HashMap::new(),
         wss_url: String::new(),
         decimals_cache: HashMap::new(),
         v2_reserves: HashMap::new(),
@@ -3,7 +3,7 @@ pub mod app;
 pub mod network;
 pub mod monitor;
 
-pub use runtime::{RUNTIME, GLOBAL_HTTP_CLIENT};
+pub use runtime::{RUNTIME, GLOBAL_HTTP_CLIENT, http_provider};
 pub use app::{CORE_STATE, V3PoolState}; 
 pub use network::{RPC_POOL, RpcNode, SHUTDOWN_FLAG};
-pub use monitor::{TRACKED_WALLETS, MONITOR_HANDLE, INTERNAL_HANDLE, RPC_CHECKER_HANDLE, PNL_HANDLE};
\ No newline at end of file
+pub use monitor::{TRACKED_WALLETS, MONITOR_HANDLE, INTERNAL_HANDLE, RPC_CHECKER_HANDLE, PNL_HANDLE, PNL_WAKEUP, NEW_HEAD};
\ No newline at end of file
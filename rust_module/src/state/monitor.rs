@@ -2,6 +2,7 @@ use std::sync::{Arc, RwLock, Mutex};
 use once_cell::sync::Lazy;
 use ethers::types::Address;
 use tokio::task::AbortHandle;
+use tokio::sync::{Notify, watch};
 
 pub static TRACKED_WALLETS: Lazy<Arc<RwLock<Vec<Address>>>> = Lazy::new(|| Arc::new(RwLock::new(Vec::new())));
 
@@ -15,4 +16,10 @@ pub static INTERNAL_HANDLE: Lazy<Arc<Mutex<Option<AbortHandle>>>> = Lazy::new(||
 pub static RPC_CHECKER_HANDLE: Lazy<Arc<Mutex<Option<AbortHandle>>>> = Lazy::new(|| Arc::new(Mutex::new(None)));
 
 // Хендл для PnL калькулятора
-pub static PNL_HANDLE: Lazy<Arc<Mutex<Option<AbortHandle>>>> = Lazy::new(|| Arc::new(Mutex::new(None)));
\ No newline at end of file
+pub static PNL_HANDLE: Lazy<Arc<Mutex<Option<AbortHandle>>>> = Lazy::new(|| Arc::new(Mutex::new(None)));
+
+// Будит PnL калькулятор при изменении резервов/цен (вместо опроса по таймеру)
+pub static PNL_WAKEUP: Lazy<Notify> = Lazy::new(Notify::new);
+
+// Номер последнего блока из WS-подписки newHeads: ожидающие receipt просыпаются по новому блоку
+pub static NEW_HEAD: Lazy<watch::Sender<u64>> = Lazy::new(|| watch::channel(0).0);
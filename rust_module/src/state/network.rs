@@ -1,6 +1,11 @@
 use std::sync::{Arc, RwLock};
 use once_cell::sync::Lazy;
-use std::sync::atomic::AtomicBool;
+use std::sync::atomic::{AtomicBool, AtomicUsize, Ordering};
+
+// Узлы, отстающие от самого быстрого не больше чем на это (мкс), участвуют в round-robin чтении
+const READ_LATENCY_SLACK_US: u128 = 50_000;
+
+static READ_CURSOR: AtomicUsize = AtomicUsize::new(0);
 
 #[derive(Debug, Clone)]
 pub struct RpcNode {
@@ -43,6 +48,17 @@ impl RpcPoolState {
             .map(|n| n.url.clone())
     }
 
+    /// Узел для read-запросов: по кругу среди здоровых узлов, близких по latency к лучшему,
+    /// чтобы параллельные воркеры не упирались в одно соединение
+    pub fn next_read_node(&self) -> Option<String> {
+        let healthy: Vec<&RpcNode> = self.nodes.iter().filter(|n| n.fails < 3).collect();
+        let best = healthy.iter().map(|n| n.latency).min()?;
+        let limit = best.saturating_mul(2).max(best.saturating_add(READ_LATENCY_SLACK_US));
+        let candidates: Vec<&RpcNode> = healthy.into_iter().filter(|n| n.latency <= limit).collect();
+        let idx = READ_CURSOR.fetch_add(1, Ordering::Relaxed) % candidates.len();
+        Some(candidates[idx].url.clone())
+    }
+
     pub fn get_fastest_pool(&self, limit: usize) -> Vec<String> {
         let mut sorted = self.nodes.clone();
         sorted.sort_by(|a, b| {
@@ -1,6 +1,10 @@
 use once_cell::sync::Lazy;
 use tokio::runtime::Runtime;
 use reqwest::Client;
+use std::collections::HashMap;
+use std::sync::{Arc, RwLock};
+use ethers::providers::{Provider, Http};
+use url::Url;
 
 pub static RUNTIME: Lazy<Runtime> = Lazy::new(|| {
     Runtime::new().unwrap()
@@ -9,9 +13,28 @@ pub static RUNTIME: Lazy<Runtime> = Lazy::new(|| {
 pub static GLOBAL_HTTP_CLIENT: Lazy<Client> = Lazy::new(|| {
     Client::builder()
         .tcp_nodelay(true)
-        .pool_idle_timeout(std::time::Duration::from_secs(30))
-        .pool_max_idle_per_host(10)
+        // Accept-Encoding: gzip — крупные ответы (receipts, logs, batch) заметно меньше по сети
+        .gzip(true)
+        // Один пул соединений на все провайдеры: держим keep-alive дольше и больше idle-сокетов на хост,
+        // чтобы параллельные broadcast/prefetch не открывали новые TCP+TLS соединения
+        .pool_idle_timeout(std::time::Duration::from_secs(75))
+        .pool_max_idle_per_host(32)
+        .tcp_keepalive(std::time::Duration::from_secs(60))
         .timeout(std::time::Duration::from_secs(10))
         .build()
         .unwrap()
 });
+
+/// Кэш HTTP-провайдеров по URL: провайдер создаётся один раз и переиспользуется всеми вызовами
+static HTTP_PROVIDERS: Lazy<RwLock<HashMap<String, Arc<Provider<Http>>>>> = Lazy::new(|| {
+    RwLock::new(HashMap::new())
+});
+
+pub fn http_provider(url: &str) -> Option<Arc<Provider<Http>>> {
+    if let Some(p) = HTTP_PROVIDERS.read().unwrap().get(url) {
+        return Some(p.clone());
+    }
+    let parsed = Url::parse(url).ok()?;
+    let provider = Arc::new(Provider::new(Http::new_with_client(parsed, GLOBAL_HTTP_CLIENT.clone())));
+    Some(HTTP_PROVIDERS.write().unwrap().entry(url.to_string()).or_insert(provider).clone())
+}
@@ -1,12 +1,12 @@
 import asyncio
-from typing import Optional, Dict, List, Any, Tuple
-from collections import deque
-import re
+from typing import Optional, Dict, List, Any, Tuple, Set
+from collections import deque, OrderedDict
 import pyperclip
 import time
+from functools import lru_cache
 
-from web3 import Web3
 from eth_account import Account
+from eth_utils import is_address
 
 from textual.app import App, ComposeResult
 from textual.containers import Container, Horizontal, Vertical, VerticalScroll
@@ -21,8 +21,8 @@ from rich.text import Text
 from rich.style import Style
 from textual.message import Message
 
-from utils.aiologger import log, LogLevel
-from bot.cache import GlobalCache
+from utils.aiologger import log, LogLevel, TAG_PATTERN
+from bot.cache import GlobalCache, POW10_FLOAT
 from bot.core.bridge import BridgeManager, EngineCommand, AutoFuelSettings
 from bot.core.config import Config
 from tui.help import HELP_TEXT
@@ -34,6 +34,12 @@ except ImportError:
     dexbot_core = None
     RUST_AVAILABLE = False
 
+# is_address гоняет regex + EIP-55 checksum; адреса токенов за сессию повторяются
+_is_address = lru_cache(maxsize=16384)(is_address)
+# Нормализация адресов из событий ядра: набор адресов (токен, quote, кошельки) маленький и повторяется
+# в каждом PoolUpdate/ImpactUpdate - строка в нижнем регистре строится один раз на адрес
+_addr_lower = lru_cache(maxsize=4096)(str.lower)
+
 
 # ===================== ВАЛИДАТОРЫ =====================
 
@@ -85,19 +91,29 @@ class AddressValidator(Regex):
 # ===================== TX STATUS TRACKER =====================
 
 class TxStatusTracker:
+    __slots__ = ('_pending_txs', '_positions')
+
+    # Потолок записей: неподтверждённые tx и старые позиции вытесняются по LRU, а не копятся всю сессию
+    MAX_PENDING_TXS = 256
+    MAX_POSITIONS = 512
+
     def __init__(self):
-        self._pending_txs: Dict[str, Dict[str, Any]] = {}
-        self._positions: Dict[str, List[Dict[str, Any]]] = {}
+        self._pending_txs: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        # Key: (wallet, token) в нижнем регистре
+        self._positions: OrderedDict[Tuple[str, str], List[Dict[str, Any]]] = OrderedDict()
     
     def record_tx_sent(self, tx_hash: str, wallet: str, action: str, amount: float, token: str) -> float:
         send_time = time.time()
         self._pending_txs[tx_hash.lower()] = {
             'send_time': send_time,
+            'send_ns': time.monotonic_ns(),
             'wallet': wallet.lower(),
             'action': action.lower(),
             'amount': amount,
             'token': token.lower()
         }
+        if len(self._pending_txs) > self.MAX_PENDING_TXS:
+            self._pending_txs.popitem(last=False)
         return send_time
     
     def confirm_tx(self, tx_hash: str, gas_used: int = 0, status: int = 1) -> Optional[Dict[str, Any]]:
@@ -107,7 +123,8 @@ class TxStatusTracker:
         
         tx_info = self._pending_txs.pop(tx_hash_lower)
         confirm_time = time.time()
-        latency_ms = (confirm_time - tx_info['send_time']) * 1000
+        # Латентность по монотонным часам в целых ns: не зависит от сдвигов системного времени
+        latency_ms = (time.monotonic_ns() - tx_info['send_ns']) / 1_000_000
         
         result = {
             **tx_info,
@@ -118,9 +135,13 @@ class TxStatusTracker:
         }
         
         if tx_info['action'] == 'buy' and status == 1:
-            position_key = f"{tx_info['wallet']}:{tx_info['token']}"
+            position_key = (tx_info['wallet'], tx_info['token'])
             if position_key not in self._positions:
                 self._positions[position_key] =[]
+                if len(self._positions) > self.MAX_POSITIONS:
+                    self._positions.popitem(last=False)
+            else:
+                self._positions.move_to_end(position_key)
             self._positions[position_key].append({
                 'amount': tx_info['amount'],
                 'tx_hash': tx_hash,
@@ -131,7 +152,7 @@ class TxStatusTracker:
         return result
     
     def get_position(self, wallet: str, token: str) -> List[Dict[str, Any]]:
-        position_key = f"{wallet.lower()}:{token.lower()}"
+        position_key = (wallet.lower(), token.lower())
         return self._positions.get(position_key,[])
     
     def get_total_bought(self, wallet: str, token: str) -> float:
@@ -139,7 +160,7 @@ class TxStatusTracker:
         return sum(p['amount'] for p in positions)
     
     def clear_position(self, wallet: str, token: str):
-        position_key = f"{wallet.lower()}:{token.lower()}"
+        position_key = (wallet.lower(), token.lower())
         if position_key in self._positions:
             del self._positions[position_key]
 
@@ -151,23 +172,25 @@ class LogMessage(Message):
         super().__init__()
 
 class TextualRichLogHandler:
+    LEVEL_STYLE_MAP = {
+        LogLevel.DEBUG: Style(color="cyan"), 
+        LogLevel.INFO: Style(color="blue"),
+        LogLevel.SUCCESS: Style(color="green"), 
+        LogLevel.WARNING: Style(color="yellow"),
+        LogLevel.ERROR: Style(color="red"), 
+        LogLevel.CRITICAL: Style(bgcolor="red", color="white", bold=True),
+    }
+    DEFAULT_STYLE = Style(color="white")
+
     def __init__(self, app: App, max_messages: int = 500):
         self._app = app
         self._message_buffer = deque(maxlen=max_messages)
 
     async def emit(self, dt_str: str, level: LogLevel, message: str, dt):
-        level_style_map = {
-            LogLevel.DEBUG: Style(color="cyan"), 
-            LogLevel.INFO: Style(color="blue"),
-            LogLevel.SUCCESS: Style(color="green"), 
-            LogLevel.WARNING: Style(color="yellow"),
-            LogLevel.ERROR: Style(color="red"), 
-            LogLevel.CRITICAL: Style(bgcolor="red", color="white", bold=True),
-        }
-        prefix_style = level_style_map.get(level, Style(color="white"))
+        prefix_style = self.LEVEL_STYLE_MAP.get(level, self.DEFAULT_STYLE)
         rich_prefix = Text(f"{dt_str} -[{level.name}] - ", style=prefix_style)
         
-        formatted_message = re.sub(r"<(\w+)>(.*?)</\1>", r"[\1]\2[/\1]", message)
+        formatted_message = TAG_PATTERN.sub(r"[\1]\2[/\1]", message) if '<' in message else message
         full_message_text = rich_prefix + Text.from_markup(formatted_message)
         
         self._message_buffer.append(full_message_text)
@@ -217,6 +240,11 @@ class TradingApp(App):
 
     CSS_PATH = "app.css"
     
+    # Типов обновлений UI единицы, а повторы схлопываются - очереди хватает небольшого лимита
+    UI_UPDATE_QUEUE_MAXSIZE = 64
+    # Окно, в котором одинаковый запрос расчёта импакта не повторяется (сек)
+    IMPACT_RECALC_TTL = 1.0
+    
     BINDINGS =[
         Binding("ctrl+q", "quit", "Выход", priority=True),
         Binding("ctrl+r", "reload_wallets", "Перезагрузить кошельки", priority=True),
@@ -250,7 +278,8 @@ class TradingApp(App):
         self.available_networks = available_networks
         self.app_config = app_config
         self.bridge: Optional[BridgeManager] = None
-        self.ui_update_queue = asyncio.Queue()
+        self.ui_update_queue = asyncio.Queue(maxsize=self.UI_UPDATE_QUEUE_MAXSIZE)
+        self._pending_ui_updates: Set[str] = set()
         self._rich_log_handler: Optional[TextualRichLogHandler] = None
         
         self._background_tasks: List[asyncio.Task] =[]
@@ -272,9 +301,21 @@ class TradingApp(App):
         
         self._token_debounce_task: Optional[asyncio.Task] = None
         self._amount_debounce_task: Optional[asyncio.Task] = None
+        # Последний запрошенный расчёт импакта: повтор с теми же входами и состоянием пула в пределах TTL не шлётся
+        self._last_impact_key: Optional[tuple] = None
+        self._last_impact_at: float = 0.0
         self._last_calc_msg: str = ""
         self.status_update_task: Optional[asyncio.Task] = None
         self._native_balance_loaded = False
+        self._quote_info_rev: int = -1
+        self._quote_info: Tuple[str, str] = ("", "")
+        # Decimals quote токенов (набор маленький и известен из конфига) - предзагрузка из кэша;
+        # не найденные при старте дочитываются в _get_quote_decimals при первом появлении
+        self._quote_decimals_by_addr: Dict[str, int] = {}
+        for q_addr in app_config.QUOTE_TOKENS_LOWER.values():
+            q_dec = cache.get_token_decimals(q_addr)
+            if q_dec:
+                self._quote_decimals_by_addr[q_addr] = q_dec
 
         # Dispatcher для событий из Rust ядра
         self._rust_event_handlers = {
@@ -306,17 +347,20 @@ class TradingApp(App):
         
         self.wallets_cache_ui = self.cache.get_all_wallets(enabled_only=False)
         
-        self._background_tasks =[
-            asyncio.create_task(self.ui_updater_worker()),
-            asyncio.create_task(self._rust_event_listener()),
-            asyncio.create_task(self.status_update_loop()),
-            asyncio.create_task(self._notification_watcher()),
-        ]
+        self._background_tasks =[asyncio.create_task(self._run_background_workers())]
         
         self.notify("🚀 Интерфейс загружен", severity="information", title="TUI")
-        self.ui_update_queue.put_nowait("wallets")
+        self._request_ui_update("wallets")
         self._init_market_data_table()
 
+    async def _run_background_workers(self):
+        """Фоновые циклы в одной TaskGroup: отмена супервизора отменяет и дожидается всех воркеров"""
+        async with asyncio.TaskGroup() as tg:
+            tg.create_task(self.ui_updater_worker())
+            tg.create_task(self._rust_event_listener())
+            tg.create_task(self.status_update_loop())
+            tg.create_task(self._notification_watcher())
+
     def on_unmount(self) -> None:
         for task in self._background_tasks:
             task.cancel()
@@ -340,16 +384,19 @@ class TradingApp(App):
             'current_price': 0.0,
             'pos_cost_quote': 0.0,
             'pos_amount': 0.0,
-            'reserves': (0, 0),
+            'reserves': ('0', '0'),
             'token_symbol': 'TOKEN'
         }
 
     def _get_quote_info(self) -> Tuple[str, str]:
-        """Возвращает (символ котируемой валюты, адрес котируемой валюты)"""
-        config = self.cache.get_config()
-        quote_symbol = config.get('default_quote_currency', self.app_config.DEFAULT_QUOTE_CURRENCY)
-        quote_address = self.app_config.QUOTE_TOKENS.get(quote_symbol, "")
-        return quote_symbol, quote_address
+        """Возвращает (символ котируемой валюты, адрес в нижнем регистре). Пересчёт только после изменения конфига"""
+        rev = self.cache.get_config_rev()
+        if rev != self._quote_info_rev:
+            config = self.cache.get_config()
+            quote_symbol = config.get('default_quote_currency', self.app_config.DEFAULT_QUOTE_CURRENCY)
+            self._quote_info = (quote_symbol, self.app_config.QUOTE_TOKENS_LOWER.get(quote_symbol, ""))
+            self._quote_info_rev = rev
+        return self._quote_info
 
     def _short_wallet(self, wallet: str) -> str:
         """Сокращает адрес кошелька для отображения в логах"""
@@ -366,7 +413,7 @@ class TradingApp(App):
     def _trigger_wallets_refresh(self):
         """Обновляет кэш кошельков и запрашивает перерисовку таблицы"""
         self.wallets_cache_ui = self.cache.get_all_wallets(enabled_only=False)
-        self.ui_update_queue.put_nowait("wallets")
+        self._request_ui_update("wallets")
 
     def _init_ui_defaults(self):
         try:
@@ -395,13 +442,14 @@ class TradingApp(App):
             pass
 
     def _is_event_for_current_pair(self, event_token: str, event_quote: Optional[str] = None) -> bool:
-        """Проверяет что событие относится к текущей паре token/quote"""
+        """Проверяет что событие относится к текущей паре token/quote.
+        Адреса события и текущей пары уже в нижнем регистре."""
         if not self._current_token_address:
             return False
-        if event_token and event_token != self._current_token_address.lower():
+        if event_token and event_token != self._current_token_address:
             return False
         if event_quote and self._current_quote_address:
-            if event_quote.lower() != self._current_quote_address.lower():
+            if event_quote != self._current_quote_address:
                 return False
         return True
 
@@ -468,7 +516,7 @@ class TradingApp(App):
     async def _evt_engine_ready(self, data: dict):
         await log.success("<green>[ENGINE]</green> Rust ядро готово к работе")
         self.notify("⚡ Ядро Rust готово", severity="information", title="System")
-        self.ui_update_queue.put_nowait("refresh_all")
+        self._request_ui_update("refresh_all")
         if self.bridge: 
             self.bridge.send(EngineCommand.refresh_all_balances())
             
@@ -516,26 +564,29 @@ class TradingApp(App):
         self._update_status_widget(StatusGas, self.current_gas_price_gwei)
 
     async def _evt_balance_update(self, data: dict):
-        wallet = data.get('wallet', '').lower()
-        token = data.get('token', '').lower()
-        wei = data.get('wei', '0')
+        # Адреса уже приведены к нижнему регистру мостом
+        wallet = data.get('wallet', '')
+        token = data.get('token', '')
         float_val = data.get('float_val', 0.0)
+        # wei приходит десятичной строкой (U256 не помещается в JSON-число) - парсим один раз
+        try: wei = int(data.get('wei') or 0)
+        except (TypeError, ValueError): wei = 0
 
         if wallet not in self._balance_cache: 
             self._balance_cache[wallet] = {}
 
         self._balance_cache[wallet][token] = float_val
-        self.cache.set_exact_balance_wei(wallet, token, int(wei) if str(wei).isdigit() else 0)
+        self.cache.set_exact_balance_wei(wallet, token, wei if wei > 0 else 0)
         self.cache.set_wallet_balance(wallet, token, float_val)
 
-        if token == self.app_config.NATIVE_CURRENCY_ADDRESS.lower(): 
+        if token == self.app_config.NATIVE_CURRENCY_ADDRESS_LOWER: 
             self._native_balance_loaded = True
 
-        self.ui_update_queue.put_nowait("refresh_balances")
+        self._request_ui_update("refresh_balances")
 
     async def _evt_pool_detected(self, data: dict):
-        event_token = data.get('token', '').lower()
-        event_quote = data.get('quote', '').lower()
+        event_token = _addr_lower(data.get('token', ''))
+        event_quote = _addr_lower(data.get('quote', ''))
         if not self._is_event_for_current_pair(event_token, event_quote):
             return
 
@@ -554,13 +605,11 @@ class TradingApp(App):
                     symbol=token_symbol,
                     name=data.get('token_name')
                 )
-                # БД запрос в фоне, не блокирует
-                asyncio.create_task(
-                    self.cache.db.add_or_update_recent_token(
-                        self._current_token_address,
-                        name=data.get('token_name'),
-                        symbol=token_symbol
-                    )
+                # БД запись пачкой в фоне, не блокирует
+                self.cache.queue_recent_token(
+                    self._current_token_address,
+                    name=data.get('token_name'),
+                    symbol=token_symbol
                 )
         
         await self._update_token_pair_display()
@@ -569,8 +618,8 @@ class TradingApp(App):
         
     async def _evt_pool_error(self, data: dict):
         await log.error(f"[POOL_ERROR] FULL DATA: {data}")
-        event_token = data.get('token', '').lower()
-        event_quote = data.get('quote', '').lower()
+        event_token = _addr_lower(data.get('token', ''))
+        event_quote = _addr_lower(data.get('quote', ''))
         if not self._is_event_for_current_pair(event_token, event_quote):
             return
         
@@ -580,33 +629,36 @@ class TradingApp(App):
         self._update_trade_buttons_state()
 
     async def _evt_pool_update(self, data: dict):
-        event_token = data.get('token', '').lower()
-        event_quote = data.get('quote', '').lower()
+        event_token = _addr_lower(data.get('token', ''))
+        event_quote = _addr_lower(data.get('quote', ''))
         if not self._is_event_for_current_pair(event_token, event_quote):
             return
                 
         self._current_pool_info['pool_type'] = data.get('pool_type', '')
         self._current_pool_info['address'] = data.get('pool_address', '')
 
-        if data.get('spot_price') is not None:
-            self._market_data['current_price'] = float(data.get('spot_price'))
+        # Ядро присылает цену и TVL уже нормализованными f64, адреса - в нижнем регистре
+        spot_price = data.get('spot_price')
+        if spot_price is not None:
+            self._market_data['current_price'] = spot_price
 
-        if data.get('liquidity_usd') is not None:
-            self._market_data['tvl_usd'] = float(data.get('liquidity_usd', 0))
+        liquidity_usd = data.get('liquidity_usd')
+        if liquidity_usd is not None:
+            self._market_data['tvl_usd'] = liquidity_usd
 
-        if data.get('reserve0') and data.get('reserve1'):
-            try: 
-                self._market_data['reserves'] = (int(data.get('reserve0', '0')), int(data.get('reserve1', '0')))
-            except Exception: pass
+        # Резервы нужны только как ключ изменения состояния пула - строки не разбираются в int
+        reserve0, reserve1 = data.get('reserve0'), data.get('reserve1')
+        if reserve0 and reserve1:
+            self._market_data['reserves'] = (reserve0, reserve1)
         
         if self._current_token_address and not self.is_pool_loading:
             self._trigger_impact_calc()
-        self.ui_update_queue.put_nowait("refresh_market_data")
+        self._request_ui_update("refresh_market_data")
 
     async def _evt_pool_not_found(self, data: dict):
         await log.error(f"[POOL_NOT_FOUND] FULL DATA: {data}")
-        event_token = data.get('token', '').lower()
-        event_quote = data.get('quote', '').lower()
+        event_token = _addr_lower(data.get('token', ''))
+        event_quote = _addr_lower(data.get('quote', ''))
         if not self._is_event_for_current_pair(event_token, event_quote):
             return
         
@@ -632,8 +684,8 @@ class TradingApp(App):
             self._update_trade_buttons_state()
 
     async def _evt_impact_update(self, data: dict):
-        event_token = data.get('token', '').lower()
-        event_quote = data.get('quote', '').lower()
+        event_token = _addr_lower(data.get('token', ''))
+        event_quote = _addr_lower(data.get('quote', ''))
         if not self._is_event_for_current_pair(event_token, event_quote):
             return
         
@@ -645,7 +697,7 @@ class TradingApp(App):
         else: 
             self._market_data['impact_sell'] = impact_pct
 
-        self.ui_update_queue.put_nowait("refresh_market_data")
+        self._request_ui_update("refresh_market_data")
 
     async def _evt_tx_sent(self, data: dict):
         """Обрабатывает событие отправки транзакции"""
@@ -732,9 +784,13 @@ class TradingApp(App):
                     
                     # Сбрасываем impact
                     self._market_data['impact_sell'] = 0.0
-                    self.ui_update_queue.put_nowait("refresh_market_data")
+                    self._request_ui_update("refresh_market_data")
                 #else:
                 #    await log.debug(f"[TX_CONFIRMED] NOT CLOSING POSITION | reason: action='{action}' (need 'sell'), wallet={'SET' if wallet else 'EMPTY'}, token={'SET' if token else 'EMPTY'}")
+            elif status == "timeout":
+                # Receipt так и не пришёл - ядро прекратило отслеживание
+                await log.warning(f"<yellow>[TX TIMEOUT]</yellow> {action_ru} | tx_hash={tx_hash[:16]}... | receipt не получен")
+                self.notify(f"⏱ {action_ru}: подтверждение не получено\nTX: {tx_hash[:16]}...", severity="warning", title=f"{action_ru}")
             else:
                 await log.error(f"<red>[TX FAILED]</red> {action_ru} | Latency: {latency_ms:.0f}ms")
                 self.notify(f"❌ {action_ru} ошибка!\nLatency: {latency_ms:.0f}ms", severity="error", title=f"{action_ru}")
@@ -794,7 +850,7 @@ class TradingApp(App):
                     action, wallet, token_address, amount, 
                     tokens_received, tokens_sold, token_decimals
                 )
-            self.ui_update_queue.put_nowait("refresh_balances")
+            self._request_ui_update("refresh_balances")
             
         elif status == "success":
             tx_result = self._tx_tracker.confirm_tx(tx_hash, gas_used, 1)
@@ -813,7 +869,7 @@ class TradingApp(App):
                 #await log.debug(f"[AFTER CLOSE] {short_wallet} | cost={pos_after['cost']}, amount={pos_after['amount']}")
                 
                 self._market_data['impact_sell'] = 0.0
-                self.ui_update_queue.put_nowait("refresh_market_data")
+                self._request_ui_update("refresh_market_data")
                 
         elif status in ("failed", "error"):
             tx_result = self._tx_tracker.confirm_tx(tx_hash, gas_used, 0)
@@ -848,8 +904,8 @@ class TradingApp(App):
         if action == "buy":
             try:
                 _, quote_address = self._get_quote_info()
-                quote_decimals = self.cache.get_token_decimals(quote_address) or 18
-                cost_wei = int(float(amount) * (10**quote_decimals))
+                quote_decimals = self._get_quote_decimals(quote_address)
+                cost_wei = int(float(amount) * POW10_FLOAT[quote_decimals])
                 
                 #await log.debug(f"[BUY] cost_wei={cost_wei} | quote_decimals={quote_decimals} | amount={amount}")
                 
@@ -882,7 +938,7 @@ class TradingApp(App):
             "token": data.get('token', '')
         }
         self._update_market_data_from_pool(data)
-        self.ui_update_queue.put_nowait("refresh_market_data")
+        self._request_ui_update("refresh_market_data")
     
     def _update_market_data_from_pool(self, data: dict):
         self._market_data['pool_type'] = data.get('pool_type', '-')
@@ -895,10 +951,21 @@ class TradingApp(App):
 
     # ===================== ФОНОВЫЕ ЦИКЛЫ =====================
 
+    def _request_ui_update(self, update_type: str):
+        """Запрос перерисовки: одинаковые запросы, ещё не обработанные воркером, схлопываются"""
+        if update_type in self._pending_ui_updates:
+            return
+        try:
+            self.ui_update_queue.put_nowait(update_type)
+            self._pending_ui_updates.add(update_type)
+        except asyncio.QueueFull:
+            pass
+
     async def ui_updater_worker(self):
         while True:
             try:
                 update_type = await self.ui_update_queue.get()
+                self._pending_ui_updates.discard(update_type)
                 
                 if update_type == "refresh_balances": 
                     await self._refresh_wallet_table()
@@ -930,32 +997,44 @@ class TradingApp(App):
                     event = await asyncio.wait_for(self.bridge._event_queue.get(), timeout=5.0)
                 except asyncio.TimeoutError:
                     continue 
-                    
-                asyncio.create_task(self.handle_rust_event(event))
+                
+                # Обработчики не блокируют - выполняем их прямо здесь, по порядку прихода,
+                # вычитывая всё накопившееся без отдельной задачи на каждое событие
+                while event is not None:
+                    try:
+                        await self.handle_rust_event(event)
+                    except asyncio.CancelledError:
+                        raise
+                    except Exception as e:
+                        await log.error(f"Rust event handler error ({event.get('type')}): {e}")
+                    try:
+                        event = self.bridge._event_queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        event = None
             except asyncio.CancelledError: 
                 break
             except Exception: 
                 await asyncio.sleep(0.1)
 
     async def status_update_loop(self):
-        counter = 0
         while True:
             try:
-                if counter % 10 == 0: 
-                    self._update_status_widget(StatusRPC, "OK", True)
-
+                # Кэш пересобирает снимок кошельков только при изменении - достаточно сравнить объект,
+                # без поэлементного сравнения списка словарей каждую секунду
                 new_wallets_data = self.cache.get_all_wallets(enabled_only=False)
-                if new_wallets_data != self.wallets_cache_ui:
+                if new_wallets_data is not self.wallets_cache_ui:
                     self._trigger_wallets_refresh()
 
+                # Активный токен и quote читаются один раз за цикл и передаются в расчёты ниже
                 active_token = self.cache.get_active_trade_token()
                 
                 try:
                     metadata_display = self.query_one("#token_metadata_display", Static)
                     
                     if active_token:
-                        await self._calculate_total_position(active_token)
-                        self.ui_update_queue.put_nowait("refresh_market_data")
+                        _, quote_address = self._get_quote_info()
+                        await self._calculate_total_position(active_token, quote_address)
+                        self._request_ui_update("refresh_market_data")
                         
                         token_symbol = "TOKEN"
                         try:
@@ -966,7 +1045,7 @@ class TradingApp(App):
                         except Exception: 
                             pass
                         
-                        pool_status = self._get_pool_status_display(active_token)
+                        pool_status = self._get_pool_status_display(active_token, quote_address)
                         metadata_display.update(f"Token Info:[bold cyan]{token_symbol}[/] {pool_status}")
                     else:
                         metadata_display.update("Token Info: [dim]None[/]")
@@ -975,34 +1054,31 @@ class TradingApp(App):
                     pass
 
                 self._update_trade_buttons_state()
-                counter += 1
             except Exception as e:
                 await log.error(f"UI Loop Error: {e}")
             await asyncio.sleep(1.0)
 
-    async def _calculate_total_position(self, active_token: str):
-        _, quote_address = self._get_quote_info()
-        total_cost = 0.0
-        total_amount = 0.0
-        q_dec = self.cache.get_token_decimals(quote_address) or 18
+    def _get_quote_decimals(self, quote_address: str) -> int:
+        q_dec = self._quote_decimals_by_addr.get(quote_address)
+        if q_dec is None:
+            q_dec = self.cache.get_token_decimals(quote_address)
+            if not q_dec:
+                return 18
+            self._quote_decimals_by_addr[quote_address] = q_dec
+        return q_dec
+
+    async def _calculate_total_position(self, active_token: str, quote_address: str):
+        q_dec = self._get_quote_decimals(quote_address)
         t_dec = self.cache.get_token_decimals(active_token) or 18
 
-        for w in self.wallets_cache_ui:
-            if w.get('enabled'):
-                try:
-                    pos = self.cache.get_position_memory(w['address'], active_token)
-                    total_cost += pos['cost'] / (10**q_dec)
-                    
-                    bal_wei = self.cache.get_exact_balance_wei(w['address'], active_token) or 0
-                    total_amount += bal_wei / (10**t_dec)
-                except Exception: pass
+        # Суммы по всем включённым кошелькам одним вызовом, в wei; деление на масштаб - один раз
+        enabled = [w['address'] for w in self.wallets_cache_ui if w.get('enabled') and w.get('address')]
+        total_cost_wei, total_amount_wei = self.cache.get_position_totals(enabled, active_token)
         
-        self._market_data['pos_cost_quote'] = total_cost
-        self._market_data['pos_amount'] = total_amount
+        self._market_data['pos_cost_quote'] = total_cost_wei / POW10_FLOAT[q_dec]
+        self._market_data['pos_amount'] = total_amount_wei / POW10_FLOAT[t_dec]
 
-    def _get_pool_status_display(self, active_token: str) -> str:
-        _, quote_address = self._get_quote_info()
-        
+    def _get_pool_status_display(self, active_token: str, quote_address: str) -> str:
         if self._current_pool_info.get('pool_type'):
             self.is_pool_loading = False
             return f"[bold green]({self._current_pool_info.get('pool_type', '?')})[/]"
@@ -1069,7 +1145,7 @@ class TradingApp(App):
 
         self.query_one("#token_metadata_display", Static).update("Token Info: [dim]...[/]")
 
-        if Web3.is_address(token_address):
+        if _is_address(token_address):
             self._current_token_address = token_address.lower()
             self._current_pool_info = {} 
             self.is_pool_loading = True
@@ -1116,7 +1192,7 @@ class TradingApp(App):
         # await log.debug(f"[SWITCH_TOKEN] rpc_url={self.app_config.RPC_URL[:50]}...")
         
         # Сохраняем quote для фильтрации
-        self._current_quote_address = quote_address.lower() if quote_address else None
+        self._current_quote_address = self.app_config.QUOTE_TOKENS_LOWER.get(quote_symbol) or None
 
         if self.bridge: 
             self.bridge.send(EngineCommand.switch_token(token_address, quote_address, quote_symbol))
@@ -1153,32 +1229,59 @@ class TradingApp(App):
                 if not final_amount or final_amount <= 0:
                     final_amount = float(self.cache.get_config().get('default_trade_amount', 0.01))
             
-            quote_symbol = str(self.query_one("#trade_quote_select").value)
-            quote_address = self.app_config.QUOTE_TOKENS.get(quote_symbol, "")
+            # Адрес quote уже в нижнем регистре и обновляется при каждой смене валюты -
+            # без запроса виджета и поиска по конфигу на каждом пересчёте
+            quote_address = self._current_quote_address
+            if not quote_address:
+                quote_symbol = str(self.query_one("#trade_quote_select").value)
+                quote_address = self.app_config.QUOTE_TOKENS_LOWER.get(quote_symbol, "")
             
             if self.bridge:
+                token_addr = self._current_token_address
+                total_tokens_wei = sum(
+                    self.cache.get_exact_balance_wei(w['address_lower'], token_addr) or 0
+                    for w in self.wallets_cache_ui if w.get('enabled')
+                )
+                
+                # Те же суммы и то же состояние пула недавно уже считались - результат не изменится
+                impact_key = (
+                    token_addr, quote_address, final_amount, total_tokens_wei,
+                    self._market_data.get('reserves'), self._market_data.get('current_price')
+                )
+                now = time.monotonic()
+                if impact_key == self._last_impact_key and now - self._last_impact_at < self.IMPACT_RECALC_TTL:
+                    return
+                self._last_impact_key = impact_key
+                self._last_impact_at = now
+                
+                # Обе команды уходят в ядро одной пачкой
+                commands = []
+                
                 # === ВСЕГДА считаем BUY impact ===
                 if final_amount > 0:
-                    self.bridge.send(EngineCommand.calc_impact(
+                    commands.append(EngineCommand.calc_impact(
                         token_address=self._current_token_address, quote_address=quote_address,
                         amount_in=final_amount, is_buy=True
                     ))
                 
                 # === ВСЕГДА считаем SELL impact ===
-                wallets_to_trade = [w['address'] for w in self.wallets_cache_ui if w.get('enabled')]
-                total_tokens_wei = sum(self.cache.get_exact_balance_wei(w, self._current_token_address) or 0 for w in wallets_to_trade)
                 token_dec = self.cache.get_token_decimals(self._current_token_address) or 18
-                amount_to_sell = total_tokens_wei / (10**token_dec)
+                amount_to_sell = total_tokens_wei / POW10_FLOAT[token_dec]
                 
                 if amount_to_sell > 0:
-                    self.bridge.send(EngineCommand.calc_impact(
+                    commands.append(EngineCommand.calc_impact(
                         token_address=self._current_token_address, quote_address=quote_address,
                         amount_in=amount_to_sell, is_buy=False
                     ))
                 else:
                     # Нет токенов - обнуляем sell impact
                     self._market_data['impact_sell'] = 0.0
-                    self.ui_update_queue.put_nowait("refresh_market_data")
+                    self._request_ui_update("refresh_market_data")
+                
+                if len(commands) == 1:
+                    self.bridge.send(commands[0])
+                elif commands:
+                    self.bridge.send(EngineCommand.batch(commands))
         except Exception: pass
 
     @on(Select.Changed, "#trade_quote_select")
@@ -1187,7 +1290,7 @@ class TradingApp(App):
         quote_address = self.app_config.QUOTE_TOKENS.get(quote_symbol, "")
         
         # СНАЧАЛА обновляем quote - фильтр начнёт работать сразу
-        self._current_quote_address = quote_address.lower() if quote_address else None
+        self._current_quote_address = self.app_config.QUOTE_TOKENS_LOWER.get(quote_symbol) or None
         
         await self.cache.update_config({"default_quote_currency": quote_symbol})
         self.notify(f"Валюта изменена на {quote_symbol}", timeout=1)
@@ -1214,7 +1317,7 @@ class TradingApp(App):
             await log.warning(f"[TUI] Quote address not found for symbol: {quote_symbol}")
             return
         
-        self._current_quote_address = quote_address.lower()
+        self._current_quote_address = self.app_config.QUOTE_TOKENS_LOWER[quote_symbol]
         
         await self.cache.update_config({"default_quote_currency": quote_symbol})
         self.notify(f"Quote валюта: {quote_symbol}", timeout=1)
@@ -1321,17 +1424,17 @@ class TradingApp(App):
             wei = self.cache.get_or_load_balance_wei(w_addr, token_address)
             if wei:
                 total_tokens_wei += wei
-                amounts_wei_dict[w_addr.lower()] = str(wei)
+                amounts_wei_dict[w_addr] = str(wei)
         
         if total_tokens_wei > 0:
-            final_amount = total_tokens_wei / (10**decimals)
+            final_amount = total_tokens_wei / POW10_FLOAT[decimals]
             # ИЗ КЭША - мгновенно, без await и БД
             meta = self.cache.get_token_metadata_cached(token_address)
             display_symbol = meta.get('symbol', 'TOKEN') if meta else "TOKEN"
             return final_amount, display_symbol
         return 0.0, "TOKEN"
 
-    async def _prepare_buy_data(self, wallets_to_trade: List[str], quote_symbol: str, quote_address: str) -> Tuple[float, str]:
+    async def _prepare_buy_data(self, total_quote_balance: float, quote_symbol: str) -> Tuple[float, str]:
         final_amount = self.cache.get_active_trade_amount_for_quote()
         
         if final_amount is None or final_amount <= 0:
@@ -1340,10 +1443,8 @@ class TradingApp(App):
                 try:
                     if val_str.endswith('%'):
                         pct = float(val_str[:-1])
-                        if quote_address:
-                            total_bal = sum(self.cache.get_wallet_balances(w['address']).get(quote_address.lower(), 0.0) for w in wallets_to_trade)
-                            final_amount = total_bal * (pct / 100.0)
-                            if pct == 100: final_amount *= 0.999
+                        final_amount = total_quote_balance * (pct / 100.0)
+                        if pct == 100: final_amount *= 0.999
                     else: 
                         final_amount = float(val_str)
                 except Exception: pass
@@ -1364,10 +1465,11 @@ class TradingApp(App):
         except Exception: pass
         
         token_address = self.query_one("#token_input").value.strip()
-        if not Web3.is_address(token_address): 
+        if not _is_address(token_address): 
             return self.notify("Введите корректный адрес токена!", severity="error")
         
-        wallets_to_trade = [w['address'] for w in self.wallets_cache_ui if w.get('enabled')]
+        # Адреса сразу в нижнем регистре: ключи кэша балансов, amounts_wei и формат адресов ядра
+        wallets_to_trade = [w['address_lower'] for w in self.wallets_cache_ui if w.get('enabled')]
         if not wallets_to_trade: 
             return self.notify("Нет активных кошельков.", severity="error")
 
@@ -1379,17 +1481,15 @@ class TradingApp(App):
             if final_amount <= 0:
                 return self.notify("Нет токенов для продажи. Проверьте кэш и БД.", severity="error")
         else:
-            final_amount, display_symbol = await self._prepare_buy_data(wallets_to_trade, quote_symbol, quote_address)
+            # Балансы кошельков достаём один раз — ниже они нужны для суммы в %, проверки quote и газа
+            wallet_balances = [(w_addr, self._balance_cache.get(w_addr, {})) for w_addr in wallets_to_trade]
+            total_quote_balance = sum(bals.get(quote_address, 0.0) for _, bals in wallet_balances) if quote_address else 0.0
+
+            final_amount, display_symbol = await self._prepare_buy_data(total_quote_balance, quote_symbol)
             if final_amount <= 0:
                 return self.notify("Сумма 0 или ошибка расчета.", severity="error", timeout=5)
-            
+
             # === ПРОВЕРКА БАЛАНСА QUOTE ТОКЕНА ===
-                        # === ПРОВЕРКА БАЛАНСА QUOTE ТОКЕНА ===
-            quote_address_lower = quote_address.lower()
-            total_quote_balance = 0.0
-            for w_addr in wallets_to_trade:
-                total_quote_balance += self._balance_cache.get(w_addr.lower(), {}).get(quote_address_lower, 0.0)
-            
             if final_amount > total_quote_balance:
                 err_msg = f"Недостаточно {quote_symbol}: нужно {final_amount:.6f}, есть {total_quote_balance:.6f}"
                 await log.error(err_msg)
@@ -1397,12 +1497,12 @@ class TradingApp(App):
             )
             
             # === ПРОВЕРКА НАТИВНОЙ ВАЛЮТЫ ДЛЯ ГАЗА ===
-            native_address = self.app_config.NATIVE_CURRENCY_ADDRESS.lower()
+            native_address = self.app_config.NATIVE_CURRENCY_ADDRESS_LOWER
             native_symbol = self.app_config.NATIVE_CURRENCY_SYMBOL
             min_gas = self.app_config.MIN_NATIVE_FOR_GAS
             
-            for w_addr in wallets_to_trade:
-                native_bal = self._balance_cache.get(w_addr.lower(), {}).get(native_address, 0.0)
+            for w_addr, bals in wallet_balances:
+                native_bal = bals.get(native_address, 0.0)
                 if native_bal < min_gas:
                     await log.error(
                         f"<red>[BUY BLOCKED]</red> Недостаточно {native_symbol} для газа на кошельке "
@@ -1544,8 +1644,10 @@ class TradingApp(App):
                     self.cache.set_active_trade_amount_for_quote(None)
                     return
 
-                active_wallets =[w for w in self.wallets_cache_ui if w.get('enabled')]
-                total_balance = sum(self.cache.get_wallet_balances(w['address']).get(quote_address.lower(), 0.0) for w in active_wallets)
+                total_balance = sum(
+                    self.cache.get_wallet_balances(w['address']).get(quote_address, 0.0)
+                    for w in self.wallets_cache_ui if w.get('enabled')
+                )
                 final_amount = total_balance * (pct / 100.0)
                 if pct == 100: final_amount *= 0.999
 
@@ -1589,17 +1691,16 @@ class TradingApp(App):
             
             quote_symbol, quote_address = self._get_quote_info()
             native_symbol = self.app_config.NATIVE_CURRENCY_SYMBOL
-            native_address = self.app_config.NATIVE_CURRENCY_ADDRESS.lower()
-            quote_address = quote_address.lower()
+            native_address = self.app_config.NATIVE_CURRENCY_ADDRESS_LOWER
             
             balances_table.columns.clear()
             balances_table.add_columns("Кошелек", f"{native_symbol}(fee)", f"{quote_symbol}(quote)")
             
             for w in self.wallets_cache_ui:
                 if w.get('enabled'):
-                    w_addr = w['address'].lower()
-                    native_bal = self._balance_cache.get(w_addr, {}).get(native_address, 0.0)
-                    quote_bal = self._balance_cache.get(w_addr, {}).get(quote_address, 0.0)
+                    w_bals = self._balance_cache.get(w['address_lower'], {})
+                    native_bal = w_bals.get(native_address, 0.0)
+                    quote_bal = w_bals.get(quote_address, 0.0)
                     balances_table.add_row(w.get('name', 'Unknown'), f"{native_bal:.6f}", f"{quote_bal:.6f}")
         except Exception: pass
 
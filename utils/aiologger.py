@@ -19,6 +19,9 @@ class LogLevel(IntEnum):
 
 LogHandlerCallable = Callable[[str, LogLevel, str, datetime], Awaitable[None]]
 
+# Разметка цветов вида <green>...</green>; компилируем один раз на модуль
+TAG_PATTERN = re.compile(r"<(\w+)>(.*?)</\1>")
+
 
 class AsyncLogger:
     _instances: dict[str, 'AsyncLogger'] = {}
@@ -135,8 +138,9 @@ class AsyncLogger:
             reset_code = self._get_color_code('', custom_color='reset')
             return f"{color_code}{text}{reset_code}" if color_code else text
 
-        pattern = re.compile(r"<(\w+)>(.*?)</\1>")
-        return pattern.sub(replace_tag, message)
+        if '<' not in message:
+            return message
+        return TAG_PATTERN.sub(replace_tag, message)
     
 
     async def _log_writer(self):
@@ -171,7 +175,7 @@ class AsyncLogger:
                         log_path.parent.mkdir(parents=True, exist_ok=True)
                         self._current_log_path = log_path
 
-                    clean_message = re.sub(r"<(\w+)>(.*?)</\1>", r"\2", message_str)
+                    clean_message = TAG_PATTERN.sub(r"\2", message_str) if '<' in message_str else message_str
 
                     async with aiofiles.open(log_path, mode='a', encoding='utf-8') as f:
                         await f.write(f"{dt_str} - {level_name} - {clean_message}\n")
@@ -183,6 +187,9 @@ class AsyncLogger:
                 print(f"CRITICAL - Error in logger worker: {e} - Original record: {log_record}", flush=True) # type: ignore
 
 
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        return level >= self.level
+
     async def _write(self, level: LogLevel, message: Any, to_console: bool, to_file: bool, exc_info: bool):
         if level < self.level:
             return
@@ -243,6 +250,10 @@ class LoggerProxy:
                         self._path_template, self._level, self._custom_handler
                     )
     
+    def is_enabled_for(self, level: LogLevel) -> bool:
+        """Проверка уровня без инициализации логгера - чтобы не собирать f-строку впустую"""
+        return level >= self._level
+
     async def set_custom_handler(self, handler: LogHandlerCallable) -> None:
         await self._ensure_initialized()
         cast(AsyncLogger, self._real_logger).custom_handler = handler